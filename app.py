@@ -1,40 +1,35 @@
 # Pokè To Go! – Dashboard Operativa per Arianna
 
-import io
-import json
-import random
-import urllib.request
+import functools
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import date, timedelta
-
-# ── COLONNE ───────────────────────────────────────────────────────────────────
-
-POKE_COLS     = ['poke_reglular', 'poke_maxi', 'poke_baby', 'fruit_bowl', 'poke_veggy']
-EXTRA_COLS    = ['Avocado_venduto', 'Feta_venduto', 'Philad_venduto', 'Gomawak_venduto']
-BIBITE_COLS   = ['Acqua nat', 'Acqua gas', 'Coca cola', 'Coca zero', 'corona', 'ichnusa', 'fanta', 'Estathe limone', 'Estathe pesca']
-SORBETTI_COLS = ['Sorbetto limone', 'Sorbetto mela', 'Sorbetto mango']
-SORB_PZ_COLS  = ['Sorbetti_venduti']
-COST_COLS     = ['Dipendente']
-EXCLUDE_COLS  = set(POKE_COLS + EXTRA_COLS + BIBITE_COLS + SORBETTI_COLS + SORB_PZ_COLS + COST_COLS + ['data', 'fatturato'])
-
-CATEGORIE_ING = {
-    'Proteine': ['salmone', 'tonno', 'Tonno Saku', 'Polpo', 'Gamberetti', 'Pollo Nuggets', 'Pollo fette', 'Feta', 'Formaggio spalmabile', 'Tofu', 'Uova'],
-    'Verdure':  ['edamame', 'ceci', 'mais', 'carote', 'cetrioli', 'pomodori', 'Cavolo viola', 'zucchine', 'cipolle', 'Goma wakame'],
-    'Frutta':   ['Avocado', 'Avo Hass', 'mango', 'Lime', 'uva', 'Mele', 'melone', 'Kiwi', 'Ananas', 'Anguria'],
-    'Base':     ['iceberg', 'riso_sushi', 'riso_nero', 'Riso integrale'],
-    'Topping':  ['Sesamo nero', 'Sesamo bianco', 'Mandorle', 'nocciole', 'Cipolle croccanti', 'Pistacchio', 'Sale grosso'],
-    'Salse':    ['Salsa soya', 'Olio Evo', 'Teriyaki', 'Maionese', 'yogurt', 'poke', 'Ponzu', 'Sriracha'],
-}
-ALL_INGRED_COLS = sum(CATEGORIE_ING.values(), [])
-
-ALL_CSV_COLS = (
-    ['data', 'fatturato', 'Dipendente']
-    + POKE_COLS + EXTRA_COLS + SORB_PZ_COLS
-    + BIBITE_COLS + SORBETTI_COLS
-    + ALL_INGRED_COLS
+from datetime import date
+from poketogo.colonne import (
+    POKE_COLS, CATEGORIE_ING, ALL_CSV_COLS,
+)
+from poketogo import archivio, database, generatori, profilo
+from poketogo.cache import MANCANTE, CacheDataset
+from poketogo.caricamento import estendi_giornaliero, impronta
+from poketogo.negozi import (
+    TUTTI, abbina_fornitori, carica_negozi, consolida, descrivi_doppioni, percorsi_cartella, raggruppa,
+    unisci_fornitori,
+)
+from poketogo.fornitori import (
+    MIN_ORDINI_ANOMALIA, MIN_ORDINI_TREND, statistiche_ingredienti, prezzi_da_monitorare, prezzi_in_crescita,
+    sopra_media, trend_prezzi, zscore_prezzi,
+)
+from poketogo.metriche import SOGLIE_CRITICHE, giornate_critiche
+from poketogo.meteo import ServizioMeteo
+from poketogo.cubo import costruisci_cubo
+from poketogo.periodi import ALLINEAMENTI, AllineamentoAnni, IndiceDate
+from poketogo.kpi import variazione, ultimi_giorni, stagione, confronto_stagioni, costi_periodo
+from poketogo.qualita import righe_segnalate, verifica_giornaliero
+from poketogo.esporta import FORMATI as FORMATI_EXPORT, esporta_periodo, formati_disponibili, nome_export
+from poketogo.memoria import densifica, rapporto_memoria, sparsifica_stato
+from poketogo.profilo import cache_contata, misura, tappa
+from poketogo.grafici import (
+    px, go, PUNTI_MAX, ETICHETTE_FREQ, riduci, frequenza_barre, per_periodo, modo_scatter,
 )
 
 WMO_EMOJI = {
@@ -52,238 +47,43 @@ WMO_EMOJI = {
 def safe_pct(cost, rev):
     return cost / rev * 100 if rev > 0 else 0.0
 
-def ols_manuale(x, y):
-    n = len(x)
-    if n < 2:
-        return 0.0, (y[0] if y else 0.0)
-    mx, my = sum(x) / n, sum(y) / n
-    denom = sum((xi - mx) ** 2 for xi in x)
-    if denom == 0:
-        return 0.0, my
-    slope = sum((xi - mx) * (yi - my) for xi, yi in zip(x, y)) / denom
-    return slope, my - slope * mx
-
-# ── DISTRIBUZIONE COSTI INGREDIENTI ──────────────────────────────────────────
-
-def distribuisci_costi(df: pd.DataFrame, ingred_cols: list) -> pd.DataFrame:
-    """Spread each restock cost evenly across days until the next restock,
-    stopping at year boundaries."""
-    dist = pd.DataFrame(0.0, index=df.index, columns=ingred_cols)
-    for ing in ingred_cols:
-        s = df[['data', ing]].dropna()
-        s = s[s[ing] > 0].sort_values('data')
-        for i in range(len(s)):
-            a, val = s.iloc[i]['data'], s.iloc[i][ing]
-            fine_anno = pd.Timestamp(int(a.year), 12, 31)
-            if i < len(s) - 1:
-                b = s.iloc[i + 1]['data']
-                mask = (df['data'] >= a) & (df['data'] < b) if a.year == b.year \
-                       else (df['data'] >= a) & (df['data'] <= fine_anno)
-            else:
-                mask = (df['data'] >= a) & (df['data'] <= fine_anno)
-            n = mask.sum()
-            if n > 0:
-                dist.loc[mask, ing] += val / n
-    return dist
+def arrotonda(df: pd.DataFrame, decimali: int = 2) -> pd.DataFrame:
+    """Round only the numeric columns: DataFrame.round warns on date columns."""
+    return df.round({c: decimali for c in df.select_dtypes('number').columns})
 
 # ── METEO ─────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=3600)
-def fetch_meteo():
-    try:
-        url = (
-            "https://api.open-meteo.com/v1/forecast"
-            "?latitude=42.77&longitude=10.19"
-            "&daily=weathercode,temperature_2m_max,precipitation_sum"
-            "&timezone=Europe%2FRome&forecast_days=7"
-        )
-        with urllib.request.urlopen(url, timeout=5) as r:
-            return json.loads(r.read())['daily']
-    except Exception:
-        return None
+@st.cache_resource
+def servizio_meteo():
+    # Uno per processo: le sessioni condividono previsione e download in corso
+    return ServizioMeteo()
 
 # ── CARICAMENTO DATI ──────────────────────────────────────────────────────────
 
-@st.cache_data
-def carica_giornaliero(file_bytes: bytes) -> tuple:
-    df = pd.read_csv(io.BytesIO(file_bytes), sep=';').dropna(how='all')
-    df['data'] = pd.to_datetime(df['data'], dayfirst=True, errors='coerce')
-    df = df.dropna(subset=['data']).sort_values('data').reset_index(drop=True)
-    for col in df.columns:
-        if col != 'data':
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    # Rileva tutte le colonne dipendente (Dipendente, Dipendente2, ecc.) e le somma
-    dip_cols = [c for c in df.columns if c.lower().startswith('dipendente')]
-    df['Dipendente'] = df[dip_cols].sum(axis=1).fillna(0) if dip_cols else 0.0
-
-    # Ingredienti = tutto ciò che non è una colonna nota — escluse anche le extra dip_cols
-    exclude_dyn = EXCLUDE_COLS | set(dip_cols)
-    ingred_cols = [c for c in df.columns if c not in exclude_dyn]
-
-    df_dist = distribuisci_costi(df, ingred_cols)
-    df['ing_dist']       = df_dist.sum(axis=1)
-    df['bib_sorb_costo'] = df[[c for c in BIBITE_COLS + SORBETTI_COLS if c in df.columns]].sum(axis=1)
-    df['poke_totali']    = df[[c for c in POKE_COLS if c in df.columns]].sum(axis=1).fillna(0)
-    df['extra_totali']   = df[[c for c in EXTRA_COLS if c in df.columns]].sum(axis=1).fillna(0)
-    df['utile_lordo']    = df['fatturato'] - df['ing_dist'] - df['bib_sorb_costo'] - df['Dipendente']
-    df['pct_ingredienti'] = df.apply(lambda r: safe_pct(r['ing_dist'],   r['fatturato']), axis=1)
-    df['pct_dipendenti']  = df.apply(lambda r: safe_pct(r['Dipendente'], r['fatturato']), axis=1)
-    df['anno']  = df['data'].dt.year
-    df['mm_dd'] = df['data'].dt.strftime('%m-%d')
-    return df, df_dist, ingred_cols
-
-@st.cache_data
-def carica_fornitori(file_bytes: bytes):
-    try:
-        df = pd.read_csv(io.BytesIO(file_bytes), sep=';').dropna(how='all')
-        df['data']     = pd.to_datetime(df['data'], dayfirst=True, errors='coerce')
-        df['quantita'] = pd.to_numeric(df['quantita'], errors='coerce')
-        df['spesa']    = pd.to_numeric(df['spesa'],    errors='coerce')
-        df = df.dropna(subset=['data']).sort_values('data').reset_index(drop=True)
-        df['prezzo_unitario'] = df['spesa'] / df['quantita'].replace(0, float('nan'))
-        return df
-    except Exception:
-        return None
+@st.cache_resource
+def cache_dataset():
+    # Una per processo: le sessioni con gli stessi file condividono i frame
+    return CacheDataset()
+
+@st.cache_resource
+def impronte_cartella():
+    # Una per processo: {percorso: ((dimensione, mtime), impronta)} dei CSV di POKETOGO_DATI
+    return {}
+
+# Il frame non viene hashato: la chiave è (dataset, periodo, formato)
+@cache_contata(st.cache_data(max_entries=8, show_spinner=False))
+def export_periodo(chiave, inizio, fine, formato: str, _df):
+    return esporta_periodo(_df, formato)
 
 # ── GENERATORI DATI DI ESEMPIO ────────────────────────────────────────────────
 
-@st.cache_data
+@cache_contata(st.cache_data)
 def genera_csv_giornaliero():
-    rng = random.Random(42)
-    ing_ranges = {
-        'salmone': (80,200), 'tonno': (60,150), 'Tonno Saku': (40,100), 'Polpo': (50,120),
-        'Gamberetti': (40,90), 'Pollo Nuggets': (20,50), 'Pollo fette': (20,50),
-        'Feta': (15,40), 'Formaggio spalmabile': (10,30), 'Tofu': (10,25), 'Uova': (5,15),
-        'edamame': (15,35), 'ceci': (5,15), 'mais': (5,12), 'carote': (3,8),
-        'cetrioli': (4,10), 'pomodori': (5,15), 'Cavolo viola': (4,10),
-        'zucchine': (4,10), 'cipolle': (3,8), 'Goma wakame': (15,35),
-        'Avocado': (20,60), 'Avo Hass': (20,60), 'mango': (15,40), 'Lime': (5,15),
-        'uva': (5,15), 'Mele': (5,12), 'melone': (8,20), 'Kiwi': (5,15),
-        'Ananas': (8,20), 'Anguria': (10,30),
-        'iceberg': (8,20), 'riso_sushi': (20,50), 'riso_nero': (15,40), 'Riso integrale': (10,25),
-        'Sesamo nero': (5,15), 'Sesamo bianco': (5,15), 'Mandorle': (10,25), 'nocciole': (10,25),
-        'Cipolle croccanti': (8,20), 'Pistacchio': (15,35), 'Sale grosso': (2,6),
-        'Salsa soya': (10,30), 'Olio Evo': (15,40), 'Teriyaki': (15,35),
-        'Maionese': (8,20), 'yogurt': (5,15), 'poke': (8,20), 'Ponzu': (10,25), 'Sriracha': (8,20),
-    }
-    _prot = set(CATEGORIE_ING['Proteine'])
-    _freq_breve = {'iceberg','riso_sushi','riso_nero','Riso integrale','Avocado','Avo Hass','mango','Anguria','melone'}
-    ing_freq = {
-        ing: (2,4) if ing in _prot else (3,5) if ing in _freq_breve else (5,9)
-        for ing in ALL_INGRED_COLS
-    }
-    rows = []
-    for year in [2024, 2025]:
-        start, end = date(year, 6, 1), date(year, 9, 30)
-        n_days = (end - start).days + 1
-        next_restock = {ing: 0 for ing in ALL_INGRED_COLS}
-        for i in range(n_days):
-            day = start + timedelta(days=i)
-            m, dom, dow = day.month, day.day, day.weekday()
-            if   m == 6:               base = rng.uniform(350, 700)
-            elif m == 7 and dom <= 14: base = rng.uniform(600, 1000)
-            elif m == 7:               base = rng.uniform(800, 1300)
-            elif m == 8 and dom <= 20: base = rng.uniform(900, 1400)
-            elif m == 8:               base = rng.uniform(700, 1100)
-            elif m == 9 and dom <= 15: base = rng.uniform(500, 800)
-            else:                      base = rng.uniform(300, 600)
-            if dow >= 5:
-                base *= rng.uniform(1.15, 1.25)
-            if year == 2025:
-                base *= rng.uniform(1.03, 1.10)
-            fatturato = round(base, 2)
-            tot = max(1, int(fatturato / rng.uniform(11, 15)))
-            p_reg   = max(0, int(tot * rng.uniform(0.50, 0.62)))
-            p_maxi  = max(0, int(tot * rng.uniform(0.15, 0.25)))
-            p_baby  = max(0, int(tot * rng.uniform(0.07, 0.13)))
-            p_fruit = max(0, int(tot * rng.uniform(0.03, 0.07)))
-            p_veg   = max(0, tot - p_reg - p_maxi - p_baby - p_fruit)
-            sc = tot / 60.0
-            row = {
-                'data': day.strftime('%d/%m/%Y'), 'fatturato': fatturato,
-                'Dipendente': float(rng.choice([70, 75, 80, 85, 90])),
-                'poke_reglular': p_reg, 'poke_maxi': p_maxi, 'poke_baby': p_baby,
-                'fruit_bowl': p_fruit, 'poke_veggy': p_veg,
-                'Avocado_venduto':  round(p_reg * rng.uniform(0.25, 0.40) * 1.5, 2),
-                'Feta_venduto':     round(p_reg * rng.uniform(0.10, 0.20) * 1.5, 2),
-                'Philad_venduto':   round(p_reg * rng.uniform(0.15, 0.25) * 1.5, 2),
-                'Gomawak_venduto':  round(p_reg * rng.uniform(0.20, 0.35) * 1.5, 2),
-                'Sorbetti_venduti': max(0, int(tot * rng.uniform(0.20, 0.50))),
-                'Acqua nat':       round(rng.uniform(0.8, 1.5) * sc * 10, 2),
-                'Acqua gas':       round(rng.uniform(0.5, 1.2) * sc * 10, 2),
-                'Coca cola':       round(rng.uniform(1.0, 2.0) * sc * 10, 2),
-                'Coca zero':       round(rng.uniform(0.5, 1.5) * sc * 10, 2),
-                'corona':          round(rng.uniform(0.8, 1.8) * sc * 10, 2),
-                'ichnusa':         round(rng.uniform(0.8, 1.5) * sc * 10, 2),
-                'fanta':           round(rng.uniform(0.4, 0.9) * sc * 10, 2),
-                'Estathe limone':  round(rng.uniform(0.4, 0.8) * sc * 10, 2),
-                'Estathe pesca':   round(rng.uniform(0.3, 0.7) * sc * 10, 2),
-                'Sorbetto limone': round(rng.uniform(1.0, 2.5) * sc * 8, 2),
-                'Sorbetto mela':   round(rng.uniform(0.8, 2.0) * sc * 8, 2),
-                'Sorbetto mango':  round(rng.uniform(0.9, 2.2) * sc * 8, 2),
-            }
-            for ing in ALL_INGRED_COLS:
-                if i >= next_restock[ing]:
-                    lo, hi = ing_ranges[ing]
-                    row[ing] = round(rng.uniform(lo, hi), 2)
-                    fmin, fmax = ing_freq[ing]
-                    next_restock[ing] = i + rng.randint(fmin, fmax)
-                else:
-                    row[ing] = ''
-            rows.append(row)
-    df_fake = pd.DataFrame(rows)[ALL_CSV_COLS]
-    buf = io.StringIO()
-    df_fake.to_csv(buf, sep=';', index=False)
-    return buf.getvalue().encode('utf-8')
-
-@st.cache_data
+    return generatori.genera_csv_giornaliero()
+
+@cache_contata(st.cache_data)
 def genera_csv_fornitori():
-    rng = random.Random(99)
-    config = {
-        'salmone':    ('Mario Pesca',    'kg', 32.0),
-        'tonno':      ('Mario Pesca',    'kg', 25.0),
-        'Polpo':      ('FruttaMare',     'kg', 18.0),
-        'Gamberetti': ('FruttaMare',     'kg', 16.0),
-        'Avocado':    ('FruttaElba',     'pz',  1.1),
-        'riso_sushi': ('Grossisti Elba', 'kg',  4.2),
-        'iceberg':    ('FruttaElba',     'kg',  2.5),
-        'Salsa soya': ('Grossisti Elba', 'lt',  6.0),
-    }
-    freq = {
-        'salmone': (2,4), 'tonno': (2,4), 'Polpo': (3,5), 'Gamberetti': (3,5),
-        'Avocado': (3,5), 'riso_sushi': (5,8), 'iceberg': (4,6), 'Salsa soya': (7,12),
-    }
-    rows = []
-    for year in [2024, 2025]:
-        start, end = date(year, 6, 1), date(year, 9, 30)
-        n_days = (end - start).days + 1
-        next_order = {ing: 0 for ing in config}
-        for i in range(n_days):
-            d = start + timedelta(days=i)
-            for ing, (fornitore, unita, prezzo_base) in config.items():
-                if i >= next_order[ing]:
-                    q = round(
-                        rng.uniform(1.5, 3.5) if unita == 'kg' else
-                        rng.uniform(15, 30)   if unita == 'pz' else
-                        rng.uniform(2, 5), 2
-                    )
-                    prezzo = round(
-                        prezzo_base
-                        * (1 + (i / n_days) * 0.12)
-                        * (1 + (year - 2024) * 0.09)
-                        * rng.uniform(0.93, 1.07), 2
-                    )
-                    rows.append({
-                        'data': d.strftime('%d/%m/%Y'), 'ingrediente': ing,
-                        'fornitore': fornitore, 'quantita': q,
-                        'unita': unita, 'spesa': round(q * prezzo, 2),
-                    })
-                    fmin, fmax = freq[ing]
-                    next_order[ing] = i + rng.randint(fmin, fmax)
-    buf = io.StringIO()
-    pd.DataFrame(rows).to_csv(buf, sep=';', index=False)
-    return buf.getvalue().encode('utf-8')
+    return generatori.genera_csv_fornitori()
 
 # ══════════════════════════════════════════════════════════════════════════════
 # APP
@@ -291,6 +91,27 @@ def genera_csv_fornitori():
 
 st.set_page_config(page_title="Pokè To Go!", layout="wide", page_icon="🍱")
 
+# Profilo del rerun: pannello in sidebar con POKETOGO_PROFILO=1 o ?debug=1,
+# log JSON con POKETOGO_PROFILO_LOG
+debug = profilo.PANNELLO or st.query_params.get('debug') == '1'
+prof  = profilo.avvia(debug or bool(profilo.FILE_LOG))
+tappa("sidebar")
+
+def frammento(fn):
+    """st.fragment timed as a span of the full run; when it reruns on its
+    own it gets a profile of its own, logged and shown in the fragment."""
+    @st.fragment
+    @functools.wraps(fn)
+    def eseguito(*args, **kwargs):
+        with profilo.frammento(fn.__name__, debug or bool(profilo.FILE_LOG)) as proprio:
+            fn(*args, **kwargs)
+        if proprio is not None:
+            if profilo.FILE_LOG:
+                proprio.scrivi(profilo.FILE_LOG, rerun=st.session_state.get("rerun", 0), frammento=fn.__name__)
+            if debug:
+                st.caption(f"🛠️ Frammento rieseguito in {proprio.totale_ms():.0f} ms")
+    return eseguito
+
 st.markdown("""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
@@ -310,8 +131,10 @@ with st.sidebar:
         st.markdown("### 🍱 Pokè To Go!")
 
     st.markdown("---")
-    up_gio  = st.file_uploader("📥 CSV Giornaliero", type=["csv"])
-    up_forn = st.file_uploader("📦 CSV Fornitori *(opzionale)*", type=["csv"])
+    up_gio  = st.file_uploader("📥 CSV Giornaliero", type=["csv"], accept_multiple_files=True,
+                               help="Un file per negozio, es. procchio_giornaliero.csv, marina_giornaliero.csv")
+    up_forn = st.file_uploader("📦 CSV Fornitori *(opzionale)*", type=["csv"], accept_multiple_files=True,
+                               help="Abbinati al negozio per nome, es. procchio_fornitori.csv")
 
     st.markdown("---")
     costi_fissi_gg = st.number_input(
@@ -323,6 +146,21 @@ with st.sidebar:
         "🎯 Obiettivo fatturato stagione (€)",
         min_value=0, value=80000, step=1000
     )
+    allinea_yoy = st.radio(
+        "📅 Confronto con l'anno precedente", ALLINEAMENTI, key="allinea_yoy",
+        format_func={'calendario': "Stesse date", 'settimana': "Stessi giorni della settimana"}.get,
+        help="Stessi giorni della settimana: ogni giorno è confrontato con quello della stessa settimana dell'anno prima, lunedì con lunedì."
+    )
+
+    with st.expander("⚙️ Grafici"):
+        riduzione = st.toggle(
+            "Riduzione automatica dei punti", value=True,
+            help="Sui periodi lunghi: linee semplificate, barre per settimana o mese, scatter in WebGL"
+        )
+        punti_max = st.number_input("Punti massimi per serie", min_value=200, value=max(PUNTI_MAX, 200), step=100)
+    if not riduzione:
+        punti_max = float('inf')
+    barre_max = max(60, punti_max // 10)   # posizioni sull'asse x nei grafici a barre
 
     st.markdown("---")
     with st.expander("📋 Template e dati di esempio"):
@@ -349,75 +187,217 @@ Ingredienti: compila solo nei giorni di rifornimento.
 
 # ── GUARDIA ───────────────────────────────────────────────────────────────────
 
-if not up_gio:
+# In alternativa all'upload: cartella con i CSV (es. procchio_giornaliero.csv,
+# procchio_fornitori.csv), indicata con la variabile d'ambiente POKETOGO_DATI
+DIR_DATI = os.environ.get('POKETOGO_DATI')
+gio_cartella, forn_cartella, doppioni = percorsi_cartella(DIR_DATI) if DIR_DATI and not up_gio else ({}, {}, [])
+
+if not up_gio and not gio_cartella:
     st.title("🍱 Pokè To Go! – Dashboard Operativa")
     st.info("👈 Carica il CSV giornaliero dalla sidebar per iniziare.")
     st.stop()
 
-# ── CARICAMENTO (bytes in session_state per compatibilità con cache) ──────────
-
-if st.session_state.get("gio_name") != up_gio.name:
-    st.session_state["gio_bytes"] = up_gio.read()
-    st.session_state["gio_name"]  = up_gio.name
-
-df, df_dist, ingred_cols = carica_giornaliero(st.session_state["gio_bytes"])
+# ── CARICAMENTO (dataset condivisi tra sessioni, per impronta del contenuto) ──
+
+def _file_upload(files, chiave):
+    """{negozio: (impronta, leggi)} dei file caricati. L'impronta si calcola una
+    volta per upload (un nuovo upload, anche con lo stesso nome, ha un file_id
+    diverso); i byte non restano in sessione e si rileggono solo se servono.
+    I file che finiscono sullo stesso negozio vanno in `doppioni`."""
+    prec = st.session_state.get(chiave, {})
+    impronte = {f.file_id: prec.get(f.file_id) or impronta(f.getvalue()) for f in files}
+    st.session_state[chiave] = impronte
+    per_nome = {}
+    for f in files:
+        per_nome.setdefault(f.name, f)
+    usati, doppi = raggruppa([f.name for f in files])
+    doppioni.extend(doppi)
+    return {n: (impronte[per_nome[nome].file_id], per_nome[nome].getvalue) for n, nome in usati.items()}
+
+def _file_cartella(percorsi):
+    """{negozio: (impronta, leggi)} dei CSV della cartella. Il file si rilegge
+    e si rihasha solo se dimensione o mtime sono cambiati dall'ultima volta;
+    i byte si leggono di nuovo solo se servono."""
+    impronte = impronte_cartella()
+    file = {}
+    for n, p in percorsi.items():
+        st_file = p.stat()
+        versione = (st_file.st_size, st_file.st_mtime_ns)
+        voce = impronte.get(str(p))
+        if voce is None or voce[0] != versione:
+            voce = impronte[str(p)] = (versione, impronta(p.read_bytes()))
+        file[n] = (voce[1], p.read_bytes)
+    return file
+
+if up_gio:
+    gio_files  = _file_upload(up_gio, "gio_upload")
+    forn_files = _file_upload(up_forn or [], "forn_upload")
+else:
+    gio_files  = _file_cartella(gio_cartella)
+    forn_files = _file_cartella(forn_cartella)
+if doppioni:
+    st.warning(f"⚠️ Più file per lo stesso negozio, uso solo il primo di ciascun gruppo: {descrivi_doppioni(doppioni)}")
+forn_files  = abbina_fornitori(gio_files, forn_files)
+forn_chiavi = {n: k for n, (k, _) in forn_files.items()}
+
+tappa("caricamento")
+cache = cache_dataset()
+
+def _dal_processo(tipo, chiave):
+    """Dataset già elaborato: dalla cache del processo o, se ne è uscito,
+    dall'archivio su disco. MANCANTE se va letto dai byte."""
+    valore = cache.prendi((tipo, chiave))
+    hit = valore is not MANCANTE
+    if not hit:
+        if tipo == 'giornaliero':
+            valore = archivio.carica_giornaliero(chiave)
+            valore = MANCANTE if valore is None else cache.metti((tipo, chiave), sparsifica_stato(valore))
+        else:
+            valore = archivio.carica_fornitori(chiave)
+            valore = MANCANTE if valore is None else cache.metti((tipo, chiave), valore)
+    profilo.conta(f"dataset {tipo}", hit, None if valore is MANCANTE else valore)
+    return valore
+
+def _carica(gio_files, forn_files, chiavi_prec):
+    """Per ogni negozio: già elaborato → riuso; righe aggiunte in coda al file
+    della volta prima → solo quelle; altrimenti caricamento completo (in
+    parallelo se i file sono più di uno). I byte letti qui non sopravvivono
+    alla funzione."""
+    stati, da_caricare = {}, {}
+    for negozio, (chiave, leggi) in gio_files.items():
+        s = _dal_processo('giornaliero', chiave)
+        if s is not MANCANTE:
+            stati[negozio] = s
+            continue
+        b = leggi()
+        prec = _dal_processo('giornaliero', chiavi_prec[negozio]) if negozio in chiavi_prec else MANCANTE
+        s = None
+        if prec is not MANCANTE:
+            with misura("estendi_giornaliero"):
+                s = estendi_giornaliero(prec, b)
+        if s is None:
+            da_caricare[negozio] = b
+        else:
+            archivio.salva_giornaliero(s)
+            stati[negozio] = cache.metti(('giornaliero', chiave), sparsifica_stato(s))
+
+    letture, forn_da_caricare = {}, {}
+    for negozio, (chiave, leggi) in forn_files.items():
+        l = _dal_processo('fornitori', chiave)
+        if l is MANCANTE:
+            forn_da_caricare[negozio] = leggi()
+        else:
+            letture[negozio] = l
 
-if up_forn:
-    if st.session_state.get("forn_name") != up_forn.name:
-        st.session_state["forn_bytes"] = up_forn.read()
-        st.session_state["forn_name"]  = up_forn.name
-    df_forn = carica_fornitori(st.session_state["forn_bytes"])
+    if len(da_caricare) + len(forn_da_caricare) > 1:
+        with misura("carica_negozi"):
+            nuovi_g, nuovi_f = carica_negozi(da_caricare, forn_da_caricare)
+    else:
+        nuovi_g = {n: archivio.giornaliero(b) for n, b in da_caricare.items()}
+        nuovi_f = {n: archivio.fornitori(b) for n, b in forn_da_caricare.items()}
+    for n, s in nuovi_g.items():
+        stati[n] = cache.metti(('giornaliero', gio_files[n][0]), sparsifica_stato(s))
+    for n, l in nuovi_f.items():
+        letture[n] = cache.metti(('fornitori', forn_files[n][0]), l)
+    return {n: stati[n] for n in gio_files}, letture
+
+stati, frames_forn = _carica(gio_files, forn_files, st.session_state.get("gio_chiavi", {}))
+st.session_state["gio_chiavi"] = {n: k for n, (k, _) in gio_files.items()}
+
+def _per_vista(nome, chiave, calcola):
+    """Risultato di calcola() tenuto in sessione finché la chiave non cambia."""
+    voce = st.session_state.get(nome)
+    hit = voce is not None and voce[0] == chiave
+    if not hit:
+        with misura(nome):
+            voce = (chiave, calcola())
+        st.session_state[nome] = voce
+    profilo.conta(nome, hit, voce[1])
+    return voce[1]
+
+if database.attivo():
+    # Storico nel database locale, per impronta: importati solo i file che
+    # mancano (una lettura per file; si scrive solo per un file nuovo).
+    # Verificato a ogni esecuzione, perché altre sessioni possono averne
+    # fatti potare.
+    with misura("database"):
+        for n, s in stati.items():
+            database.importa_giornaliero(n, s)
+        for n, l in frames_forn.items():
+            if l is not None:
+                database.importa_fornitori(n, forn_chiavi[n], l)
+
+# Vista: singolo negozio o tutti i negozi sommati giorno per giorno
+negozi = list(stati)
+negozio_sel = negozi[0]
+if len(negozi) > 1:
+    with st.sidebar:
+        st.markdown("---")
+        negozio_sel = st.selectbox("🏬 Negozio", [TUTTI] + negozi)
+
+letture_forn = {n: l for n, l in frames_forn.items() if l is not None}
+# File della vista {negozio: impronta}, per le interrogazioni al database
+negozi_vista = {n: stati[n].impronta for n in (negozi if negozio_sel == TUTTI else [negozio_sel])}
+if negozio_sel == TUTTI:
+    chiave_gio  = tuple((n, s.impronta) for n, s in stati.items())
+    chiave_forn = tuple(forn_chiavi.items())
+    df, df_dist, ingred_cols = _per_vista("consolidato", chiave_gio, lambda: consolida(stati))
+    df_forn = _per_vista("forn_consolidato", chiave_forn,
+                         lambda: unisci_fornitori({n: l.df for n, l in letture_forn.items()}))
+    # Statistiche per ingrediente sui fornitori di tutti i negozi insieme
+    stats_forn = None if df_forn is None else _per_vista("forn_stats", chiave_forn, lambda: (
+        database.statistiche_ingredienti({n: forn_chiavi[n] for n in letture_forn}) if database.attivo() else statistiche_ingredienti(df_forn)
+    ))
+    letture_vista = letture_forn
 else:
-    df_forn = None
+    chiave_gio  = (negozio_sel, stati[negozio_sel].impronta)
+    chiave_forn = (negozio_sel, forn_chiavi.get(negozio_sel))
+    df, df_dist, ingred_cols = stati[negozio_sel].df, stati[negozio_sel].df_dist, stati[negozio_sel].ingred_cols
+    # Statistiche per ingrediente già aggiornate durante la lettura a blocchi
+    lettura_forn = letture_forn.get(negozio_sel)
+    df_forn    = None if lettura_forn is None else lettura_forn.df
+    stats_forn = None if lettura_forn is None else lettura_forn.stats
+    letture_vista = {negozio_sel: lettura_forn} if lettura_forn is not None else {}
+# Aggregati anno × mese × giorno della settimana per i KPI di briefing e stagione
+cubo = _per_vista("cubo", chiave_gio, lambda: costruisci_cubo(df))
+
+with st.sidebar:
+    with st.expander("🧠 Memoria dei dati"):
+        st.dataframe(_per_vista("memoria", (chiave_gio, chiave_forn), lambda: rapporto_memoria({
+            'Giornaliero':       df,
+            'Costi distribuiti': df_dist,
+            'Fornitori':         df_forn,
+        })), hide_index=True)
+        c = cache.stato()
+        st.caption(
+            f"Cache condivisa dalle sessioni: {c['voci']} dataset, {c['mb']:.1f} / {c['budget_mb']:.0f} MB"
+            + (f" · {c['rimossi']} rimossi per fare spazio" if c['rimossi'] else "")
+        )
 
 anni          = sorted(df['anno'].unique())
 anno_corrente = int(anni[-1])
 anno_prec     = int(anni[-2]) if len(anni) > 1 else None
 
 # ── CONTROLLO QUALITÀ ─────────────────────────────────────────────────────────
+tappa("controllo qualità")
+
+# Tutte le regole in un passaggio, una volta per dataset: bit per riga + conteggi
+verifica_qc = _per_vista("qualita", chiave_gio, lambda: verifica_giornaliero(df, ingred_cols))
+avvisi_qc   = verifica_qc.avvisi
 
 with st.expander("🔍 Controllo qualità file", expanded=False):
-    avvisi = 0
-    def _date_str(cond):
-        return ', '.join(df.loc[cond, 'data'].dt.strftime('%d/%m/%Y').tolist()[:5])
-
-    # Date duplicate
-    dup = df[df.duplicated('data', keep=False)]
-    if not dup.empty:
-        n_dup = dup['data'].nunique()
-        st.warning(f"⚠️ {n_dup} date inserite più di una volta: {', '.join(dup['data'].dt.strftime('%d/%m/%Y').unique()[:5])}")
-        avvisi += 1
-
-    # Fatturato > 0 ma zero poke registrati
-    cond_fat_no_poke = (df['fatturato'] > 0) & (df['poke_totali'] == 0)
-    if cond_fat_no_poke.any():
-        st.warning(f"⚠️ {cond_fat_no_poke.sum()} giorni con incasso registrato ma nessun poke nel conteggio: {_date_str(cond_fat_no_poke)}")
-        avvisi += 1
-
-    # Poke > 0 ma fatturato assente o zero
-    cond_poke_no_fat = (df['poke_totali'] > 0) & (df['fatturato'].fillna(0) == 0)
-    if cond_poke_no_fat.any():
-        st.warning(f"⚠️ {cond_poke_no_fat.sum()} giorni con poke registrati ma incasso assente: {_date_str(cond_poke_no_fat)}")
-        avvisi += 1
-
-    # Fatturato non compilato su giorni con costi ingredienti presenti
-    cond_fat_nan = df['fatturato'].isna() & (df['ing_dist'] > 0)
-    if cond_fat_nan.any():
-        st.warning(f"⚠️ {cond_fat_nan.sum()} giorni con rifornimenti registrati ma incasso non compilato: {_date_str(cond_fat_nan)}")
-        avvisi += 1
-
-    # Colonne dipendente extra rilevate
-    dip_extra = [c for c in df.columns if c.lower().startswith('dipendente') and c != 'Dipendente']
-    if dip_extra:
-        st.info(f"ℹ️ Rilevate {len(dip_extra)+1} colonne dipendente ({', '.join(['Dipendente']+dip_extra)}) — sommate automaticamente nel costo lavoro.")
-
-    # Ingredienti non classificati in nessuna categoria
-    ing_noti_qc = set(sum(CATEGORIE_ING.values(), []))
-    ing_nuovi = [c for c in ingred_cols if c not in ing_noti_qc]
-    if ing_nuovi:
-        st.info(f"ℹ️ {len(ing_nuovi)} ingredienti non ancora categorizzati (appaiono in Rifornimenti → Tutti): {', '.join(ing_nuovi[:8])}")
-
-    if avvisi == 0:
+    for avviso in avvisi_qc:
+        (st.warning if avviso.livello == 'warning' else st.info)(avviso.messaggio)
+    if verifica_qc.flag.any():
+        st.dataframe(righe_segnalate(verifica_qc, df), hide_index=True, width="stretch")
+    n_errori_forn = sum(l.n_errori for l in letture_vista.values())
+    if n_errori_forn:
+        st.warning(f"📦 CSV fornitori: {n_errori_forn} valori non leggibili — righe senza data valida escluse, numeri non validi lasciati vuoti.")
+        st.dataframe(
+            pd.concat([l.errori.assign(negozio=n) for n, l in letture_vista.items() if l.n_errori], ignore_index=True),
+            hide_index=True, width="stretch",
+        )
+    if not n_errori_forn and not any(a.livello == 'warning' for a in avvisi_qc):
         st.success("✅ Nessuna anomalia rilevata.")
     else:
         st.caption("Controlla queste righe nel CSV — potrebbero essere errori di inserimento.")
@@ -426,13 +406,16 @@ with st.expander("🔍 Controllo qualità file", expanded=False):
 # SEZIONE 1 — BRIEFING OPERATIVO
 # ══════════════════════════════════════════════════════════════════════════════
 
+tappa("briefing")
 st.header(f"☀️ Briefing operativo — stagione {anno_corrente}")
 
 # Meteo 7 giorni
-meteo = fetch_meteo()
+with misura("meteo"):
+    previsione = servizio_meteo().leggi(attesa=1.0)
+meteo = previsione.daily if previsione else None
 if meteo:
     giorni_it = ['Lun', 'Mar', 'Mer', 'Gio', 'Ven', 'Sab', 'Dom']
-    for col, i in zip(st.columns(7), range(7)):
+    for col, i in zip(st.columns(7), range(min(7, len(meteo['time'])))):
         d       = pd.to_datetime(meteo['time'][i])
         icon    = WMO_EMOJI.get(int(meteo['weathercode'][i]), '❓')
         tmax    = meteo['temperature_2m_max'][i]
@@ -444,36 +427,30 @@ if meteo:
             f"{icon}<br><b>{tmax:.0f}°C</b><br>💧{pioggia:.0f}mm</div>",
             unsafe_allow_html=True
         )
-    st.caption("📍 Procchio, Isola d'Elba — aggiornato ogni ora")
+    ora = pd.Timestamp(previsione.scaricata, unit='s', tz='UTC').tz_convert('Europe/Rome')
+    st.caption(
+        f"📍 Procchio, Isola d'Elba — aggiornato alle {ora:%H:%M} del {ora.day}/{ora.month}"
+        + (" · previsione non aggiornata" if previsione.scaduta else "")
+    )
 else:
     st.caption("⚠️ Previsioni meteo non disponibili al momento")
 
 st.markdown("")
 
 # KPI ultimi 7 giorni aperti (esclusi giorni chiusi / fatturato=0)
-df_open = df[(df['anno'] == anno_corrente) & (df['fatturato'] > 0)]
-df_7    = df_open.tail(7)
-n_7     = len(df_7)
+k7      = ultimi_giorni(cubo, anno_corrente, anno_prec, allinea=allinea_yoy)
+n_7     = k7['giorni']
+fat7, poke7, util7, ping7 = k7['fatturato'], k7['poke'], k7['utile'], k7['pct_ingredienti']
 
-fat7  = df_7['fatturato'].sum()
-poke7 = df_7['poke_totali'].sum()
-util7 = df_7['utile_lordo'].sum()
-ping7 = df_7['pct_ingredienti'].mean() if n_7 else 0.0
+def _delta(a, b):
+    v = variazione(a, b)
+    return None if v is None else f"{v:+.1f}% vs {anno_prec}"
 
 delta_fat = delta_poke = delta_util = None
-if anno_prec and n_7:
-    d_min = df_7['data'].min().replace(year=anno_prec)
-    d_max = df_7['data'].max().replace(year=anno_prec)
-    df_7p = df[
-        (df['anno'] == anno_prec) & (df['fatturato'] > 0) &
-        (df['data'] >= d_min) & (df['data'] <= d_max)
-    ]
-    if not df_7p.empty:
-        def _delta(a, b):
-            return f"{(a - b) / b * 100:+.1f}% vs {anno_prec}" if b else None
-        delta_fat  = _delta(fat7,  df_7p['fatturato'].sum())
-        delta_poke = _delta(poke7, df_7p['poke_totali'].sum())
-        delta_util = _delta(util7, df_7p['utile_lordo'].sum())
+if k7['prec']:
+    delta_fat  = _delta(fat7,  k7['prec']['fatturato'])
+    delta_poke = _delta(poke7, k7['prec']['poke'])
+    delta_util = _delta(util7, k7['prec']['utile'])
 
 label_7 = f"ultimi {n_7} giorni aperti" if n_7 < 7 else "ultimi 7 giorni aperti"
 kc1, kc2, kc3, kc4 = st.columns(4)
@@ -488,21 +465,13 @@ if n_7 < 5:
 
 # KPI stagione in corso
 st.markdown("**📊 Stagione in corso**")
-fat_stagione = df_open['fatturato'].sum()
-ul_stagione  = df_open['utile_lordo'].sum()
-poke_stag    = df_open['poke_totali'].sum()
-giorni_stag  = len(df_open)
+ks = stagione(cubo, anno_corrente, anno_prec, allinea=allinea_yoy)
+fat_stagione, ul_stagione, poke_stag, giorni_stag = ks['fatturato'], ks['utile'], ks['poke'], ks['giorni']
 
 delta_fat_stag = delta_ul_stag = None
-if anno_prec and not df_open.empty:
-    ult_mm_dd    = df_open['mm_dd'].max()
-    df_prev_open = df[(df['anno'] == anno_prec) & (df['fatturato'] > 0)]
-    df_prev_per  = df_prev_open[df_prev_open['mm_dd'] <= ult_mm_dd]
-    if not df_prev_per.empty:
-        def _delta_s(a, b):
-            return f"{(a - b) / b * 100:+.1f}% vs {anno_prec}" if b else None
-        delta_fat_stag = _delta_s(fat_stagione, df_prev_per['fatturato'].sum())
-        delta_ul_stag  = _delta_s(ul_stagione,  df_prev_per['utile_lordo'].sum())
+if ks['prec']:
+    delta_fat_stag = _delta(fat_stagione, ks['prec']['fatturato'])
+    delta_ul_stag  = _delta(ul_stagione,  ks['prec']['utile'])
 
 sc1, sc2, sc3, sc4 = st.columns(4)
 sc1.metric(f"Fatturato {anno_corrente}",  f"€ {fat_stagione:,.0f}", delta_fat_stag)
@@ -517,9 +486,8 @@ if obiettivo > 0:
         st.success(f"🏆 Obiettivo raggiunto! Hai superato di € {fat_stagione - obiettivo:,.0f}")
     else:
         mancano = obiettivo - fat_stagione
-        ultima_data = df_open['data'].max() if not df_open.empty else df[df['anno'] == anno_corrente]['data'].max()
         fine_stagione = pd.Timestamp(date(anno_corrente, 9, 30))
-        giorni_rimasti = (fine_stagione - ultima_data).days
+        giorni_rimasti = (fine_stagione - ks['ultima_data']).days
         if giorni_rimasti > 0:
             st.info(
                 f"Mancano **€ {mancano:,.0f}** — "
@@ -535,6 +503,7 @@ st.divider()
 # SEZIONE 2 — LA STAGIONE
 # ══════════════════════════════════════════════════════════════════════════════
 
+tappa("stagione")
 st.header("📈 La stagione")
 
 col_y, col_cb = st.columns([1, 2])
@@ -544,28 +513,38 @@ with col_cb:
     label_yoy = f"Confronta con {anno_prec}" if anno_prec else "Nessun anno precedente"
     mostra_yoy = st.checkbox(label_yoy, value=(anno_prec is not None), disabled=(anno_prec is None))
 
-df_anno = df[df['anno'] == anno_sel].copy()
+# Fette per posizione (df è ordinato per data): viste senza copia
+idx_date = IndiceDate(df['data'])
+df_anno  = df.iloc[idx_date.anno(anno_sel)]
 
 # Curva fatturato con eventuale overlay anno precedente
-# Usiamo "2000-" + mm_dd come anno fittizio per dare a Plotly date ISO valide;
-# i tick vengono formattati gg/mm così l'asse mostra solo giorno e mese.
-def _x_stag(frame):
-    return pd.to_datetime('2000-' + frame['mm_dd'], errors='coerce')
-
+# Asse sull'anno bisestile 2000: ogni giorno cade sul giorno corrispondente di
+# anno_sel (stessa data o stesso giorno della settimana), calcolato una volta
+# per caricamento; i tick vengono formattati gg/mm così l'asse mostra solo giorno e mese.
+allineamento = _per_vista("allineamento", chiave_gio, lambda: AllineamentoAnni(df['data']))
+
+def _curva_stag(righe):
+    curva = pd.DataFrame({
+        'x': allineamento.x(righe, anno_sel, allinea_yoy),
+        'y': df['fatturato'].iloc[righe].rolling(3, center=True, min_periods=1).mean().to_numpy(),
+    })
+    return riduci(curva, 'x', 'y', punti_max)
+
+curva = _curva_stag(idx_date.anno(anno_sel))
 fig_stag = go.Figure()
 fig_stag.add_trace(go.Scatter(
-    x=_x_stag(df_anno),
-    y=df_anno['fatturato'].rolling(3, center=True, min_periods=1).mean(),
+    x=curva['x'],
+    y=curva['y'],
     mode='lines', name=str(anno_sel),
     line=dict(color='#e85d04', width=2.5),
     fill='tozeroy', fillcolor='rgba(232,93,4,0.08)',
     hovertemplate='%{x|%d/%m} — € %{y:,.0f}<extra></extra>',
 ))
 if mostra_yoy and anno_prec:
-    df_prev_stag = df[df['anno'] == anno_prec].copy()
+    curva_prev = _curva_stag(idx_date.anno(anno_prec))
     fig_stag.add_trace(go.Scatter(
-        x=_x_stag(df_prev_stag),
-        y=df_prev_stag['fatturato'].rolling(3, center=True, min_periods=1).mean(),
+        x=curva_prev['x'],
+        y=curva_prev['y'],
         mode='lines', name=str(anno_prec),
         line=dict(color='#aaa', width=1.5, dash='dot'),
         hovertemplate='%{x|%d/%m} — € %{y:,.0f}<extra></extra>',
@@ -578,15 +557,21 @@ fig_stag.update_layout(
     margin=dict(t=50, b=10),
 )
 st.plotly_chart(fig_stag, width="stretch")
-st.caption("Media mobile a 3 giorni per smussare i picchi del weekend. I giorni chiusi appaiono come zero. La linea tratteggiata è l'anno precedente sullo stesso calendario.")
+st.caption(
+    "Media mobile a 3 giorni per smussare i picchi del weekend. I giorni chiusi appaiono come zero. La linea tratteggiata è l'anno precedente "
+    + ("sullo stesso calendario." if allinea_yoy == 'calendario' else "allineato per giorno della settimana.")
+)
 
 # Metriche aggregate stagione (solo giorni aperti per i costi fissi)
-n_open_anno = len(df_anno[df_anno['fatturato'] > 0])
-fat_tot  = df_anno['fatturato'].sum()
-ul_tot   = df_anno['utile_lordo'].sum()
-un_tot   = ul_tot - costi_fissi_gg * n_open_anno
-poke_tot = df_anno['poke_totali'].sum()
-ric_poke = fat_tot / poke_tot if poke_tot > 0 else 0
+if database.attivo():
+    stagioni = _per_vista("stagioni", (chiave_gio, costi_fissi_gg),
+                          lambda: database.confronto_stagioni(negozi_vista, costi_fissi_gg))
+else:
+    stagioni = confronto_stagioni(cubo, costi_fissi_gg)
+riep        = stagioni.loc[anno_sel]
+n_open_anno = int(riep['giorni_aperti'])
+fat_tot, ul_tot, un_tot, poke_tot = riep['fatturato'], riep['utile_lordo'], riep['utile_netto'], riep['poke']
+ric_poke    = fat_tot / poke_tot if poke_tot > 0 else 0
 
 s1, s2, s3, s4 = st.columns(4)
 s1.metric("Fatturato stagione",    f"€ {fat_tot:,.0f}")
@@ -601,22 +586,15 @@ st.caption(f"Utile netto calcolato su {n_open_anno} giorni aperti × € {costi_
 # Tabella confronto multi-anno
 if len(anni) > 1:
     st.markdown("**Confronto stagioni**")
-    righe = []
-    for a in anni:
-        dfa     = df[df['anno'] == a]
-        n_open  = len(dfa[dfa['fatturato'] > 0])
-        fat_a   = dfa['fatturato'].sum()
-        ul_a    = dfa['utile_lordo'].sum()
-        righe.append({
-            'Anno':           int(a),
-            'Fatturato':      f"€ {fat_a:,.0f}",
-            'Utile lordo':    f"€ {ul_a:,.0f}",
-            'Utile netto':    f"€ {ul_a - costi_fissi_gg * n_open:,.0f}",
-            'Poke venduti':   f"{int(dfa['poke_totali'].sum()):,}",
-            'Ing. su fatt.':  f"{dfa[dfa['fatturato']>0]['pct_ingredienti'].mean():.1f}%",
-            'Giorni aperti':  n_open,
-        })
-    st.dataframe(pd.DataFrame(righe), hide_index=True, width="stretch")
+    st.dataframe(pd.DataFrame({
+        'Anno':          stagioni.index.astype(int),
+        'Fatturato':     [f"€ {v:,.0f}" for v in stagioni['fatturato']],
+        'Utile lordo':   [f"€ {v:,.0f}" for v in stagioni['utile_lordo']],
+        'Utile netto':   [f"€ {v:,.0f}" for v in stagioni['utile_netto']],
+        'Poke venduti':  [f"{int(v):,}" for v in stagioni['poke']],
+        'Ing. su fatt.': [f"{v:.1f}%" for v in stagioni['pct_ingredienti']],
+        'Giorni aperti': stagioni['giorni_aperti'].to_numpy(),
+    }), hide_index=True, width="stretch")
     st.caption("% ingredienti calcolata solo sui giorni aperti. Utile netto = utile lordo − costi fissi × giorni aperti.")
 
 st.divider()
@@ -625,6 +603,7 @@ st.divider()
 # SEZIONE 3 — DETTAGLIO OPERATIVO
 # ══════════════════════════════════════════════════════════════════════════════
 
+tappa("dettaglio: filtri")
 st.header("🔍 Dettaglio operativo")
 
 min_d = df_anno['data'].min().date()
@@ -641,72 +620,76 @@ if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
 else:
     start_sel, end_sel = pd.Timestamp(min_d), pd.Timestamp(max_d)
 
-df_sel = df_anno[(df_anno['data'] >= start_sel) & (df_anno['data'] <= end_sel)].copy()
+if database.attivo():
+    # Solo le righe del periodo, lette dall'indice (negozio, data)
+    df_sel, df_dist_sel = _per_vista("periodo", (chiave_gio, start_sel, end_sel),
+                                     lambda: database.periodo(negozi_vista, start_sel, end_sel))
+else:
+    periodo_sel = idx_date.tra(start_sel, end_sel)
+    df_sel      = df.iloc[periodo_sel]
+    df_dist_sel = df_dist.iloc[periodo_sel]   # allineato riga per riga a df
 
 if df_sel.empty:
     st.warning("⚠️ Nessun dato nel periodo selezionato.")
     st.stop()
 
-df_dist_sel = df[['data']].join(df_dist)
-df_dist_sel = df_dist_sel[
-    (df_dist_sel['data'] >= start_sel) & (df_dist_sel['data'] <= end_sel)
-]
+# Periodi lunghi: barre per settimana o per mese invece che per giorno
+freq_sel = frequenza_barre(df_sel['data'], barre_max)
+per_freq = f" — totali {ETICHETTE_FREQ[freq_sel]}" if freq_sel else ""
 
 tab_v, tab_c, tab_f, tab_r, tab_cr = st.tabs([
     "📈 Vendite", "💸 Costi", "🏪 Fornitori", "📦 Rifornimenti", "⚠️ Giornate critiche"
 ])
 
 # ── TAB VENDITE ───────────────────────────────────────────────────────────────
+tappa("tab vendite")
 with tab_v:
     poke_avail = [c for c in POKE_COLS if c in df_sel.columns]
-    melt_poke  = df_sel[['data'] + poke_avail].melt('data', var_name='Tipo', value_name='Pezzi')
+    poke_per   = per_periodo(df_sel, poke_avail, freq_sel) if freq_sel else df_sel[['data'] + poke_avail]
+    melt_poke  = poke_per.melt('data', var_name='Tipo', value_name='Pezzi')
     st.plotly_chart(
         px.bar(melt_poke, x='data', y='Pezzi', color='Tipo', barmode='stack',
-               labels={'data': ''}, title="Poke venduti per tipo"),
+               labels={'data': ''}, title=f"Poke venduti per tipo{per_freq}"),
         width="stretch"
     )
-    st.caption("Composizione giornaliera delle vendite per formato. Passa il mouse su una barra per vedere i dettagli.")
+    composizione = {'W-MON': "settimanale", 'MS': "mensile"}.get(freq_sel, "giornaliera")
+    st.caption(f"Composizione {composizione} delle vendite per formato. Passa il mouse su una barra per vedere i dettagli.")
 
+    duo = per_periodo(df_sel, ['fatturato', 'utile_lordo'], freq_sel) if freq_sel else df_sel
     fig_duo = go.Figure()
     fig_duo.add_trace(go.Bar(
-        x=df_sel['data'], y=df_sel['fatturato'],
+        x=duo['data'], y=duo['fatturato'],
         name='Fatturato', marker_color='rgba(232,93,4,0.45)'
     ))
     fig_duo.add_trace(go.Scatter(
-        x=df_sel['data'], y=df_sel['utile_lordo'],
+        x=duo['data'], y=duo['utile_lordo'],
         name='Utile lordo', mode='lines+markers',
         line=dict(color='#2d6a4f', width=2)
     ))
     fig_duo.add_hline(y=0, line_dash='dash', line_color='red', annotation_text='Pareggio')
     fig_duo.update_layout(
-        title="Fatturato e utile lordo giornaliero",
+        title="Fatturato e utile lordo " + (ETICHETTE_FREQ[freq_sel] if freq_sel else "giornaliero"),
         xaxis_title=None, yaxis_title="€",
         hovermode='x unified', legend=dict(orientation='h')
     )
     st.plotly_chart(fig_duo, width="stretch")
     st.caption("Utile lordo = fatturato − ingredienti − bibite/sorbetti − dipendente. I giorni sotto la linea rossa non coprono i costi variabili.")
 
-    df_sel['margine_per_poke'] = df_sel.apply(
-        lambda r: r['utile_lordo'] / r['poke_totali'] if r['poke_totali'] > 0 else None, axis=1
-    )
     top5 = df_sel.nlargest(5, 'margine_per_poke')[
         ['data', 'fatturato', 'poke_totali', 'margine_per_poke', 'utile_lordo']
     ].copy()
     top5.columns = ['Data', 'Fatturato (€)', 'Poke', 'Margine/poke (€)', 'Utile lordo (€)']
     st.subheader("💰 Top 5 giorni per margine per poke")
-    st.dataframe(top5.round(2), hide_index=True, width="stretch")
+    st.dataframe(arrotonda(top5), hide_index=True, width="stretch")
     st.caption("I giorni con il margine più alto per singolo poke — quelli da replicare.")
 
 # ── TAB COSTI ─────────────────────────────────────────────────────────────────
+tappa("tab costi")
 with tab_c:
-    n_open_sel = len(df_sel[df_sel['fatturato'] > 0])
-    fat = df_sel['fatturato'].sum()
-    ing = df_sel['ing_dist'].sum()
-    dip = df_sel['Dipendente'].sum()
-    bib = df_sel['bib_sorb_costo'].sum()
-    cf  = costi_fissi_gg * n_open_sel
-    ul  = fat - ing - dip - bib
-    un  = ul - cf
+    kc = costi_periodo(df_sel, costi_fissi_gg)
+    n_open_sel = kc['giorni_aperti']
+    fat, ing, dip, bib = kc['fatturato'], kc['ingredienti'], kc['dipendente'], kc['bibite_sorbetti']
+    cf, ul, un = kc['costi_fissi'], kc['utile_lordo'], kc['utile_netto']
 
     cc1, cc2 = st.columns([1, 2])
     with cc1:
@@ -737,7 +720,10 @@ with tab_c:
         st.plotly_chart(fig_pie, width="stretch")
         st.caption("Distribuzione del fatturato nel periodo. L'utile netto è la fetta che rimane dopo tutti i costi.")
 
-    melt_pct = df_sel[['data', 'pct_ingredienti', 'pct_dipendenti']].melt(
+    # min-max: i picchi restano visibili anche con pochi punti
+    melt_pct = riduci(df_sel, 'data', ['pct_ingredienti', 'pct_dipendenti'], punti_max, 'minmax')[
+        ['data', 'pct_ingredienti', 'pct_dipendenti']
+    ].melt(
         'data', var_name='Voce', value_name='%'
     )
     fig_pct = px.line(melt_pct, x='data', y='%', color='Voce', markers=True,
@@ -761,50 +747,31 @@ with tab_c:
         st.caption("Costo medio giornaliero per ingrediente, calcolato distribuendo ogni rifornimento sui giorni fino al successivo acquisto. Indica dove si concentra la spesa ingredienti.")
 
 # ── TAB FORNITORI ─────────────────────────────────────────────────────────────
+tappa("tab fornitori")
 with tab_f:
     if df_forn is None:
         st.info("👈 Carica il CSV Fornitori dalla sidebar per sbloccare questa sezione.")
     elif df_forn.empty:
         st.info("Il CSV fornitori è vuoto.")
     else:
-        MIN_ORDINI_ANOMALIA = 5
-        MIN_ORDINI_TREND    = 6
         MIN_FORNITORI_CONF  = 2
+        RIFERIMENTI_ZSCORE  = {
+            'Tutta la storia':    'espanso',
+            'Ultimi 10 ordini':   'mobile',
+            'Media esponenziale': 'esponenziale',
+        }
 
-        df_f_all = df_forn.copy()
-        df_f_per = df_forn[
-            (df_forn['data'] >= start_sel) & (df_forn['data'] <= end_sel)
-        ].copy()
+        df_f_all = df_forn
+        df_f_per = df_forn.iloc[IndiceDate(df_forn['data']).tra(start_sel, end_sel)]
 
         st.caption("I dati statistici (media, anomalie) usano tutta la storia registrata, non solo il periodo filtrato in alto.")
 
         # ── 1. PREZZI DA MONITORARE ──────────────────────────────────────────
         st.subheader("🚨 Prezzi da monitorare")
-        anomalie = []
-        for ing, grp in df_f_all.groupby('ingrediente'):
-            grp = grp.dropna(subset=['prezzo_unitario']).sort_values('data')
-            if len(grp) < MIN_ORDINI_ANOMALIA:
-                continue
-            media = grp['prezzo_unitario'].mean()
-            std   = grp['prezzo_unitario'].std()
-            ultimo = grp.iloc[-1]
-            if std > 0 and ultimo['prezzo_unitario'] > media + std:
-                pct = (ultimo['prezzo_unitario'] - media) / media * 100
-                anomalie.append({
-                    'Ingrediente':   ing,
-                    'Fornitore':     ultimo['fornitore'],
-                    'Ultimo ordine': ultimo['data'].strftime('%d/%m/%Y'),
-                    'Ultimo prezzo': f"€ {ultimo['prezzo_unitario']:.2f}",
-                    'Media storica': f"€ {media:.2f}",
-                    'Δ':             f"+{pct:.0f}%",
-                })
-        if anomalie:
-            st.dataframe(pd.DataFrame(anomalie), hide_index=True, width="stretch")
+        anom, n_monitorati = prezzi_da_monitorare(stats_forn, MIN_ORDINI_ANOMALIA)
+        if not anom.empty:
+            st.dataframe(anom, hide_index=True, width="stretch")
         else:
-            n_monitorati = sum(
-                1 for _, grp in df_f_all.groupby('ingrediente')
-                if len(grp.dropna(subset=['prezzo_unitario'])) >= MIN_ORDINI_ANOMALIA
-            )
             if n_monitorati == 0:
                 st.caption(
                     f"ℹ️ Servono almeno {MIN_ORDINI_ANOMALIA} ordini per ingrediente per attivare "
@@ -813,51 +780,59 @@ with tab_f:
             else:
                 st.success(f"✅ Nessuna anomalia — prezzi nella norma su {n_monitorati} ingredienti monitorati.")
 
+        # Frammenti: cambiare il riferimento o l'ingrediente riesegue solo quel riquadro
+        @frammento
+        def _storico_anomalie(df_f_all, chiave_forn):
+            with st.expander("📉 Storico anomalie di prezzo"):
+                rif = st.radio(
+                    "Confronta ogni ordine con", list(RIFERIMENTI_ZSCORE), horizontal=True, key='forn_z_rif',
+                    help="Media e deviazione degli ordini precedenti dello stesso ingrediente"
+                )
+                df_z = _per_vista("forn_zscore", (chiave_forn, rif), lambda: zscore_prezzi(
+                    df_f_all, RIFERIMENTI_ZSCORE[rif], min_ordini=MIN_ORDINI_ANOMALIA
+                ))
+                anom_z = df_z[df_z['anomalia']]
+                if anom_z.empty:
+                    st.caption("Nessun ordine sopra la norma in tutta la storia registrata.")
+                else:
+                    fig_z = px.scatter(
+                        anom_z, x='data', y='zscore', color='ingrediente', render_mode=modo_scatter(len(anom_z)),
+                        hover_data=['fornitore', 'prezzo_unitario', 'media_rif'],
+                        labels={'zscore': 'Deviazioni sopra la media', 'data': ''},
+                        title="Ordini pagati sopra la norma",
+                    )
+                    st.plotly_chart(fig_z, width="stretch")
+                    st.caption(
+                        f"{len(anom_z)} ordini su {len(df_z)} superano di oltre una deviazione standard "
+                        f"il prezzo di riferimento. Servono almeno {MIN_ORDINI_ANOMALIA} ordini per ingrediente."
+                    )
+
+        _storico_anomalie(df_f_all, chiave_forn)
+
         # ── 2. LISTINO DI RIFERIMENTO ────────────────────────────────────────
         st.subheader("📋 Listino di riferimento")
         st.caption("Riferimento rapido prima di fare un ordine. Media e minimo si sbloccano dopo 2-3 acquisti per ingrediente.")
-        listino = []
-        for ing, grp in df_f_all.groupby('ingrediente'):
-            grp = grp.dropna(subset=['prezzo_unitario']).sort_values('data')
-            if grp.empty:
-                continue
-            n      = len(grp)
-            ultimo = grp.iloc[-1]
-            row = {
-                'Ingrediente':   ing,
-                'Ultimo ordine': ultimo['data'].strftime('%d/%m/%Y'),
-                'Fornitore':     ultimo['fornitore'],
-                'Unità':         ultimo.get('unita', ''),
-                'Ultimo €/u':    round(ultimo['prezzo_unitario'], 2),
-            }
-            if n >= 2:
-                row['Media €/u'] = round(grp['prezzo_unitario'].mean(), 2)
-            if n >= 3:
-                row['Minimo €/u'] = round(grp['prezzo_unitario'].min(), 2)
-            if n < MIN_ORDINI_ANOMALIA:
-                row['Stato'] = f"🔵 {n}/{MIN_ORDINI_ANOMALIA} ordini"
-            else:
-                media = grp['prezzo_unitario'].mean()
-                std   = grp['prezzo_unitario'].std()
-                row['Stato'] = (
-                    "🔴 sopra media" if (std > 0 and ultimo['prezzo_unitario'] > media + std)
-                    else "🟢 nella norma"
-                )
-            listino.append(row)
-
-        if listino:
-            st.dataframe(
-                pd.DataFrame(listino).sort_values('Ingrediente'),
-                hide_index=True, width="stretch"
-            )
+        con_prezzo = stats_forn[stats_forn['n_ordini'] > 0]
+        if not con_prezzo.empty:
+            n = con_prezzo['n_ordini']
+            listino = pd.DataFrame({
+                'Ingrediente':   con_prezzo.index,
+                'Ultimo ordine': con_prezzo['ultima_data'].dt.strftime('%d/%m/%Y'),
+                'Fornitore':     con_prezzo['ultimo_fornitore'],
+                'Unità':         con_prezzo['unita'],
+                'Ultimo €/u':    con_prezzo['ultimo_prezzo'].round(2),
+                'Media €/u':     con_prezzo['media'].round(2).where(n >= 2),
+                'Minimo €/u':    con_prezzo['minimo'].round(2).where(n >= 3),
+                'Stato':         (n.astype(str) + f"/{MIN_ORDINI_ANOMALIA} ordini").radd("🔵 ").where(
+                                     n < MIN_ORDINI_ANOMALIA,
+                                     sopra_media(con_prezzo).map({True: "🔴 sopra media", False: "🟢 nella norma"})),
+            }).dropna(axis=1, how='all').reset_index(drop=True)
+            st.dataframe(listino, hide_index=True, width="stretch")
             st.caption("🔵 dati insufficienti per analisi statistica  ·  🟢 prezzo normale  ·  🔴 sopra la media storica")
 
         # ── 3. CONFRONTO FORNITORI ───────────────────────────────────────────
-        ing_multi = [
-            ing for ing, grp in df_f_all.groupby('ingrediente')
-            if grp['fornitore'].nunique() >= MIN_FORNITORI_CONF
-        ]
-        if ing_multi:
+        ing_multi = stats_forn.index[stats_forn['n_fornitori'] >= MIN_FORNITORI_CONF]
+        if len(ing_multi):
             st.subheader("🏪 Confronto fornitori")
             pivot = (
                 df_f_all[df_f_all['ingrediente'].isin(ing_multi)]
@@ -868,36 +843,70 @@ with tab_f:
             st.dataframe(pivot, width="stretch")
             st.caption("Prezzo medio (€/unità) per ingrediente × fornitore")
 
-        # ── 4. ANALISI DETTAGLIATA ───────────────────────────────────────────
-        with st.expander("📊 Analisi dettagliata nel periodo selezionato"):
-            ing_dispo = sorted(df_f_all['ingrediente'].dropna().unique())
-            scelta = st.selectbox("Ingrediente", ['— tutti —'] + ing_dispo, key='forn_det')
-            df_f = df_f_per if scelta == '— tutti —' else df_f_all[df_f_all['ingrediente'] == scelta].copy()
-            if df_f.empty:
-                st.info("Nessun dato per questa selezione.")
+        # ── 4. PREZZI IN CRESCITA ────────────────────────────────────────────
+        METODI_TREND_UI = {
+            'Minimi quadrati':       'ols',
+            'Pesata sulle quantità': 'pesata',
+            'Robusta':               'robusta',
+        }
+
+        @frammento
+        def _prezzi_in_crescita(df_f_all, chiave_forn):
+            st.subheader("📈 Prezzi in crescita")
+            metodo = st.radio(
+                "Retta di tendenza", list(METODI_TREND_UI), horizontal=True, key='forn_trend_metodo',
+                help="Pesata: gli ordini più grandi contano di più. Robusta: un ordine anomalo non sposta la retta."
+            )
+            # Una regressione per ogni ingrediente × fornitore, calcolate tutte insieme
+            trend = _per_vista("forn_trend", (chiave_forn, metodo), lambda: trend_prezzi(
+                df_f_all, metodo=METODI_TREND_UI[metodo]
+            ))
+            if trend.empty:
+                st.caption(f"ℹ️ Servono almeno {MIN_ORDINI_TREND} ordini dallo stesso fornitore per stimare un trend.")
             else:
-                fig_sc = px.scatter(
-                    df_f, x='data', y='prezzo_unitario', color='ingrediente',
-                    size='spesa', hover_data=['fornitore', 'quantita', 'unita', 'spesa'],
-                    labels={'prezzo_unitario': '€/unità', 'data': ''},
-                )
-                if scelta != '— tutti —' and len(df_f) >= MIN_ORDINI_TREND:
-                    x_num = [(d - df_f['data'].min()).days for d in df_f['data']]
-                    y_num = df_f['prezzo_unitario'].tolist()
-                    if not any(v != v for v in y_num):
-                        slope, intercept = ols_manuale(x_num, y_num)
-                        fig_sc.add_trace(go.Scatter(
+                st.dataframe(prezzi_in_crescita(trend), hide_index=True, width="stretch",
+                             column_config={'Dal': st.column_config.DateColumn(format="DD/MM/YYYY")})
+                st.caption("Variazione del prezzo unitario stimata su tutta la storia di ogni ingrediente presso ogni fornitore. Clicca le colonne per riordinare.")
+
+        _prezzi_in_crescita(df_f_all, chiave_forn)
+
+        # ── 5. ANALISI DETTAGLIATA ───────────────────────────────────────────
+        # Righe e retta di tendenza di ogni ingrediente, calcolate una volta per dataset
+        righe_ing = _per_vista("forn_righe", chiave_forn, lambda: df_f_all.groupby('ingrediente').indices)
+        trend_ing = _per_vista("forn_trend_ing", chiave_forn, lambda: trend_prezzi(df_f_all, per=['ingrediente']))
+
+        @frammento
+        def _analisi_dettagliata(df_f_all, df_f_per, righe_ing, trend_ing, ing_dispo):
+            with st.expander("📊 Analisi dettagliata nel periodo selezionato"):
+                scelta = st.selectbox("Ingrediente", ['— tutti —'] + ing_dispo, key='forn_det')
+                df_f = df_f_per if scelta == '— tutti —' else df_f_all.iloc[righe_ing[scelta]]
+                if df_f.empty:
+                    st.info("Nessun dato per questa selezione.")
+                else:
+                    fig_sc = px.scatter(
+                        df_f, x='data', y='prezzo_unitario', color='ingrediente', render_mode=modo_scatter(len(df_f)),
+                        size='spesa', hover_data=['fornitore', 'quantita', 'unita', 'spesa'],
+                        labels={'prezzo_unitario': '€/unità', 'data': ''},
+                    )
+                    if scelta in trend_ing.index:
+                        t = trend_ing.loc[scelta]
+                        x_num = (df_f['data'] - t['prima_data']).dt.days.to_numpy()
+                        traccia = go.Scattergl if modo_scatter(len(df_f)) == 'webgl' else go.Scatter
+                        fig_sc.add_trace(traccia(
                             x=df_f['data'],
-                            y=[intercept + slope * xi for xi in x_num],
+                            y=t['intercetta'] + t['pendenza'] * x_num,
                             mode='lines', name='Trend',
                             line=dict(color='red', dash='dot', width=1.5)
                         ))
-                st.plotly_chart(fig_sc, width="stretch")
-                cols_show = [c for c in ['data','ingrediente','fornitore','quantita','unita','spesa','prezzo_unitario'] if c in df_f.columns]
-                st.dataframe(df_f[cols_show].round(2), hide_index=True, width="stretch")
+                    st.plotly_chart(fig_sc, width="stretch")
+                    cols_show = [c for c in ['data','ingrediente','fornitore','quantita','unita','spesa','prezzo_unitario'] if c in df_f.columns]
+                    st.dataframe(arrotonda(df_f[cols_show]), hide_index=True, width="stretch")
+
+        _analisi_dettagliata(df_f_all, df_f_per, righe_ing, trend_ing, list(stats_forn.index))
 
 # ── TAB RIFORNIMENTI ──────────────────────────────────────────────────────────
-with tab_r:
+@frammento
+def _rifornimenti(df_sel, ingred_cols, freq_sel, per_freq):
     # Ingredienti non classificati in nessuna categoria → categoria "Altri" dinamica
     ing_noti = set(sum(CATEGORIE_ING.values(), []))
     ing_altri = [c for c in ingred_cols if c not in ing_noti and c in df_sel.columns]
@@ -908,20 +917,26 @@ with tab_r:
     cat_r  = st.selectbox("Categoria", ['Tutti'] + list(categorie_r.keys()), key='cat_r')
     cols_r = ingred_cols if cat_r == 'Tutti' else [c for c in categorie_r.get(cat_r, []) if c in df_sel.columns]
 
-    df_rif = df_sel[['data'] + cols_r].copy()
-    df_rif = df_rif[(df_rif[cols_r] > 0).any(axis=1)]
+    df_rif = df_sel[['data'] + cols_r]
+    df_rif = densifica(df_rif[(df_rif[cols_r] > 0).any(axis=1)])
     melted_r = df_rif.melt(id_vars='data', var_name='Ingrediente', value_name='Spesa (€)')
     melted_r = melted_r[melted_r['Spesa (€)'] > 0]
 
     if melted_r.empty:
         st.info("Nessun rifornimento registrato per questa categoria nel periodo.")
     else:
+        barre_r = melted_r
+        if freq_sel:
+            barre_r = per_periodo(df_rif, cols_r, freq_sel).melt(id_vars='data', var_name='Ingrediente', value_name='Spesa (€)')
+            barre_r = barre_r[barre_r['Spesa (€)'] > 0]
         st.plotly_chart(
-            px.bar(melted_r, x='data', y='Spesa (€)', color='Ingrediente', barmode='stack',
-                   title="Spese di rifornimento per ingrediente", labels={'data': ''}),
+            px.bar(barre_r, x='data', y='Spesa (€)', color='Ingrediente', barmode='stack',
+                   title=f"Spese di rifornimento per ingrediente{per_freq}", labels={'data': ''}),
             width="stretch"
         )
-        st.caption("Ogni barra corrisponde a un giorno di acquisto. Compila la cella dell'ingrediente solo nel giorno in cui lo rifornisci — il costo viene distribuito automaticamente fino al rifornimento successivo.")
+        barra = {'W-MON': "somma gli acquisti di una settimana",
+                 'MS':    "somma gli acquisti di un mese"}.get(freq_sel, "corrisponde a un giorno di acquisto")
+        st.caption(f"Ogni barra {barra}. Compila la cella dell'ingrediente solo nel giorno in cui lo rifornisci — il costo viene distribuito automaticamente fino al rifornimento successivo.")
 
         daily_r = melted_r.groupby('data')['Spesa (€)'].sum().reset_index()
         daily_r['Cumulata (€)'] = daily_r['Spesa (€)'].cumsum()
@@ -938,65 +953,71 @@ with tab_r:
         st.dataframe(totali_ing, hide_index=True, width="stretch")
         st.caption("Spesa totale per ingrediente nel periodo selezionato.")
 
+tappa("tab rifornimenti")
+with tab_r:
+    _rifornimenti(df_sel, ingred_cols, freq_sel, per_freq)
+
 # ── TAB GIORNATE CRITICHE ─────────────────────────────────────────────────────
-with tab_cr:
+@frammento
+def _giornate_critiche(df_sel):
     st.caption(
         "Giorni aperti (fatturato > 0) che rientrano in almeno uno dei criteri di attenzione. "
         "I giorni chiusi non vengono considerati."
     )
     sc1, sc2, sc3 = st.columns(3)
     soglia_ing = sc1.slider(
-        "🧂 Soglia % ingredienti", 10, 60, 30, step=5,
+        "🧂 Soglia % ingredienti", 10, 60, SOGLIE_CRITICHE['soglia_ing'], step=5,
         help="Flagga i giorni in cui il costo ingredienti supera questa % del fatturato"
     )
     soglia_dip = sc2.slider(
-        "👥 Soglia % dipendente", 10, 60, 25, step=5,
+        "👥 Soglia % dipendente", 10, 60, SOGLIE_CRITICHE['soglia_dip'], step=5,
         help="Flagga i giorni in cui il costo dipendente supera questa % del fatturato"
     )
     soglia_fat = sc3.number_input(
-        "📉 Fatturato minimo (€)", min_value=0, value=300, step=20,
+        "📉 Fatturato minimo (€)", min_value=0, value=SOGLIE_CRITICHE['soglia_fat'], step=20,
         help="Flagga i giorni aperti con fatturato sotto questa soglia"
     )
 
-    GIORNI_IT = {0: 'Lun', 1: 'Mar', 2: 'Mer', 3: 'Gio', 4: 'Ven', 5: 'Sab', 6: 'Dom'}
-    df_sel_open = df_sel[df_sel['fatturato'] > 0].copy()
-
-    critici = df_sel_open[
-        (df_sel_open['pct_ingredienti'] > soglia_ing) |
-        (df_sel_open['pct_dipendenti']  > soglia_dip) |
-        (df_sel_open['fatturato']       < soglia_fat)
-    ].copy()
-
+    critici, n_aperti = giornate_critiche(df_sel, soglia_ing, soglia_dip, soglia_fat)
     if critici.empty:
-        st.success(f"✅ Nessuna giornata critica su {len(df_sel_open)} giorni aperti nel periodo.")
+        st.success(f"✅ Nessuna giornata critica su {n_aperti} giorni aperti nel periodo.")
     else:
-        def _motivo(r):
-            m = []
-            if r['pct_ingredienti'] > soglia_ing: m.append(f"🧂 Ing. {r['pct_ingredienti']:.0f}%")
-            if r['pct_dipendenti']  > soglia_dip: m.append(f"👥 Dip. {r['pct_dipendenti']:.0f}%")
-            if r['fatturato']       < soglia_fat: m.append(f"📉 Fat. €{r['fatturato']:.0f}")
-            return '  '.join(m)
-        critici['Giorno']  = critici['data'].dt.weekday.map(GIORNI_IT)
-        critici['Motivo']  = critici.apply(_motivo, axis=1)
-        st.info(f"{len(critici)} giorni da monitorare su {len(df_sel_open)} giorni aperti ({len(critici)/len(df_sel_open)*100:.0f}%)")
-        _num = ['fatturato','poke_totali','pct_ingredienti','pct_dipendenti','utile_lordo']
-        _disp = critici[['data','Giorno']+_num+['Motivo']].copy()
-        _disp[_num] = _disp[_num].round(1)
-        st.dataframe(
-            _disp.rename(columns={
-                'data': 'Data', 'fatturato': 'Fatturato (€)', 'poke_totali': 'Poke',
-                'pct_ingredienti': '% Ing', 'pct_dipendenti': '% Dip',
-                'utile_lordo': 'Utile lordo (€)',
-            }),
-            hide_index=True, width="stretch"
-        )
+        st.info(f"{len(critici)} giorni da monitorare su {n_aperti} giorni aperti ({len(critici)/n_aperti*100:.0f}%)")
+        st.dataframe(critici, hide_index=True, width="stretch")
         st.caption("🧂 % ingredienti alta = rifornimento pesante o giornata lenta  ·  👥 % dipendente alta = giornata poco intensa  ·  📉 fatturato basso = apertura sottosoglia")
 
+tappa("tab giornate critiche")
+with tab_cr:
+    _giornate_critiche(df_sel)
+
 # ── EXPORT ────────────────────────────────────────────────────────────────────
+tappa("export")
 st.divider()
-st.download_button(
-    "📥 Scarica analisi periodo (CSV)",
-    data=df_sel.to_csv(sep=';', index=False).encode('utf-8'),
-    file_name=f"analisi_poketogo_{anno_sel}.csv",
-    mime='text/csv',
+ETICHETTE_EXPORT = {'csv': "CSV", 'csv.gz': "CSV compresso (gzip)", 'parquet': "Parquet"}
+col_fmt, col_dl = st.columns([1, 2])
+formato_exp = col_fmt.selectbox(
+    "Formato", formati_disponibili(), format_func=ETICHETTE_EXPORT.get, key='formato_export',
+    label_visibility='collapsed',
 )
+# Il file si genera solo al clic (e resta in cache per dataset e periodo)
+with col_dl:
+    st.download_button(
+        f"📥 Scarica analisi periodo ({ETICHETTE_EXPORT[formato_exp]})",
+        data=functools.partial(export_periodo, chiave_gio, start_sel, end_sel, formato_exp, df_sel),
+        file_name=nome_export(anno_sel, None if len(negozi) == 1 else negozio_sel, formato_exp),
+        mime=FORMATI_EXPORT[formato_exp][1],
+        on_click='ignore',
+    )
+
+# ── PROFILO DEL RERUN ─────────────────────────────────────────────────────────
+if prof is not None:
+    profilo.termina()
+    st.session_state["rerun"] = st.session_state.get("rerun", 0) + 1
+    if profilo.FILE_LOG:
+        prof.scrivi(profilo.FILE_LOG, rerun=st.session_state["rerun"], negozio=negozio_sel)
+    if debug:
+        with st.sidebar:
+            with st.expander("🛠️ Profilo del rerun", expanded=True):
+                st.caption(f"Rerun completo in {prof.totale_ms():.0f} ms")
+                st.dataframe(prof.tempi(), hide_index=True)
+                st.dataframe(prof.contatori(), hide_index=True)
@@ -0,0 +1 @@
+# Pokè To Go! – moduli di calcolo della dashboard
@@ -0,0 +1,122 @@
+# Pokè To Go! – archivio colonnare su disco dei dati elaborati
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from poketogo.caricamento import LetturaFornitori, StatoGiornaliero, carica_stato, elabora_fornitori as _elabora_fornitori, impronta
+from poketogo.memoria import densifica
+
+try:
+    import pyarrow.feather as feather
+except ImportError:   # senza pyarrow l'archivio è disattivato
+    feather = None
+
+# Una cartella per dataset: <DIR_ARCHIVIO>/<tipo>/<impronta>/{<nome>.arrow, meta.json}
+# I file Arrow sono salvati non compressi: la rilettura non riesegue il parsing
+# del CSV né la pipeline, ma copia comunque le colonne nei frame pandas.
+DIR_ARCHIVIO = Path(os.environ.get('POKETOGO_ARCHIVIO', '.archivio'))
+VERSIONE     = 4   # 2: tipi compatti (memoria.py), 3: fornitori con statistiche ed errori,
+                  # 4: costi distribuiti float64, conteggi interi solo senza vuoti
+MAX_VOCI     = 20   # dataset tenuti per tipo, i più vecchi vengono eliminati
+
+def salva(tipo: str, chiave: str, frames: dict, meta: dict = None) -> bool:
+    """Write `frames` ({name: DataFrame}) under (tipo, chiave). Never raises."""
+    if feather is None:
+        return False
+    base = DIR_ARCHIVIO / tipo
+    dest = base / chiave
+    if dest.exists():
+        return True
+    tmp = None
+    try:
+        base.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=base, prefix='.tmp-'))
+        for nome, frame in frames.items():
+            feather.write_feather(densifica(frame), tmp / f'{nome}.arrow', compression='uncompressed')
+        (tmp / 'meta.json').write_text(json.dumps({'versione': VERSIONE, 'frames': list(frames), **(meta or {})}))
+        os.replace(tmp, dest)
+    except Exception:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return dest.exists()   # un'altra sessione può averlo appena scritto
+    _pota(base)
+    return True
+
+def carica(tipo: str, chiave: str):
+    """Reload the frames stored under (tipo, chiave) from Arrow, without
+    re-parsing (the columns are still copied into pandas).
+    Returns (frames, meta) or None if missing, stale or unreadable."""
+    if feather is None:
+        return None
+    dest = DIR_ARCHIVIO / tipo / chiave
+    try:
+        meta = json.loads((dest / 'meta.json').read_text())
+        if meta.get('versione') != VERSIONE:
+            return None
+        frames = {
+            nome: feather.read_table(dest / f'{nome}.arrow', memory_map=True).to_pandas()
+            for nome in meta['frames']
+        }
+        os.utime(dest)   # usato di recente: non va potato
+        return frames, meta
+    except Exception:
+        return None
+
+def _pota(base: Path):
+    voci = sorted(
+        (p for p in base.iterdir() if p.is_dir() and not p.name.startswith('.')),
+        key=lambda p: p.stat().st_mtime, reverse=True,
+    )
+    for p in voci[MAX_VOCI:]:
+        shutil.rmtree(p, ignore_errors=True)
+
+# ── DATASET DELLA DASHBOARD ───────────────────────────────────────────────────
+
+def salva_giornaliero(stato: StatoGiornaliero) -> bool:
+    return salva(
+        'giornaliero', stato.impronta,
+        {'df': stato.df, 'df_dist': stato.df_dist},
+        {'n_bytes': stato.n_bytes, 'ingred_cols': stato.ingred_cols},
+    )
+
+def carica_giornaliero(chiave: str):
+    voce = carica('giornaliero', chiave)
+    if voce is None:
+        return None
+    frames, meta = voce
+    return StatoGiornaliero(chiave, meta['n_bytes'], frames['df'], frames['df_dist'], meta['ingred_cols'])
+
+def salva_fornitori(chiave: str, lettura: LetturaFornitori) -> bool:
+    return salva(
+        'fornitori', chiave,
+        {'df': lettura.df, 'stats': lettura.stats.reset_index(), 'errori': lettura.errori},
+        {'n_errori': lettura.n_errori},
+    )
+
+def carica_fornitori(chiave: str):
+    voce = carica('fornitori', chiave)
+    if voce is None:
+        return None
+    frames, meta = voce
+    return LetturaFornitori(frames['df'], frames['stats'].set_index('ingrediente'), frames['errori'], meta['n_errori'])
+
+# Dataset elaborati: dall'archivio se presenti, altrimenti calcolati e salvati
+
+def giornaliero(file_bytes: bytes) -> StatoGiornaliero:
+    stato = carica_giornaliero(impronta(file_bytes))
+    if stato is None:
+        stato = carica_stato(file_bytes)
+        salva_giornaliero(stato)
+    return stato
+
+def fornitori(file_bytes: bytes):
+    chiave = impronta(file_bytes)
+    lettura = carica_fornitori(chiave)
+    if lettura is None:
+        lettura = _elabora_fornitori(file_bytes)
+        if lettura is not None:
+            salva_fornitori(chiave, lettura)
+    return lettura
@@ -0,0 +1,197 @@
+# Pokè To Go! – analisi della dashboard senza browser, per i job notturni
+#
+# Uso:  python -m poketogo.batch <cartella_dati> <cartella_output>
+#                                [--formato csv json parquet] [--costi-fissi 150]
+#                                [--soglia-ing 30] [--soglia-dip 25] [--soglia-fat 300]
+#                                [--riferimento espanso] [--allinea calendario] [--workers N]
+#
+# La cartella dati è quella di POKETOGO_DATI (<negozio>_giornaliero.csv e
+# <negozio>_fornitori.csv). Ogni negozio è elaborato in un processo del pool;
+# con più negozi si aggiunge la vista consolidata. Per ogni vista scrive in
+# <cartella_output>/<negozio>/: briefing.json, stagioni, giornate_critiche,
+# prezzi_da_monitorare, anomalie_prezzi e prezzi_in_crescita nei formati
+# scelti, più il CSV "analisi periodo" con lo stesso nome e gli stessi byte
+# del download della dashboard. Il periodo è quello iniziale della dashboard: l'ultimo anno.
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from poketogo import archivio
+from poketogo.cubo import costruisci_cubo
+from poketogo.esporta import blocchi_righe, nome_export, scrivi_blocchi
+from poketogo.fornitori import (
+    METODI_ZSCORE, MIN_ORDINI_ANOMALIA, prezzi_da_monitorare, prezzi_in_crescita, statistiche_ingredienti,
+    trend_prezzi, zscore_prezzi,
+)
+from poketogo.kpi import confronto_stagioni, stagione, ultimi_giorni, variazione
+from poketogo.memoria import sparsifica_stato
+from poketogo.metriche import SOGLIE_CRITICHE, giornate_critiche
+from poketogo.negozi import TUTTI, abbina_fornitori, consolida, file_cartella, unisci_fornitori
+from poketogo.periodi import ALLINEAMENTI, IndiceDate
+
+try:
+    import pyarrow   # noqa: F401
+except ImportError:   # senza pyarrow niente output parquet
+    pyarrow = None
+
+FORMATI = ('csv', 'json', 'parquet')
+
+def _totali(kpi: dict) -> dict:
+    """KPI block with its deltas (% vs the previous year, as in the briefing)."""
+    out = {k: (v.isoformat() if isinstance(v, pd.Timestamp) else v) for k, v in kpi.items() if k != 'prec'}
+    out['prec'] = kpi['prec']
+    out['variazione'] = None if kpi['prec'] is None else {
+        k: variazione(kpi[k], kpi['prec'][k]) for k in kpi['prec']
+    }
+    return out
+
+def analizza(df: pd.DataFrame, df_forn, stats_forn, costi_fissi_gg: float = 150,
+             soglie: dict = None, riferimento: str = 'espanso', allinea: str = 'calendario') -> dict:
+    """Everything the dashboard shows at first load for one view: briefing
+    KPIs (previous year matched by `allinea`), season comparison, critical
+    days and supplier anomalies over the latest year, and that year's rows
+    for the CSV export. Tables are DataFrames."""
+    soglie = {**SOGLIE_CRITICHE, **(soglie or {})}
+    cubo = costruisci_cubo(df)
+    anni = sorted(df['anno'].unique())
+    anno_corrente = int(anni[-1])
+    anno_prec     = int(anni[-2]) if len(anni) > 1 else None
+    df_sel = df.iloc[IndiceDate(df['data']).anno(anno_corrente)]
+
+    critici, n_aperti = giornate_critiche(df_sel, **soglie)
+    out = {
+        'briefing': {
+            'anno': anno_corrente, 'anno_prec': anno_prec,
+            'ultimi_giorni': _totali(ultimi_giorni(cubo, anno_corrente, anno_prec, allinea=allinea)),
+            'stagione':      _totali(stagione(cubo, anno_corrente, anno_prec, allinea=allinea)),
+            'giornate_critiche': {'critiche': len(critici), 'aperte': n_aperti, **soglie},
+        },
+        'stagioni': confronto_stagioni(cubo, costi_fissi_gg).reset_index(),
+        'giornate_critiche': critici,
+        'export': df_sel,
+    }
+    if stats_forn is not None:
+        anom, n_monitorati = prezzi_da_monitorare(stats_forn, MIN_ORDINI_ANOMALIA)
+        df_z = zscore_prezzi(df_forn, riferimento, min_ordini=MIN_ORDINI_ANOMALIA)
+        out['prezzi_da_monitorare'] = anom
+        out['anomalie_prezzi'] = df_z[df_z['anomalia']].reset_index(drop=True)
+        out['prezzi_in_crescita'] = prezzi_in_crescita(trend_prezzi(df_forn))
+        out['briefing']['fornitori'] = {
+            'monitorati': n_monitorati, 'sopra_media': len(anom), 'anomalie_storiche': int(df_z['anomalia'].sum()),
+        }
+    return out
+
+def _scrivi_tabella(df: pd.DataFrame, base: Path, formato: str):
+    if formato == 'csv':
+        df.to_csv(base.with_suffix('.csv'), sep=';', index=False)
+    elif formato == 'json':
+        df.to_json(base.with_suffix('.json'), orient='records', date_format='iso', force_ascii=False, indent=1)
+    else:
+        df.to_parquet(base.with_suffix('.parquet'), index=False)
+
+def _json(v):
+    return v.item() if hasattr(v, 'item') else str(v)   # scalari numpy
+
+def scrivi(risultati: dict, cartella: Path, formati, nome_csv: str) -> list:
+    """Write one view's results; returns the file names."""
+    cartella.mkdir(parents=True, exist_ok=True)
+    scritti = []
+    for nome, valore in risultati.items():
+        if nome == 'briefing':
+            (cartella / 'briefing.json').write_text(json.dumps(valore, ensure_ascii=False, indent=1, default=_json), encoding='utf-8')
+            scritti.append('briefing.json')
+        elif nome == 'export':
+            with open(cartella / nome_csv, 'wb') as f:
+                scrivi_blocchi(blocchi_righe(valore), f)
+            scritti.append(nome_csv)
+        else:
+            for formato in formati:
+                _scrivi_tabella(valore, cartella / nome, formato)
+                scritti.append(f'{nome}.{formato}')
+    return scritti
+
+def _cartella_vista(negozio: str) -> str:
+    return negozio.replace(' ', '_').lower()
+
+def _elabora(negozio: str, b_gio: bytes, b_forn, calcolo: dict, formati, uscita: str, singolo: bool) -> tuple:
+    """One store in a worker: load it through the on-disk store, analyse it
+    and write its results. Returns (StatoGiornaliero, LetturaFornitori or
+    None) for the consolidated view."""
+    stato   = sparsifica_stato(archivio.giornaliero(b_gio))
+    lettura = archivio.fornitori(b_forn) if b_forn is not None else None
+    risultati = analizza(stato.df, *((None, None) if lettura is None else (lettura.df, lettura.stats)), **calcolo)
+    nome_csv = nome_export(risultati['briefing']['anno'], None if singolo else negozio)
+    scrivi(risultati, Path(uscita) / _cartella_vista(negozio), formati, nome_csv)
+    return stato, lettura
+
+def esegui(cartella_dati, uscita, formati=('csv',), costi_fissi_gg: float = 150, soglie: dict = None,
+           riferimento: str = 'espanso', allinea: str = 'calendario', max_workers: int = None) -> dict:
+    """Analyse every store in `cartella_dati` in a process pool and write the
+    results under `uscita`. Returns {vista: cartella} of the views written."""
+    giornalieri, fornitori = file_cartella(cartella_dati)
+    if not giornalieri:
+        raise ValueError(f"nessun CSV giornaliero in {cartella_dati}")
+    fornitori = abbina_fornitori(giornalieri, fornitori)
+    calcolo = {'costi_fissi_gg': costi_fissi_gg, 'soglie': soglie, 'riferimento': riferimento, 'allinea': allinea}
+    uscita = Path(uscita)
+    singolo = len(giornalieri) == 1
+
+    workers = min(len(giornalieri), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuri = {
+            n: pool.submit(_elabora, n, b, fornitori.get(n), calcolo, tuple(formati), str(uscita), singolo)
+            for n, b in giornalieri.items()
+        }
+        caricati = {n: f.result() for n, f in futuri.items()}
+
+    viste = {n: uscita / _cartella_vista(n) for n in caricati}
+    if not singolo:
+        stati   = {n: s for n, (s, _) in caricati.items()}
+        letture = {n: l for n, (_, l) in caricati.items() if l is not None}
+        df, _, _ = consolida(stati)
+        df_forn = unisci_fornitori({n: l.df for n, l in letture.items()})
+        stats_forn = None if df_forn is None else statistiche_ingredienti(df_forn)
+        risultati = analizza(df, df_forn, stats_forn, **calcolo)
+        viste[TUTTI] = uscita / _cartella_vista(TUTTI)
+        scrivi(risultati, viste[TUTTI], formati, nome_export(risultati['briefing']['anno'], TUTTI))
+    return viste
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisi della dashboard per tutti i negozi, senza browser.")
+    parser.add_argument('dati', help="cartella con <negozio>_giornaliero.csv e <negozio>_fornitori.csv")
+    parser.add_argument('uscita', help="cartella dei risultati (una sottocartella per negozio)")
+    parser.add_argument('--formato', nargs='+', choices=FORMATI, default=['csv'])
+    parser.add_argument('--costi-fissi', type=float, default=150, help="€ per giorno di apertura")
+    parser.add_argument('--soglia-ing', type=float, default=SOGLIE_CRITICHE['soglia_ing'])
+    parser.add_argument('--soglia-dip', type=float, default=SOGLIE_CRITICHE['soglia_dip'])
+    parser.add_argument('--soglia-fat', type=float, default=SOGLIE_CRITICHE['soglia_fat'])
+    parser.add_argument('--riferimento', choices=METODI_ZSCORE, default='espanso',
+                        help="riferimento dello storico anomalie di prezzo")
+    parser.add_argument('--allinea', choices=ALLINEAMENTI, default='calendario',
+                        help="confronto con l'anno precedente: stesse date o stessi giorni della settimana")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    if 'parquet' in args.formato and pyarrow is None:
+        parser.error("il formato parquet richiede pyarrow")
+
+    try:
+        viste = esegui(
+            args.dati, args.uscita, formati=args.formato, costi_fissi_gg=args.costi_fissi,
+            soglie={'soglia_ing': args.soglia_ing, 'soglia_dip': args.soglia_dip, 'soglia_fat': args.soglia_fat},
+            riferimento=args.riferimento, allinea=args.allinea, max_workers=args.workers,
+        )
+    except ValueError as e:
+        print(f"errore: {e}", file=sys.stderr)
+        return 1
+    for vista, cartella in viste.items():
+        print(f"{vista}: {cartella}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# Pokè To Go! – benchmark di prestazioni su dati sintetici
+#
+# Uso:  python -m poketogo.benchmark [--scale piccola media] [--ripetizioni 3]
+#                                    [--output bench.json] [--senza-app]
+#
+# Per ogni scala genera i dati, misura tempo (min e mediana su più ripetizioni)
+# e picco di memoria (tracemalloc, in un passaggio separato) di ogni fase e
+# verifica che i motori vettoriali diano gli stessi numeri di quelli di
+# riferimento. Il report JSON è pensato per essere confrontato tra commit.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poketogo import archivio, generatori
+from poketogo.caricamento import (
+    carica_stato, colonne_ingredienti, elabora_fornitori, elabora_giornaliero,
+    estendi_giornaliero, leggi_giornaliero,
+)
+from poketogo.costi import distribuisci_costi, distribuisci_costi_iterativo
+from poketogo.cubo import costruisci_cubo
+from poketogo.esporta import esporta_periodo
+from poketogo.fornitori import statistiche_ingredienti, trend_prezzi, zscore_prezzi
+from poketogo.negozi import carica_negozi
+from poketogo.qualita import verifica_giornaliero
+
+SCALE = {
+    'piccola': dict(anni=2,  negozi=1, ingredienti=50,  fattore_rifornimento=1.0, fornitori=None),
+    'media':   dict(anni=5,  negozi=3, ingredienti=60,  fattore_rifornimento=1.0, fornitori=4),
+    'grande':  dict(anni=10, negozi=5, ingredienti=80,  fattore_rifornimento=0.8, fornitori=8),
+    'enorme':  dict(anni=25, negozi=8, ingredienti=120, fattore_rifornimento=0.6, fornitori=12),
+}
+
+# Il motore iterativo è O(ingredienti × rifornimenti × giorni): solo su dati piccoli
+MAX_CELLE_RIFERIMENTO = 50_000
+
+APP = Path(__file__).resolve().parent.parent / 'app.py'
+
+def misura(fn, ripetizioni: int = 3) -> dict:
+    """Time `fn` (min and median over `ripetizioni` runs) and its peak traced
+    memory (one extra run under tracemalloc, which slows it down)."""
+    tracemalloc.start()
+    fn()
+    _, picco = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tempi = []
+    for _ in range(ripetizioni):
+        t0 = time.perf_counter()
+        fn()
+        tempi.append(time.perf_counter() - t0)
+    return {
+        'secondi_min':     round(min(tempi), 6),
+        'secondi_mediana': round(statistics.median(tempi), 6),
+        'picco_mb':        round(picco / 2**20, 3),
+    }
+
+def _diff(a: pd.DataFrame, b: pd.DataFrame) -> dict:
+    a, b = a.to_numpy(dtype=float), b.to_numpy(dtype=float)
+    return {
+        'uguale':   bool(np.array_equal(a, b, equal_nan=True)),
+        'diff_max': float(np.nanmax(np.abs(a - b))) if a.size else 0.0,
+    }
+
+def _equivalenza(gio: bytes, df: pd.DataFrame, ingred_cols: list) -> dict:
+    esiti = {}
+    if len(df) * len(ingred_cols) <= MAX_CELLE_RIFERIMENTO:
+        esiti['distribuisci_costi'] = _diff(
+            distribuisci_costi(df, ingred_cols), distribuisci_costi_iterativo(df, ingred_cols)
+        )
+    # Ingestione incrementale dell'ultima settimana contro il caricamento completo
+    righe = gio.rstrip(b'\n').split(b'\n')
+    prefisso = b'\n'.join(righe[:-7]) + b'\n'
+    inc = estendi_giornaliero(carica_stato(prefisso), gio)
+    full = carica_stato(gio)
+    esiti['ingestione_incrementale'] = {
+        'df_dist': _diff(inc.df_dist, full.df_dist),
+        'utile_lordo': _diff(inc.df[['utile_lordo']], full.df[['utile_lordo']]),
+    }
+    return esiti
+
+def _script_completo(cartella: Path, ripetizioni: int) -> dict:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    dati = os.environ.get('POKETOGO_DATI')
+    os.environ['POKETOGO_DATI'] = str(cartella)
+    esiti = {}
+
+    def _freddo():
+        st.cache_data.clear()
+        st.cache_resource.clear()   # cache dei dataset condivisa dalle sessioni
+        archivio.DIR_ARCHIVIO = Path(tempfile.mkdtemp(dir=cartella))
+        at = AppTest.from_file(str(APP), default_timeout=600)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return at
+
+    try:
+        esiti['script_completo'] = misura(_freddo, ripetizioni)
+        at = _freddo()
+        esiti['script_rerun'] = misura(at.run, ripetizioni)
+    finally:
+        if dati is None:
+            os.environ.pop('POKETOGO_DATI', None)
+        else:
+            os.environ['POKETOGO_DATI'] = dati
+    return esiti
+
+def esegui_scala(nome: str, parametri: dict, ripetizioni: int, con_app: bool) -> dict:
+    anni = range(2026 - parametri['anni'], 2026)
+    t0 = time.perf_counter()
+    negozi = generatori.genera_negozi(
+        parametri['negozi'], anni, parametri['ingredienti'],
+        parametri['fattore_rifornimento'], parametri['fornitori'], vettoriale=True,
+    )
+    t_gen = time.perf_counter() - t0
+    gio, forn = negozi['negozio_1']
+
+    df_raw = leggi_giornaliero(gio)
+    ingred_cols = colonne_ingredienti(df_raw.columns)
+    df, _, _ = elabora_giornaliero(gio)
+    df_forn = elabora_fornitori(forn).df
+
+    passi = {
+        'carica_giornaliero':     misura(lambda: elabora_giornaliero(gio), ripetizioni),
+        'distribuisci_costi':     misura(lambda: distribuisci_costi(df_raw, ingred_cols), ripetizioni),
+        'cubo_kpi':               misura(lambda: costruisci_cubo(df), ripetizioni),
+        'controllo_qualita':      misura(lambda: verifica_giornaliero(df, ingred_cols), ripetizioni),
+        'export_csv':             misura(lambda: esporta_periodo(df, 'csv'), ripetizioni),
+        'export_csv_gzip':        misura(lambda: esporta_periodo(df, 'csv.gz'), ripetizioni),
+        'export_parquet':         misura(lambda: esporta_periodo(df, 'parquet'), ripetizioni),
+        'carica_fornitori':       misura(lambda: elabora_fornitori(forn), ripetizioni),
+        'statistiche_fornitori':  misura(lambda: statistiche_ingredienti(df_forn), ripetizioni),
+        'zscore_fornitori':       misura(lambda: zscore_prezzi(df_forn), ripetizioni),
+        'zscore_fornitori_ewm':   misura(lambda: zscore_prezzi(df_forn, 'esponenziale'), ripetizioni),
+        'trend_fornitori':        misura(lambda: trend_prezzi(df_forn), ripetizioni),
+        'trend_fornitori_robusto': misura(lambda: trend_prezzi(df_forn, metodo='robusta'), ripetizioni),
+    }
+    if len(negozi) > 1:
+        giornalieri = {n: g for n, (g, _) in negozi.items()}
+        fornitori   = {n: f for n, (_, f) in negozi.items()}
+        with tempfile.TemporaryDirectory() as tmp:
+            def _a_freddo():
+                # archivio vuoto a ogni giro (ereditato dai processi figli): misura il calcolo
+                archivio.DIR_ARCHIVIO = Path(tempfile.mkdtemp(dir=tmp))
+                carica_negozi(giornalieri, fornitori)
+            passi['carica_negozi'] = misura(_a_freddo, ripetizioni)
+
+    if con_app:
+        with tempfile.TemporaryDirectory() as tmp:
+            cartella = Path(tmp)
+            for n, (g, f) in negozi.items():
+                (cartella / f'{n}_giornaliero.csv').write_bytes(g)
+                (cartella / f'{n}_fornitori.csv').write_bytes(f)
+            passi.update(_script_completo(cartella, ripetizioni))
+
+    return {
+        'parametri': parametri,
+        'dati': {
+            'secondi_generazione': round(t_gen, 3),
+            'righe_giornaliero':   len(df),
+            'colonne_ingredienti': len(ingred_cols),
+            'righe_fornitori':     len(df_forn),
+            'negozi':              len(negozi),
+        },
+        'passi': passi,
+        'equivalenza': _equivalenza(gio, df_raw, ingred_cols),
+    }
+
+def _equivalenze_ok(report: dict) -> bool:
+    def _ok(nodo):
+        if 'uguale' in nodo:
+            return nodo['uguale']
+        return all(_ok(v) for v in nodo.values())
+    return all(_ok(s['equivalenza']) for s in report['scale'].values())
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark della dashboard Pokè To Go! su dati sintetici")
+    parser.add_argument('--scale', nargs='+', choices=list(SCALE), default=['piccola', 'media', 'grande'])
+    parser.add_argument('--ripetizioni', type=int, default=3)
+    parser.add_argument('--output', type=Path, default=None, help="file JSON del report (default: stdout)")
+    parser.add_argument('--senza-app', action='store_true', help="non misurare l'esecuzione completa di app.py")
+    args = parser.parse_args(argv)
+
+    dir_archivio = archivio.DIR_ARCHIVIO
+    report = {
+        'creato':   datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'cpu': os.cpu_count(), 'piattaforma': platform.platform(),
+        },
+        'scale': {},
+    }
+    try:
+        for nome in args.scale:
+            print(f"▶ scala {nome}…", file=sys.stderr)
+            report['scale'][nome] = esegui_scala(nome, SCALE[nome], args.ripetizioni, not args.senza_app)
+    finally:
+        archivio.DIR_ARCHIVIO = dir_archivio
+
+    testo = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(testo)
+    else:
+        print(testo)
+    ok = _equivalenze_ok(report)
+    if not ok:
+        print("✗ risultati diversi tra motore vettoriale e di riferimento", file=sys.stderr)
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
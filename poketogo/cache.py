@@ -0,0 +1,75 @@
+# Pokè To Go! – cache dei dataset elaborati, condivisa da tutte le sessioni
+
+import os
+import threading
+from collections import OrderedDict
+
+from poketogo.profilo import dimensione
+
+# POKETOGO_CACHE_MB: memoria massima dei dataset tenuti dal processo
+BUDGET_MB = float(os.environ.get('POKETOGO_CACHE_MB', '512'))
+
+MANCANTE = object()   # prendi() senza voce (None è un valore valido: file non leggibile)
+
+class CacheDataset:
+    """Processed datasets keyed by content fingerprint, shared by every
+    session of the process and bounded by a memory budget.
+
+    Keys are (tipo, impronta): sessions that upload the same bytes share
+    one copy of the frames. When the total size goes over the budget the
+    least recently used entries are dropped; a value larger than the whole
+    budget is returned to the caller but not kept. Values are shared, so
+    callers must not modify them in place."""
+
+    def __init__(self, budget_mb: float = BUDGET_MB):
+        self.budget = int(budget_mb * 2**20)
+        self.byte = 0
+        self.hit = self.miss = self.rimossi = 0
+        self._voci = OrderedDict()   # chiave → (valore, byte), dalla meno recente
+        self._lock = threading.Lock()
+
+    def prendi(self, chiave, predefinito=MANCANTE):
+        with self._lock:
+            voce = self._voci.get(chiave)
+            if voce is None:
+                self.miss += 1
+                return predefinito
+            self._voci.move_to_end(chiave)
+            self.hit += 1
+            return voce[0]
+
+    def metti(self, chiave, valore):
+        """Store `valore` (evicting LRU entries as needed) and return it."""
+        n = dimensione(valore)
+        with self._lock:
+            vecchia = self._voci.pop(chiave, None)
+            if vecchia is not None:
+                self.byte -= vecchia[1]
+            if n > self.budget:
+                return valore
+            while self._voci and self.byte + n > self.budget:
+                _, (_, m) = self._voci.popitem(last=False)
+                self.byte -= m
+                self.rimossi += 1
+            self._voci[chiave] = (valore, n)
+            self.byte += n
+        return valore
+
+    def svuota(self):
+        with self._lock:
+            self._voci.clear()
+            self.byte = 0
+
+    def __contains__(self, chiave) -> bool:
+        with self._lock:
+            return chiave in self._voci
+
+    def __len__(self) -> int:
+        return len(self._voci)
+
+    def stato(self) -> dict:
+        with self._lock:
+            return {
+                'voci': len(self._voci), 'mb': self.byte / 2**20, 'budget_mb': self.budget / 2**20,
+                'hit': self.hit, 'miss': self.miss, 'rimossi': self.rimossi,
+            }
@@ -0,0 +1,330 @@
+# Pokè To Go! – caricamento e preparazione del CSV giornaliero
+
+import csv
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+
+from poketogo.colonne import POKE_COLS, EXTRA_COLS, BIBITE_COLS, SORBETTI_COLS, EXCLUDE_COLS
+from poketogo.costi import distribuisci_costi
+from poketogo.fornitori import StatisticheIncrementali
+from poketogo.memoria import a_float64, compatta_fornitori, compatta_giornaliero
+from poketogo.metriche import calcola_metriche
+from poketogo.profilo import misura
+
+def impronta(file_bytes: bytes) -> str:
+    return hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+
+def colonne_dipendente(columns) -> list:
+    return [c for c in columns if c.lower().startswith('dipendente')]
+
+def colonne_ingredienti(columns) -> list:
+    # Ingredienti = tutto ciò che non è una colonna nota — escluse anche le extra dip_cols
+    exclude_dyn = EXCLUDE_COLS | set(colonne_dipendente(columns))
+    return [c for c in columns if c not in exclude_dyn]
+
+# ── PIPELINE ──────────────────────────────────────────────────────────────────
+
+def leggi_giornaliero(file_bytes: bytes) -> pd.DataFrame:
+    """Parse the daily CSV: valid dates only, sorted (stable), numeric values,
+    all dipendente columns summed into 'Dipendente'."""
+    df = pd.read_csv(io.BytesIO(file_bytes), sep=';').dropna(how='all')
+    df['data'] = pd.to_datetime(df['data'], dayfirst=True, errors='coerce')
+    df = df.dropna(subset=['data']).sort_values('data', kind='stable').reset_index(drop=True)
+    for col in df.columns:
+        if col != 'data':
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Rileva tutte le colonne dipendente (Dipendente, Dipendente2, ecc.) e le somma
+    dip_cols = colonne_dipendente(df.columns)
+    df['Dipendente'] = df[dip_cols].sum(axis=1).fillna(0) if dip_cols else 0.0
+    return df
+
+# Colonne aggiunte da aggiungi_derivate, nell'ordine in cui compaiono
+COLONNE_DERIVATE = [
+    'ing_dist', 'bib_sorb_costo', 'poke_totali', 'extra_totali', 'utile_lordo',
+    'pct_ingredienti', 'pct_dipendenti', 'anno', 'mm_dd', 'margine_per_poke',
+]
+
+def aggiungi_derivate(df: pd.DataFrame, df_dist: pd.DataFrame) -> pd.DataFrame:
+    """Add the derived columns. Each one only depends on its own row (and
+    on the same row of df_dist), so the function can run on any slice."""
+    # somma per righe su un array contiguo per righe: stesso ordine di somma
+    # (a coppie) del frame costruito colonna per colonna, quindi stessi decimali
+    df['ing_dist']       = np.ascontiguousarray(df_dist.to_numpy(dtype='float64')).sum(axis=1)
+    df['bib_sorb_costo'] = df[[c for c in BIBITE_COLS + SORBETTI_COLS if c in df.columns]].sum(axis=1)
+    df['poke_totali']    = df[[c for c in POKE_COLS if c in df.columns]].sum(axis=1).fillna(0)
+    df['extra_totali']   = df[[c for c in EXTRA_COLS if c in df.columns]].sum(axis=1).fillna(0)
+    df['utile_lordo']    = df['fatturato'] - df['ing_dist'] - df['bib_sorb_costo'] - df['Dipendente']
+    calcola_metriche(df)   # pct_ingredienti, pct_dipendenti, margine_per_poke
+    df['anno']  = df['data'].dt.year
+    df['mm_dd'] = df['data'].dt.strftime('%m-%d')
+    # margine_per_poke in coda, dopo anno e mm_dd: stesso ordine di colonne dell'export originale
+    df['margine_per_poke'] = df.pop('margine_per_poke')
+    return df
+
+def elabora_giornaliero(file_bytes: bytes) -> tuple:
+    with misura('leggi_giornaliero'):
+        df = leggi_giornaliero(file_bytes)
+    ingred_cols = colonne_ingredienti(df.columns)
+    with misura('distribuisci_costi'):
+        df_dist = distribuisci_costi(df, ingred_cols)
+    with misura('aggiungi_derivate'):
+        df = compatta_giornaliero(aggiungi_derivate(df, df_dist))
+    return df, df_dist, ingred_cols
+
+# ── FORNITORI A BLOCCHI ───────────────────────────────────────────────────────
+
+BYTE_BLOCCO  = 4 * 2**20   # byte del CSV fornitori letti per volta
+MAX_ERRORI   = 1000       # errori di riga conservati (il conteggio resta completo)
+COLONNE_FORNITORI = ['data', 'ingrediente', 'fornitore', 'quantita', 'spesa']   # obbligatorie
+TESTO_FORNITORI   = {'ingrediente': str, 'fornitore': str, 'unita': str}
+
+@dataclass
+class LetturaFornitori:
+    """A parsed supplier CSV: the orders, per-ingredient stats and the rows
+    that could not be read. errori has riga (line in the file, header = 1),
+    colonna, valore, motivo; n_errori counts all of them."""
+    df:       pd.DataFrame
+    stats:    pd.DataFrame
+    errori:   pd.DataFrame
+    n_errori: int = 0
+
+def _fine_record(pezzo: bytes) -> int:
+    """Position after the last newline of `pezzo` that is outside quotes
+    (an even number of '"' before it), 0 if there is none."""
+    fine = pezzo.rfind(b'\n')
+    while fine >= 0 and pezzo.count(b'"', 0, fine) % 2:
+        fine = pezzo.rfind(b'\n', 0, fine)
+    return fine + 1
+
+def _blocchi(sorgente, dimensione: int):
+    """Header line, then blocks of about `dimensione` bytes cut after a newline
+    that ends a record (never inside a quoted field).
+    sorgente: bytes, a path or a binary file object."""
+    if isinstance(sorgente, (str, os.PathLike)):
+        with open(sorgente, 'rb') as f:
+            yield from _blocchi(f, dimensione)
+        return
+    f = io.BytesIO(sorgente) if isinstance(sorgente, (bytes, bytearray, memoryview)) else sorgente
+    yield f.readline()
+    resto = b''
+    while True:
+        pezzo = f.read(dimensione)
+        if not pezzo:
+            break
+        pezzo = resto + pezzo
+        fine = _fine_record(pezzo)
+        if fine == 0:
+            resto = pezzo
+            continue
+        resto = pezzo[fine:]
+        yield pezzo[:fine]
+    if resto:
+        yield resto
+
+def _leggi_blocco(blocco: bytes, colonne: list, prima: int, errori: list) -> pd.DataFrame:
+    """Parse one block of lines, indexed by line number in the file; lines
+    with too many fields are reported and skipped."""
+    opzioni = dict(sep=';', header=None, names=colonne, skip_blank_lines=False,
+                   dtype={c: t for c, t in TESTO_FORNITORI.items() if c in colonne})
+    n_righe = blocco.count(b'\n') + (not blocco.endswith(b'\n'))
+    # pandas prende i campi in eccesso della prima riga come indice invece di segnalarli
+    a_capo = blocco.find(b'\n')
+    prima_riga = (blocco if a_capo < 0 else blocco[:a_capo]).decode('utf-8', 'replace')
+    df = None
+    if len(next(csv.reader([prima_riga], delimiter=';'), [])) <= len(colonne):
+        try:
+            df = pd.read_csv(io.BytesIO(blocco), **opzioni)
+        except pd.errors.ParserError:
+            pass
+    if df is not None and len(df) == n_righe:   # un record per riga: indice = numero di riga
+        df.index = np.arange(prima, prima + len(df))
+    else:
+        df = _leggi_blocco_csv(blocco, colonne, prima, errori, opzioni)
+    return df.dropna(how='all')
+
+def _leggi_blocco_csv(blocco: bytes, colonne: list, prima: int, errori: list, opzioni: dict) -> pd.DataFrame:
+    """Slow path of _leggi_blocco for blocks with bad lines or quoted fields
+    spanning lines: records are split with the csv module (same quoting
+    rules as pandas), each indexed by the line it starts on."""
+    lettore = csv.reader(io.StringIO(blocco.decode('utf-8'), newline=''), delimiter=';')
+    tenute, numeri, riga = io.StringIO(), [], prima
+    scrittore = csv.writer(tenute, delimiter=';', lineterminator='\n')
+    for campi in lettore:
+        if len(campi) > len(colonne):
+            errori.append((riga, '', ';'.join(campi).strip()[:80], 'campi in eccesso'))
+        elif campi:
+            scrittore.writerow(campi)
+            numeri.append(riga)
+        riga = prima + lettore.line_num
+    if not numeri:
+        return pd.DataFrame(columns=colonne)
+    df = pd.read_csv(io.BytesIO(tenute.getvalue().encode('utf-8')), **opzioni)
+    df.index = np.array(numeri)
+    return df
+
+def _formato_data(valori: pd.Series):
+    """Date format guessed from the first values that have one (None: let pandas infer)."""
+    for v in valori.dropna().astype(str).head(20):
+        formato = guess_datetime_format(v, dayfirst=True)
+        if formato:
+            return formato
+    return None
+
+def _tipi_blocco(blocco: pd.DataFrame, errori: list, formato: str = None) -> pd.DataFrame:
+    """Coerce dates and numbers, reporting the values that do not convert.
+    Rows without a valid date are dropped, bad numbers become NaN."""
+    grezzi = blocco['data']
+    blocco['data'] = pd.to_datetime(grezzi, format=formato, dayfirst=True, errors='coerce')
+    for c in ['quantita', 'spesa']:
+        grezzi_c = blocco[c]
+        blocco[c] = pd.to_numeric(grezzi_c, errors='coerce')
+        for riga, valore in grezzi_c[blocco[c].isna() & grezzi_c.notna()].items():
+            errori.append((riga, c, str(valore), 'numero non valido'))
+    for riga, valore in grezzi[blocco['data'].isna()].items():
+        errori.append((riga, 'data', '' if pd.isna(valore) else str(valore), 'data mancante' if pd.isna(valore) else 'data non valida'))
+    blocco = blocco[blocco['data'].notna()]
+    blocco['prezzo_unitario'] = blocco['spesa'] / blocco['quantita'].replace(0, float('nan'))
+    return blocco
+
+def _unisci_blocchi(blocchi: list) -> pd.DataFrame:
+    """Concatenate the compacted blocks column by column (categoricals get
+    the union of the categories), releasing each block's column as soon as
+    it is copied, then sort by date."""
+    colonne = {}
+    for c in list(blocchi[0].columns):
+        parti = [b.pop(c) for b in blocchi]
+        if isinstance(parti[0].dtype, pd.CategoricalDtype):
+            colonne[c] = pd.Series(union_categoricals(parti, sort_categories=True))
+        else:
+            colonne[c] = pd.concat(parti, ignore_index=True)
+    blocchi.clear()
+    date = colonne['data'].to_numpy()
+    if not pd.Index(date).is_monotonic_increasing:
+        ordine = np.argsort(date, kind='stable')
+        for c in colonne:
+            colonne[c] = colonne[c].take(ordine).reset_index(drop=True)
+    return pd.DataFrame(colonne, copy=False)
+
+def leggi_fornitori(sorgente, byte_blocco: int = BYTE_BLOCCO, max_errori: int = MAX_ERRORI) -> LetturaFornitori:
+    """Stream a supplier CSV (bytes, path or binary file) in blocks of lines.
+
+    Each block is parsed, type-coerced, given its prezzo_unitario, folded
+    into the per-ingredient stats and compacted before the next one is read,
+    so peak memory is the compact result plus one block. Quoted fields may
+    hold ';' and line breaks. Bad values are collected as row-level errors
+    instead of failing the file; raises ValueError if the header lacks a
+    required column."""
+    blocchi_csv = _blocchi(sorgente, byte_blocco)
+    intestazione = next(blocchi_csv)
+    colonne = list(pd.read_csv(io.BytesIO(intestazione), sep=';', nrows=0).columns)
+    mancanti = [c for c in COLONNE_FORNITORI if c not in colonne]
+    if mancanti:
+        raise ValueError(f"colonne mancanti nel CSV fornitori: {', '.join(mancanti)}")
+
+    stats, errori, blocchi, n_errori = StatisticheIncrementali(), [], [], 0
+    prima = 2
+    formato = None   # dal primo blocco, uguale per tutto il file
+    for grezzo in blocchi_csv:
+        errori_b = []
+        blocco = _leggi_blocco(grezzo, colonne, prima, errori_b)
+        formato = formato or _formato_data(blocco['data'])
+        blocco = _tipi_blocco(blocco, errori_b, formato)
+        prima += grezzo.count(b'\n')
+        n_errori += len(errori_b)
+        errori.extend(sorted(errori_b)[:max_errori - len(errori)])
+        if not blocco.empty:
+            stats.aggiorna(blocco)
+            blocchi.append(compatta_fornitori(blocco))
+
+    if blocchi:
+        df = _unisci_blocchi(blocchi)
+    else:
+        df = pd.DataFrame(columns=colonne + ['prezzo_unitario'])
+    errori = pd.DataFrame(errori, columns=['riga', 'colonna', 'valore', 'motivo'])
+    return LetturaFornitori(df, stats.risultato(), errori, n_errori)
+
+def elabora_fornitori(file_bytes: bytes):
+    """LetturaFornitori of the file, or None if it is not a supplier CSV."""
+    try:
+        with misura('leggi_fornitori'):
+            return leggi_fornitori(file_bytes)
+    except ValueError:   # intestazione mancante o illeggibile
+        return None
+
+# ── INGESTIONE INCREMENTALE ───────────────────────────────────────────────────
+
+@dataclass
+class StatoGiornaliero:
+    """A processed daily CSV plus the fingerprint of the bytes it came from."""
+    impronta:    str
+    n_bytes:     int
+    df:          pd.DataFrame
+    df_dist:     pd.DataFrame
+    ingred_cols: list
+
+def carica_stato(file_bytes: bytes) -> StatoGiornaliero:
+    return StatoGiornaliero(impronta(file_bytes), len(file_bytes), *elabora_giornaliero(file_bytes))
+
+def estende(stato: StatoGiornaliero, file_bytes: bytes) -> bool:
+    """True if `file_bytes` is the already processed file plus whole new lines."""
+    n = stato.n_bytes
+    if len(file_bytes) <= n:
+        return False
+    a_capo = file_bytes[n - 1:n] == b'\n' or file_bytes[n:n + 1] in (b'\n', b'\r')
+    return a_capo and impronta(file_bytes[:n]) == stato.impronta
+
+def estendi_giornaliero(stato: StatoGiornaliero, file_bytes: bytes):
+    """Merge the rows appended after `stato` into the processed frames.
+
+    Only the new lines are parsed. Cost distribution is recomputed from the
+    earliest restock interval that can contain a new day: per ingredient, the
+    last restock not after the first new date in the same year (intervals
+    never cross a year boundary). Everything before stays as it was.
+    None when the file is not an extension of `stato` (load it in full)."""
+    if not estende(stato, file_bytes):
+        return None
+
+    intestazione = file_bytes[:file_bytes.index(b'\n') + 1]
+    nuovi = leggi_giornaliero(intestazione + file_bytes[stato.n_bytes:])
+    df_old, dist_old, ingred_cols = stato.df, stato.df_dist, stato.ingred_cols
+    if nuovi.empty:
+        return StatoGiornaliero(impronta(file_bytes), len(file_bytes), df_old, dist_old, ingred_cols)
+
+    # Inizio del ricalcolo per ogni ingrediente
+    t0 = nuovi['data'].to_numpy(dtype='datetime64[ns]').min()
+    date_old = df_old['data'].to_numpy(dtype='datetime64[ns]')
+    i0 = np.searchsorted(date_old, t0.astype('datetime64[Y]').astype('datetime64[ns]'), side='left')
+    i1 = np.searchsorted(date_old, t0, side='right')
+    X = df_old[ingred_cols].to_numpy(dtype=float)[i0:i1]
+    ultimo = np.where(X > 0, np.arange(i0, i1)[:, None], -1).max(axis=0, initial=-1)
+    taglio = np.where(ultimo >= 0, date_old[np.maximum(ultimo, 0)], t0)
+    k = np.searchsorted(date_old, taglio.min() if len(taglio) else t0, side='left')
+
+    # Coda da ricalcolare: righe vecchie dal taglio in poi + righe nuove
+    grezze = [c for c in df_old.columns if c in nuovi.columns]
+    numeriche = [c for c in grezze if c != 'data']
+    coda = pd.concat([a_float64(df_old.iloc[k:][grezze], numeriche), nuovi[grezze]], ignore_index=True)
+    dist_prec = np.vstack([dist_old.iloc[k:].to_numpy(dtype=float), np.zeros((len(nuovi), len(ingred_cols)))])
+    ordine = np.argsort(coda['data'].to_numpy(), kind='stable')
+    coda = coda.iloc[ordine].reset_index(drop=True)
+    dist_prec = dist_prec[ordine]
+
+    prima_del_taglio = coda['data'].to_numpy(dtype='datetime64[ns]')[:, None] < taglio[None, :]
+    dist_coda = pd.DataFrame(
+        np.where(prima_del_taglio, dist_prec, distribuisci_costi(coda, ingred_cols).to_numpy()),
+        index=coda.index, columns=ingred_cols,
+    )
+    coda = aggiungi_derivate(coda, dist_coda)
+
+    df = pd.concat([a_float64(df_old.iloc[:k], numeriche), coda[df_old.columns]], ignore_index=True)
+    df_dist = pd.concat([dist_old.iloc[:k], dist_coda], ignore_index=True)
+    df = compatta_giornaliero(df)
+    return StatoGiornaliero(impronta(file_bytes), len(file_bytes), df, df_dist, ingred_cols)
@@ -0,0 +1,26 @@
+# Pokè To Go! – colonne dei CSV
+
+POKE_COLS     = ['poke_reglular', 'poke_maxi', 'poke_baby', 'fruit_bowl', 'poke_veggy']
+EXTRA_COLS    = ['Avocado_venduto', 'Feta_venduto', 'Philad_venduto', 'Gomawak_venduto']
+BIBITE_COLS   = ['Acqua nat', 'Acqua gas', 'Coca cola', 'Coca zero', 'corona', 'ichnusa', 'fanta', 'Estathe limone', 'Estathe pesca']
+SORBETTI_COLS = ['Sorbetto limone', 'Sorbetto mela', 'Sorbetto mango']
+SORB_PZ_COLS  = ['Sorbetti_venduti']
+COST_COLS     = ['Dipendente']
+EXCLUDE_COLS  = set(POKE_COLS + EXTRA_COLS + BIBITE_COLS + SORBETTI_COLS + SORB_PZ_COLS + COST_COLS + ['data', 'fatturato'])
+
+CATEGORIE_ING = {
+    'Proteine': ['salmone', 'tonno', 'Tonno Saku', 'Polpo', 'Gamberetti', 'Pollo Nuggets', 'Pollo fette', 'Feta', 'Formaggio spalmabile', 'Tofu', 'Uova'],
+    'Verdure':  ['edamame', 'ceci', 'mais', 'carote', 'cetrioli', 'pomodori', 'Cavolo viola', 'zucchine', 'cipolle', 'Goma wakame'],
+    'Frutta':   ['Avocado', 'Avo Hass', 'mango', 'Lime', 'uva', 'Mele', 'melone', 'Kiwi', 'Ananas', 'Anguria'],
+    'Base':     ['iceberg', 'riso_sushi', 'riso_nero', 'Riso integrale'],
+    'Topping':  ['Sesamo nero', 'Sesamo bianco', 'Mandorle', 'nocciole', 'Cipolle croccanti', 'Pistacchio', 'Sale grosso'],
+    'Salse':    ['Salsa soya', 'Olio Evo', 'Teriyaki', 'Maionese', 'yogurt', 'poke', 'Ponzu', 'Sriracha'],
+}
+ALL_INGRED_COLS = sum(CATEGORIE_ING.values(), [])
+
+ALL_CSV_COLS = (
+    ['data', 'fatturato', 'Dipendente']
+    + POKE_COLS + EXTRA_COLS + SORB_PZ_COLS
+    + BIBITE_COLS + SORBETTI_COLS
+    + ALL_INGRED_COLS
+)
@@ -0,0 +1,82 @@
+# Pokè To Go! – distribuzione dei costi ingredienti
+
+import numpy as np
+import pandas as pd
+
+def distribuisci_costi(df: pd.DataFrame, ingred_cols: list) -> pd.DataFrame:
+    """Spread each restock cost evenly across days until the next restock,
+    stopping at year boundaries.
+
+    Vectorized: every restock of every ingredient becomes a [start, end)
+    interval of row positions found with searchsorted on the sorted dates,
+    then the per-day share is broadcast over the interval in one pass."""
+    n_col = len(ingred_cols)
+    out = np.zeros((len(df), n_col))
+    date_ns = df['data'].to_numpy(dtype='datetime64[ns]')
+    valide  = ~np.isnat(date_ns)
+    ordine  = np.argsort(date_ns, kind='stable')[:valide.sum()]   # NaT in coda, esclusi
+    n = len(ordine)
+    if n == 0 or n_col == 0:
+        return pd.DataFrame(out, index=df.index, columns=ingred_cols)
+
+    ds = date_ns[ordine]
+    X  = df[ingred_cols].to_numpy(dtype=float)[ordine]
+
+    # Rifornimenti ordinati per colonna e poi per data
+    c, r = np.nonzero((X > 0).T)
+    val  = X[r, c]
+    a    = ds[r]
+    anno_a = a.astype('datetime64[Y]')
+    fine_anno = (anno_a + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')
+
+    # Rifornimento successivo dello stesso ingrediente, se nello stesso anno
+    ha_succ = np.zeros(len(r), dtype=bool)
+    ha_succ[:-1] = c[1:] == c[:-1]
+    b = np.empty_like(a)
+    b[:-1] = a[1:]
+    stesso_anno = ha_succ & (b.astype('datetime64[Y]') == anno_a)
+
+    inizio = np.searchsorted(ds, a, side='left')
+    fine   = np.where(
+        stesso_anno,
+        np.searchsorted(ds, b, side='left'),
+        np.searchsorted(ds, fine_anno.astype('datetime64[ns]'), side='right'),
+    )
+    giorni = fine - inizio
+    ok = giorni > 0
+    c, inizio, fine, quota = c[ok], inizio[ok], fine[ok], val[ok] / giorni[ok]
+
+    # Gli intervalli di uno stesso ingrediente sono disgiunti: copertura con
+    # somma cumulata intera, quota presa dall'ultimo inizio intervallo (esatta)
+    cop = np.zeros((n + 1, n_col), dtype=np.int32)
+    np.add.at(cop, (inizio, c), 1)
+    np.add.at(cop, (fine, c), -1)
+    cop = cop.cumsum(axis=0)[:n]
+    ultimo = np.full((n, n_col), -1, dtype=np.int64)
+    ultimo[inizio, c] = inizio
+    ultimo = np.maximum.accumulate(ultimo, axis=0)
+    Q = np.zeros((n, n_col))
+    Q[inizio, c] = quota
+    out[ordine] = np.where(cop > 0, Q[np.maximum(ultimo, 0), np.arange(n_col)], 0.0)
+    return pd.DataFrame(out, index=df.index, columns=ingred_cols)
+
+def distribuisci_costi_iterativo(df: pd.DataFrame, ingred_cols: list) -> pd.DataFrame:
+    """Reference (slow) implementation of distribuisci_costi, one boolean
+    mask per restock. Kept to verify the vectorized engine."""
+    dist = pd.DataFrame(0.0, index=df.index, columns=ingred_cols)
+    for ing in ingred_cols:
+        s = df[['data', ing]].dropna()
+        s = s[s[ing] > 0].sort_values('data')
+        for i in range(len(s)):
+            a, val = s.iloc[i]['data'], s.iloc[i][ing]
+            fine_anno = pd.Timestamp(int(a.year), 12, 31)
+            if i < len(s) - 1:
+                b = s.iloc[i + 1]['data']
+                mask = (df['data'] >= a) & (df['data'] < b) if a.year == b.year \
+                       else (df['data'] >= a) & (df['data'] <= fine_anno)
+            else:
+                mask = (df['data'] >= a) & (df['data'] <= fine_anno)
+            n = mask.sum()
+            if n > 0:
+                dist.loc[mask, ing] += val / n
+    return dist
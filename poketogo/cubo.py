@@ -0,0 +1,115 @@
+# Pokè To Go! – cubo di aggregati (anno × mese × giorno della settimana × aperto)
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from poketogo.periodi import ALLINEAMENTI, giorno_stagione
+
+MISURE = ['fatturato', 'utile_lordo', 'poke_totali', 'ing_dist', 'Dipendente', 'bib_sorb_costo', 'pct_ingredienti']
+
+@dataclass
+class Cubo:
+    """Aggregates of the daily frame, built once per dataset.
+
+    celle: sums of MISURE plus 'giorni' (days) and 'n_pct' (days with a
+    pct_ingredienti) for every (anno, mese, weekday, aperto) cell; aperto
+    is fatturato > 0. Year totals come from the cells, so they cost the
+    same however long the history is. Day-level windows (last n open days,
+    season to date) are located by binary search on the open days of one
+    year and summed over that year only. Windows are given as season-relative
+    days, so a window of one year selects the matching days of another,
+    by date or by weekday."""
+    celle: pd.DataFrame
+    ultime_date: pd.Series                  # ultima data registrata per anno
+    _per_anno: dict = field(repr=False)      # (anno, solo_aperti) → somme delle celle
+    _valori: np.ndarray = field(repr=False)  # giorni aperti × (MISURE + n_pct), in ordine di data
+    _giorni: dict = field(repr=False)        # allineamento → giorno della stagione (periodi.giorno_stagione)
+    _date: np.ndarray = field(repr=False)
+    _pos: dict = field(repr=False)           # anno → (prima, ultima + 1) riga in _valori
+
+    @property
+    def anni(self) -> list:
+        return sorted(self.ultime_date.index)
+
+    def totali(self, anno: int, solo_aperti: bool = False) -> dict:
+        """Sums of MISURE over a year, with 'giorni' and the mean pct_ingredienti."""
+        return _riepilogo(self._per_anno.get((anno, solo_aperti), np.zeros(len(MISURE) + 2)))
+
+    def per_anno(self) -> pd.DataFrame:
+        """Year × (MISURE, giorni, n_pct) over all days, plus giorni_aperti and
+        pct_ingredienti (mean over open days)."""
+        tutti = self.celle.groupby(level='anno').sum()
+        aperti = self.celle[self.celle.index.get_level_values('aperto')].groupby(level='anno').sum()
+        tutti['giorni_aperti'] = aperti['giorni'].reindex(tutti.index, fill_value=0)
+        tutti['pct_ingredienti'] = (aperti['pct_ingredienti'] / aperti['n_pct']).reindex(tutti.index)
+        return tutti
+
+    def ultimi_aperti(self, anno: int, n: int, allinea: str = 'calendario') -> tuple:
+        """(totals, first day, last day) of the last `n` open days of `anno`,
+        days as season-relative numbers under `allinea`."""
+        i0, i1 = self._pos.get(anno, (0, 0))
+        i0 = max(i0, i1 - n)
+        if i0 == i1:
+            return _riepilogo(np.zeros(len(MISURE) + 2)), None, None
+        giorni = self._giorni[allinea]
+        return self._somma(i0, i1), int(giorni[i0]), int(giorni[i1 - 1])
+
+    def aperti_tra(self, anno: int, da: int = None, a: int = None, allinea: str = 'calendario') -> dict:
+        """Totals of the open days of `anno` whose season-relative day is in [da, a]."""
+        i0, i1 = self._pos.get(anno, (0, 0))
+        giorni = self._giorni[allinea][i0:i1]
+        j0 = i0 + (np.searchsorted(giorni, da, 'left') if da is not None else 0)
+        j1 = i0 + (np.searchsorted(giorni, a, 'right') if a is not None else i1 - i0)
+        return self._somma(j0, j1)
+
+    def ultima_data(self, anno: int, solo_aperti: bool = False):
+        i0, i1 = self._pos.get(anno, (0, 0))
+        if solo_aperti:
+            return pd.Timestamp(self._date[i1 - 1]) if i1 > i0 else pd.NaT
+        return self.ultime_date.get(anno, pd.NaT)
+
+    def _somma(self, i0, i1) -> dict:
+        v = self._valori[i0:i1]
+        return _riepilogo(np.concatenate([v.sum(axis=0), [len(v)]]))
+
+def _riepilogo(somme) -> dict:
+    out = dict(zip(MISURE + ['n_pct', 'giorni'], somme))
+    out['giorni'] = int(out['giorni'])
+    out['pct_ingredienti'] = out['pct_ingredienti'] / out['n_pct'] if out['n_pct'] else 0.0
+    return out
+
+def costruisci_cubo(df: pd.DataFrame) -> Cubo:
+    d = df[df['data'].notna()]
+    anno = d['data'].dt.year.to_numpy()
+    aperto = (d['fatturato'] > 0).to_numpy()
+    misure = d[MISURE].to_numpy(dtype=float, na_value=np.nan)
+    n_pct = ~np.isnan(misure[:, MISURE.index('pct_ingredienti')])
+    valori = np.column_stack([np.nan_to_num(misure), n_pct, np.ones(len(d))])
+
+    chiavi = pd.MultiIndex.from_arrays(
+        [anno, d['data'].dt.month.to_numpy(), d['data'].dt.weekday.to_numpy(), aperto],
+        names=['anno', 'mese', 'weekday', 'aperto'],
+    )
+    celle = pd.DataFrame(valori, index=chiavi, columns=MISURE + ['n_pct', 'giorni']).groupby(level=[0, 1, 2, 3]).sum()
+    celle['giorni'] = celle['giorni'].astype(int)
+    per_anno = {
+        (int(a), solo_aperti): r.to_numpy(dtype=float)
+        for solo_aperti, c in ((False, celle), (True, celle[celle.index.get_level_values('aperto')]))
+        for a, r in c.groupby(level='anno').sum().iterrows()
+    }
+    ultime_date = d.groupby(anno)['data'].max()
+
+    # Giorni aperti ordinati per data: ogni anno è un blocco contiguo, giorni della stagione crescenti
+    ordine = np.lexsort((d['data'].to_numpy(), anno))
+    ordine = ordine[aperto[ordine]]
+    anni_ap = anno[ordine]
+    cambi = np.flatnonzero(np.diff(anni_ap)) + 1
+    inizi, fini = np.r_[0, cambi], np.r_[cambi, len(anni_ap)]
+    pos = {int(anni_ap[i]): (int(i), int(j)) for i, j in zip(inizi, fini)} if len(anni_ap) else {}
+    date = d['data'].to_numpy()[ordine]
+    return Cubo(
+        celle, ultime_date, per_anno, valori[ordine, :-1],
+        {a: giorno_stagione(date, a) for a in ALLINEAMENTI}, date, pos,
+    )
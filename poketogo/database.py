@@ -0,0 +1,348 @@
+# Pokè To Go! – database SQLite locale: storico di tutti i negozi interrogato in SQL
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from poketogo.caricamento import LetturaFornitori, StatoGiornaliero
+from poketogo.memoria import CONTEGGI, densifica
+from poketogo.negozi import consolida
+
+# POKETOGO_DB: file del database; se non è impostato il backend è disattivato
+PERCORSO = os.environ.get('POKETOGO_DB')
+VERSIONE = 4   # 2: righe identificate da (negozio, impronta del file); 3: colonne con nome interno;
+              # 4: costi distribuiti float64, conteggi interi solo senza vuoti
+MAX_VOCI = 20  # file tenuti per negozio e tipo, i primi importati vengono eliminati
+
+# Ogni file importato resta sotto la propria impronta: sessioni con file
+# diversi per lo stesso negozio leggono ciascuna le proprie righe.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dataset (
+    negozio  TEXT NOT NULL,
+    tipo     TEXT NOT NULL,          -- 'giornaliero' | 'fornitori'
+    impronta TEXT NOT NULL,          -- del file importato
+    meta     TEXT NOT NULL,          -- JSON: colonne e tipi del frame, ingredienti
+    usato    REAL NOT NULL,          -- importazione, per la potatura
+    PRIMARY KEY (negozio, tipo, impronta)
+);
+CREATE TABLE IF NOT EXISTS giornaliero (
+    negozio  TEXT NOT NULL,
+    impronta TEXT NOT NULL,
+    riga     INTEGER NOT NULL,       -- posizione nel frame elaborato del file
+    data     TEXT NOT NULL           -- AAAA-MM-GG; le altre colonne sono aggiunte all'importazione
+);
+-- Nomi delle colonne di giornaliero: c<rowid>. SQLite confronta i nomi di
+-- colonna senza distinguere maiuscole, i CSV sì ('Salmone' e 'salmone').
+CREATE TABLE IF NOT EXISTS colonne (
+    nome TEXT PRIMARY KEY            -- colonna del frame, maiuscole comprese
+);
+CREATE INDEX IF NOT EXISTS giornaliero_negozio_impronta_data ON giornaliero (negozio, impronta, data);
+CREATE TABLE IF NOT EXISTS costi_distribuiti (
+    negozio     TEXT NOT NULL,
+    impronta    TEXT NOT NULL,
+    riga        INTEGER NOT NULL,
+    data        TEXT NOT NULL,
+    ingrediente TEXT NOT NULL,
+    costo       REAL                 -- solo i costi diversi da zero
+);
+CREATE INDEX IF NOT EXISTS costi_distribuiti_negozio_impronta_data ON costi_distribuiti (negozio, impronta, data);
+CREATE TABLE IF NOT EXISTS fornitori (
+    negozio         TEXT NOT NULL,
+    impronta        TEXT NOT NULL,
+    riga            INTEGER NOT NULL,
+    data            TEXT NOT NULL,
+    ingrediente     TEXT,
+    fornitore       TEXT,
+    quantita        REAL,
+    unita           TEXT,
+    spesa           REAL,
+    prezzo_unitario REAL
+);
+CREATE INDEX IF NOT EXISTS fornitori_ingrediente_fornitore_data ON fornitori (ingrediente, fornitore, data);
+CREATE INDEX IF NOT EXISTS fornitori_negozio_impronta_data ON fornitori (negozio, impronta, data);
+"""
+TABELLE = ('dataset', 'giornaliero', 'colonne', 'costi_distribuiti', 'fornitori')
+
+COLONNE_FORNITORI = ['data', 'ingrediente', 'fornitore', 'quantita', 'unita', 'spesa', 'prezzo_unitario']
+
+def attivo() -> bool:
+    return PERCORSO is not None
+
+_preparati = set()   # database con schema già verificato da questo processo
+_lock_schema = threading.Lock()
+
+def _prepara(con, percorso: str):
+    """Schema and WAL mode, once per process and database file."""
+    with _lock_schema:
+        if percorso in _preparati:
+            return
+        con.execute('PRAGMA journal_mode=WAL')   # letture delle altre sessioni durante un'importazione
+        if con.execute('PRAGMA user_version').fetchone()[0] != VERSIONE:
+            # Schema di una versione precedente: i dati vengono reimportati
+            con.executescript(''.join(f'DROP TABLE IF EXISTS {t};' for t in TABELLE) + f'PRAGMA user_version = {VERSIONE};')
+        con.executescript(SCHEMA)
+        _preparati.add(percorso)
+
+@contextmanager
+def connessione(percorso=None):
+    """Connection to the database (schema created on first use), committed
+    on success and closed on exit. One per call: safe across threads."""
+    percorso = os.path.abspath(percorso or PERCORSO)
+    with closing(sqlite3.connect(percorso, timeout=30)) as con:
+        _prepara(con, percorso)
+        with con:
+            yield con
+
+def _q(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+def _iso(date: pd.Series) -> np.ndarray:
+    return date.dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+
+def _valori(s: pd.Series) -> np.ndarray:
+    """Column as Python values for sqlite3: float with None for missing, text as str."""
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        v = s.to_numpy(dtype=float, na_value=np.nan).astype(object)
+        v[pd.isna(s).to_numpy()] = None
+        return v
+    return s.astype(object).where(s.notna(), None).to_numpy()
+
+def _inserisci(con, tabella: str, colonne: dict):
+    """Insert equal-length value arrays {colonna: array} as rows of `tabella`."""
+    nomi = list(colonne)
+    sql = f"INSERT INTO {tabella} ({', '.join(map(_q, nomi))}) VALUES ({', '.join('?' * len(nomi))})"
+    con.executemany(sql, zip(*colonne.values()))
+
+def _meta(con, negozio: str, tipo: str, impronta: str):
+    """The stored file's meta, None if (negozio, impronta) was never imported."""
+    r = con.execute("SELECT meta FROM dataset WHERE negozio = ? AND tipo = ? AND impronta = ?",
+                    (negozio, tipo, impronta)).fetchone()
+    return None if r is None else json.loads(r[0])
+
+def _interne(con, colonne=()) -> dict:
+    """{colonna del frame: colonna di giornaliero}, registering `colonne`
+    not seen before."""
+    con.executemany("INSERT OR IGNORE INTO colonne (nome) VALUES (?)", [(c,) for c in colonne])
+    return {nome: f'c{rowid}' for rowid, nome in con.execute("SELECT rowid, nome FROM colonne")}
+
+def _presente(con, negozio: str, tipo: str, impronta: str) -> bool:
+    """True if the file is already stored (a read: nothing is written)."""
+    return con.execute("SELECT 1 FROM dataset WHERE negozio = ? AND tipo = ? AND impronta = ?",
+                       (negozio, tipo, impronta)).fetchone() is not None
+
+def _segna(con, negozio: str, tipo: str, impronta: str, meta: dict):
+    con.execute("INSERT OR REPLACE INTO dataset VALUES (?, ?, ?, ?, ?)",
+                (negozio, tipo, impronta, json.dumps(meta), time.time()))
+    # Oltre MAX_VOCI file per negozio: via i primi importati, con le loro righe
+    vecchie = con.execute(
+        "SELECT impronta FROM dataset WHERE negozio = ? AND tipo = ? ORDER BY usato DESC LIMIT -1 OFFSET ?",
+        (negozio, tipo, MAX_VOCI),
+    ).fetchall()
+    tabelle = ('giornaliero', 'costi_distribuiti') if tipo == 'giornaliero' else ('fornitori',)
+    for (vecchia,) in vecchie:
+        for t in tabelle:
+            con.execute(f"DELETE FROM {t} WHERE negozio = ? AND impronta = ?", (negozio, vecchia))
+        con.execute("DELETE FROM dataset WHERE negozio = ? AND tipo = ? AND impronta = ?", (negozio, tipo, vecchia))
+
+# ── IMPORTAZIONE ──────────────────────────────────────────────────────────────
+
+def importa_giornaliero(negozio: str, stato: StatoGiornaliero) -> bool:
+    """Store a processed daily file (rows and distributed costs) under its
+    fingerprint. False if that file is already stored for the store."""
+    with connessione() as con:
+        if _presente(con, negozio, 'giornaliero', stato.impronta):
+            return False
+        df = densifica(stato.df)
+        colonne = [c for c in df.columns if c != 'data']
+        interne = _interne(con, colonne)
+        presenti = {r[1] for r in con.execute("PRAGMA table_info(giornaliero)")}
+        for c in colonne:
+            if interne[c] not in presenti:
+                con.execute(f"ALTER TABLE giornaliero ADD COLUMN {interne[c]}")
+
+        date = _iso(df['data'])
+        chiave = {'negozio': [negozio] * len(df), 'impronta': [stato.impronta] * len(df)}
+        _inserisci(con, 'giornaliero', {
+            **chiave, 'riga': range(len(df)), 'data': date,
+            **{interne[c]: _valori(df[c]) for c in colonne},
+        })
+        # Costi distribuiti in forma lunga: una riga per (giorno, ingrediente) con costo
+        X = stato.df_dist.to_numpy(dtype=float)
+        righe, ing = np.nonzero(X != 0)
+        costi = X[righe, ing].astype(object)
+        costi[np.isnan(X[righe, ing])] = None
+        _inserisci(con, 'costi_distribuiti', {
+            'negozio': [negozio] * len(righe), 'impronta': [stato.impronta] * len(righe),
+            'riga': righe.tolist(), 'data': date[righe],
+            'ingrediente': np.asarray(stato.df_dist.columns, dtype=object)[ing], 'costo': costi,
+        })
+        _segna(con, negozio, 'giornaliero', stato.impronta, {
+            'colonne': {c: str(t) for c, t in df.dtypes.items()},
+            'dist': list(stato.df_dist.columns), 'tipo_dist': str(stato.df_dist.dtypes.iloc[0]) if stato.df_dist.shape[1] else 'float64',
+            'ingred_cols': stato.ingred_cols,
+        })
+    return True
+
+def importa_fornitori(negozio: str, chiave: str, lettura: LetturaFornitori) -> bool:
+    """Store a supplier file's valid rows under `chiave`, the file fingerprint."""
+    with connessione() as con:
+        if _presente(con, negozio, 'fornitori', chiave):
+            return False
+        df = lettura.df
+        _inserisci(con, 'fornitori', {
+            'negozio': [negozio] * len(df), 'impronta': [chiave] * len(df),
+            'riga': range(len(df)), 'data': _iso(df['data']),
+            **{c: _valori(df[c]) for c in COLONNE_FORNITORI[1:] if c in df.columns},
+        })
+        _segna(con, negozio, 'fornitori', chiave, {})
+    return True
+
+# ── INTERROGAZIONI ────────────────────────────────────────────────────────────
+
+# Le interrogazioni ricevono {negozio: impronta} dei file della vista, nell'ordine dei negozi
+
+def _in(negozi: dict) -> tuple:
+    """WHERE clause and parameters selecting the given files' rows."""
+    return ' OR '.join(['(negozio = ? AND impronta = ?)'] * len(negozi)), [x for nk in negozi.items() for x in nk]
+
+def _periodo_negozio(con, negozio: str, impronta: str, inizio: str, fine: str) -> StatoGiornaliero:
+    meta = _meta(con, negozio, 'giornaliero', impronta)
+    if meta is None:
+        raise KeyError(f"file non importato nel database: {negozio} ({impronta})")
+    tipi = meta['colonne']
+    interne = {**_interne(con), 'data': 'data'}
+    righe = con.execute(
+        f"SELECT riga, {', '.join(interne[c] for c in tipi)} FROM giornaliero "
+        f"WHERE negozio = ? AND impronta = ? AND data BETWEEN ? AND ? ORDER BY riga",
+        (negozio, impronta, inizio, fine),
+    ).fetchall()
+    valori = list(zip(*righe)) if righe else [()] * (len(tipi) + 1)
+    df = pd.DataFrame({c: pd.Series(v, dtype=object) for c, v in zip(tipi, valori[1:])})
+    df['data'] = pd.to_datetime(df['data'], format='%Y-%m-%d')
+    df = df.astype(tipi)
+
+    # Le righe del periodo sono contigue nel frame del negozio: stesso indice
+    r0 = righe[0][0] if righe else 0
+    df.index = pd.RangeIndex(r0, r0 + len(df))
+    dist = np.zeros((len(df), len(meta['dist'])))
+    if righe:
+        pos = {c: j for j, c in enumerate(meta['dist'])}
+        for riga, ing, costo in con.execute(
+            "SELECT riga, ingrediente, costo FROM costi_distribuiti "
+            "WHERE negozio = ? AND impronta = ? AND data BETWEEN ? AND ?",
+            (negozio, impronta, inizio, fine),
+        ):
+            dist[riga - r0, pos[ing]] = np.nan if costo is None else costo
+    df_dist = pd.DataFrame(dist, index=df.index, columns=meta['dist']).astype(meta['tipo_dist'])
+    return StatoGiornaliero(impronta, 0, df, df_dist, meta['ingred_cols'])
+
+def periodo(negozi: dict, inizio, fine) -> tuple:
+    """(df, df_dist) of the days inizio..fine of the files {negozio: impronta},
+    read through the (negozio, impronta, data) index: one store's rows as in
+    its processed frame, or several stores summed day by day as in
+    consolida(). Row labels are those of the full frame."""
+    inizio, fine = pd.Timestamp(inizio).strftime('%Y-%m-%d'), pd.Timestamp(fine).strftime('%Y-%m-%d')
+    with connessione() as con:
+        stati = {n: _periodo_negozio(con, n, k, inizio, fine) for n, k in negozi.items()}
+        if len(stati) == 1:
+            s, = stati.values()
+            return s.df, s.df_dist
+        dove, params = _in(negozi)
+        prima, = con.execute(f"SELECT COUNT(DISTINCT data) FROM giornaliero WHERE ({dove}) AND data < ?",
+                             (*params, inizio)).fetchone()
+    df, df_dist, _ = consolida(stati)
+    df.index = df_dist.index = pd.RangeIndex(prima, prima + len(df))
+    # I conteggi restano interi se lo sono in ogni negozio, come nel frame consolidato completo
+    interi = {
+        c: 'Int32' if all(str(s.df[c].dtype) == 'Int32' for s in stati.values() if c in s.df.columns) else 'float64'
+        for c in CONTEGGI if c in df.columns
+    }
+    return df.astype(interi), df_dist
+
+def _giorni(negozi: dict, c: dict) -> str:
+    """One row per day of the view: the store's rows, or the stores summed by
+    date. c: the internal column names (_interne)."""
+    dove, _ = _in(negozi)
+    if len(negozi) == 1:
+        return f"""
+            SELECT {c['anno']} AS anno, {c['fatturato']} AS fatturato, {c['utile_lordo']} AS utile_lordo,
+                   {c['poke_totali']} AS poke_totali, {c['pct_ingredienti']} AS pct_ingredienti
+            FROM giornaliero WHERE {dove}
+        """
+    return f"""
+        SELECT anno, fatturato, fatturato - ing - bib - dip AS utile_lordo, poke_totali,
+               CASE WHEN fatturato > 0 THEN ing / fatturato * 100 ELSE 0 END AS pct_ingredienti
+        FROM (SELECT MIN({c['anno']}) AS anno, SUM({c['fatturato']}) AS fatturato, TOTAL({c['ing_dist']}) AS ing,
+                     TOTAL({c['bib_sorb_costo']}) AS bib, TOTAL({c['Dipendente']}) AS dip,
+                     TOTAL({c['poke_totali']}) AS poke_totali
+              FROM giornaliero WHERE {dove} GROUP BY data)
+    """
+
+def confronto_stagioni(negozi: dict, costi_fissi_gg: float = 0.0) -> pd.DataFrame:
+    """kpi.confronto_stagioni() as one GROUP BY anno over the days of the
+    files {negozio: impronta}."""
+    with connessione() as con:
+        giorni = _giorni(negozi, _interne(con))
+        out = pd.read_sql_query(f"""
+            SELECT anno,
+                   TOTAL(fatturato) AS fatturato, TOTAL(utile_lordo) AS utile_lordo, TOTAL(poke_totali) AS poke,
+                   AVG(CASE WHEN fatturato > 0 THEN pct_ingredienti END) AS pct_ingredienti,
+                   SUM(fatturato > 0) AS giorni_aperti
+            FROM ({giorni}) GROUP BY anno ORDER BY anno
+        """, con, params=_in(negozi)[1], index_col='anno', dtype={'pct_ingredienti': 'float64'})
+    out['giorni_aperti'] = out['giorni_aperti'].fillna(0).astype(int)
+    out['utile_netto'] = out['utile_lordo'] - costi_fissi_gg * out['giorni_aperti']
+    return out
+
+def statistiche_ingredienti(negozi: dict) -> pd.DataFrame:
+    """fornitori.statistiche_ingredienti() over the supplier files
+    {negozio: impronta}, computed in SQL. The last order is the latest date;
+    ties go to the later store in `negozi`, then to the later row (as after
+    unisci_fornitori)."""
+    ordine = ', '.join('(?, ?, ?)' for _ in negozi)
+    with connessione() as con:
+        stats = pd.read_sql_query(f"""
+            WITH ordine (negozio, impronta, pos) AS (VALUES {ordine}),
+            righe AS (
+                SELECT f.*, o.pos FROM fornitori f JOIN ordine o USING (negozio, impronta)
+                WHERE ingrediente IS NOT NULL
+            ),
+            validi AS (SELECT * FROM righe WHERE prezzo_unitario IS NOT NULL),
+            -- Varianza dagli scarti dalla media, non da somma dei quadrati meno quadrato
+            -- della somma: resta precisa anche con prezzi alti e poco dispersi
+            medie AS (
+                SELECT ingrediente, COUNT(*) AS n_ordini, m.media, MIN(prezzo_unitario) AS minimo,
+                       TOTAL((prezzo_unitario - m.media) * (prezzo_unitario - m.media)) / (COUNT(*) - 1) AS var
+                FROM validi JOIN (
+                    SELECT ingrediente, AVG(prezzo_unitario) AS media FROM validi GROUP BY ingrediente
+                ) m USING (ingrediente)
+                GROUP BY ingrediente
+            ),
+            -- Righe di un negozio ordinate per data: l'ultimo ordine è la riga più alta
+            ultimi_negozio AS (
+                SELECT ingrediente, pos, MAX(riga), data, prezzo_unitario, fornitore, unita
+                FROM validi GROUP BY ingrediente, pos
+            ),
+            ultimi AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY ingrediente ORDER BY data DESC, pos DESC) AS n
+                FROM ultimi_negozio
+            ),
+            conteggi AS (SELECT ingrediente, COUNT(DISTINCT fornitore) AS n_fornitori FROM righe GROUP BY ingrediente)
+            SELECT c.ingrediente, COALESCE(m.n_ordini, 0) AS n_ordini, m.media, m.var, m.minimo,
+                   u.prezzo_unitario AS ultimo_prezzo, u.fornitore AS ultimo_fornitore,
+                   u.data AS ultima_data, u.unita, c.n_fornitori
+            FROM conteggi c
+            LEFT JOIN medie m USING (ingrediente)
+            LEFT JOIN ultimi u ON u.ingrediente = c.ingrediente AND u.n = 1
+            ORDER BY c.ingrediente
+        """, con, params=[x for i, nk in enumerate(negozi.items()) for x in (*nk, i)], index_col='ingrediente',
+            dtype={'media': 'float64', 'var': 'float64', 'minimo': 'float64', 'ultimo_prezzo': 'float64'})
+    stats.insert(2, 'std', np.sqrt(stats.pop('var')))
+    stats['ultima_data'] = pd.to_datetime(stats['ultima_data'], format='%Y-%m-%d')
+    return stats
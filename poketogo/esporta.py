@@ -0,0 +1,83 @@
+# Pokè To Go! – export dell'analisi del periodo
+
+import gzip
+import io
+
+import pandas as pd
+
+from poketogo.memoria import densifica
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:   # senza pyarrow niente export parquet
+    pa = pq = None
+
+RIGHE_BLOCCO = 20_000   # righe serializzate per volta dallo scrittore a blocchi
+
+# formato → (estensione, MIME)
+FORMATI = {
+    'csv':     ('csv',     'text/csv'),
+    'csv.gz':  ('csv.gz',  'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+def formati_disponibili() -> list:
+    return [f for f in FORMATI if f != 'parquet' or pq is not None]
+
+def blocchi_righe(df: pd.DataFrame, righe: int = RIGHE_BLOCCO):
+    """Row slices of `df` (views, not copies) for the block writer; an empty
+    frame still gives one block, so the CSV keeps its header."""
+    for i in range(0, max(len(df), 1), righe):
+        yield df.iloc[i:i + righe]
+
+def scrivi_blocchi(blocchi, destinazione, formato: str = 'csv') -> int:
+    """Write an iterable of frames with the same columns (row slices of one
+    selection, one frame per store or per year...) to a binary file object,
+    one block at a time: the whole export is never held as one string.
+    CSV is the dashboard's (';', no index, UTF-8); gzip output is
+    byte-for-byte reproducible. Returns the rows written."""
+    if formato not in FORMATI:
+        raise ValueError(f"formato deve essere uno di {tuple(FORMATI)}")
+    if formato == 'parquet':
+        return _scrivi_parquet(blocchi, destinazione)
+    righe = 0
+    # mtime=0: stesso contenuto → stessi byte, anche tra un export e l'altro
+    out = gzip.GzipFile(fileobj=destinazione, mode='wb', mtime=0) if formato == 'csv.gz' else destinazione
+    try:
+        for i, blocco in enumerate(blocchi):
+            out.write(blocco.to_csv(sep=';', index=False, header=(i == 0)).encode('utf-8'))
+            righe += len(blocco)
+    finally:
+        if out is not destinazione:
+            out.close()
+    return righe
+
+def _scrivi_parquet(blocchi, destinazione) -> int:
+    if pq is None:
+        raise ValueError("l'export parquet richiede pyarrow")
+    righe, writer = 0, None
+    try:
+        for blocco in blocchi:
+            tabella = pa.Table.from_pandas(densifica(blocco), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(destinazione, tabella.schema, compression='zstd')
+            writer.write_table(tabella.cast(writer.schema))   # un row group per blocco
+            righe += len(blocco)
+    finally:
+        if writer is not None:
+            writer.close()
+    return righe
+
+def esporta_periodo(df: pd.DataFrame, formato: str = 'csv') -> bytes:
+    """The period rows as a downloadable file in `formato`."""
+    buf = io.BytesIO()
+    scrivi_blocchi(blocchi_righe(df), buf, formato)
+    return buf.getvalue()
+
+def nome_export(anno: int, negozio: str = None, formato: str = 'csv') -> str:
+    """File name of the download; the store is only named when there are several."""
+    est = FORMATI[formato][0]
+    if negozio is None:
+        return f"analisi_poketogo_{anno}.{est}"
+    return f"analisi_poketogo_{negozio.replace(' ', '_').lower()}_{anno}.{est}"
@@ -0,0 +1,247 @@
+# Pokè To Go! – statistiche sugli acquisti dai fornitori
+
+import numpy as np
+import pandas as pd
+
+def statistiche_ingredienti(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-ingredient price stats in one grouped pass over the supplier frame.
+
+    Index: ingrediente. Price stats (n_ordini, media, std, minimo and the
+    last order's prezzo/fornitore/data/unita) only use rows with a valid
+    unit price; n_fornitori counts distinct suppliers over all rows.
+    Ingredients without any valid price have n_ordini == 0."""
+    validi = df[df['prezzo_unitario'].notna()]
+    g = validi.groupby('ingrediente', sort=True)
+    stats = g['prezzo_unitario'].agg(n_ordini='count', media='mean', std='std', minimo='min', ultimo_prezzo='last')
+    # Il frame è ordinato per data: l'ultima riga del gruppo è l'ultimo ordine
+    ultimo = g.tail(1).set_index('ingrediente')
+    stats['ultimo_fornitore'] = ultimo['fornitore']
+    stats['ultima_data']      = ultimo['data']
+    stats['unita']            = ultimo['unita'] if 'unita' in ultimo.columns else ''
+    n_fornitori = df.groupby('ingrediente', sort=True)['fornitore'].nunique()
+    stats = stats.reindex(n_fornitori.index)
+    stats['n_ordini']    = stats['n_ordini'].fillna(0).astype(int)
+    stats['n_fornitori'] = n_fornitori
+    return stats
+
+class StatisticheIncrementali:
+    """statistiche_ingredienti() updated block by block, for files read in
+    chunks: memory depends on the number of ingredients, not of orders.
+
+    Mean and std are merged with Chan's pairwise formulas; the last order
+    is the latest date, later rows winning ties (as after a stable sort)."""
+
+    def __init__(self):
+        self._prezzi = None   # n, media, m2, minimo + ultimo ordine, per ingrediente
+        self._coppie = None   # coppie (ingrediente, fornitore) distinte
+
+    def aggiorna(self, blocco: pd.DataFrame):
+        coppie = blocco.loc[blocco['ingrediente'].notna(), ['ingrediente', 'fornitore']].drop_duplicates()
+        self._coppie = coppie if self._coppie is None else pd.concat([self._coppie, coppie]).drop_duplicates()
+
+        validi = blocco[blocco['prezzo_unitario'].notna() & blocco['ingrediente'].notna()]
+        if validi.empty:
+            return
+        validi = validi.sort_values('data', kind='stable')
+        g = validi.groupby('ingrediente', sort=True)
+        nuovo = g['prezzo_unitario'].agg(n='count', media='mean', m2='var', minimo='min', ultimo_prezzo='last')
+        nuovo['m2'] = nuovo['m2'].fillna(0.0) * (nuovo['n'] - 1)
+        ultimo = g.tail(1).set_index('ingrediente')
+        nuovo['ultimo_fornitore'] = ultimo['fornitore']
+        nuovo['ultima_data']      = ultimo['data']
+        nuovo['unita']            = ultimo['unita'] if 'unita' in ultimo.columns else ''
+        if self._prezzi is None:
+            self._prezzi = nuovo
+            return
+
+        a, b = self._prezzi.align(nuovo, join='outer')
+        na, nb = a['n'].fillna(0), b['n'].fillna(0)
+        n = na + nb
+        delta = b['media'].fillna(0) - a['media'].fillna(0)
+        somma = a.copy()
+        somma['n']      = n
+        somma['media']  = a['media'].fillna(0) + delta * nb / n
+        somma['m2']     = a['m2'].fillna(0) + b['m2'].fillna(0) + delta ** 2 * na * nb / n
+        somma['minimo'] = np.fmin(a['minimo'], b['minimo'])
+        dopo = b['ultima_data'].notna() & ~(b['ultima_data'] < a['ultima_data'])
+        for c in ['ultimo_prezzo', 'ultimo_fornitore', 'ultima_data', 'unita']:
+            somma[c] = b[c].where(dopo, a[c])
+        self._prezzi = somma
+
+    def risultato(self) -> pd.DataFrame:
+        """Same index and columns as statistiche_ingredienti()."""
+        coppie = self._coppie if self._coppie is not None else pd.DataFrame(columns=['ingrediente', 'fornitore'])
+        n_fornitori = coppie.groupby('ingrediente', sort=True)['fornitore'].nunique()
+        p = self._prezzi if self._prezzi is not None else pd.DataFrame(
+            columns=['n', 'media', 'm2', 'minimo', 'ultimo_prezzo', 'ultimo_fornitore', 'ultima_data', 'unita'])
+        n = p['n'].astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(p['m2'].astype(float) / (n - 1)).where(n > 1)
+        stats = pd.DataFrame({
+            'n_ordini': n, 'media': p['media'], 'std': std, 'minimo': p['minimo'],
+            'ultimo_prezzo': p['ultimo_prezzo'], 'ultimo_fornitore': p['ultimo_fornitore'],
+            'ultima_data': p['ultima_data'], 'unita': p['unita'],
+        }).reindex(n_fornitori.index)
+        stats['n_ordini']    = stats['n_ordini'].fillna(0).astype(int)
+        stats['n_fornitori'] = n_fornitori
+        return stats
+
+def sopra_media(stats: pd.DataFrame) -> pd.Series:
+    """Last price more than one standard deviation above the historical mean."""
+    return (stats['std'] > 0) & (stats['ultimo_prezzo'] > stats['media'] + stats['std'])
+
+MIN_ORDINI_ANOMALIA = 5   # ordini per ingrediente prima di segnalare anomalie
+
+def prezzi_da_monitorare(stats: pd.DataFrame, min_ordini: int = MIN_ORDINI_ANOMALIA) -> tuple:
+    """Ingredients whose last price is above the norm, as the dashboard
+    table. Returns (table, number of ingredients with enough orders)."""
+    monitorati = stats[stats['n_ordini'] >= min_ordini]
+    anom = monitorati[sopra_media(monitorati)]
+    tabella = pd.DataFrame({
+        'Ingrediente':   anom.index,
+        'Fornitore':     anom['ultimo_fornitore'].to_numpy(),
+        'Ultimo ordine': anom['ultima_data'].dt.strftime('%d/%m/%Y').to_numpy(),
+        'Ultimo prezzo': [f"€ {v:.2f}" for v in anom['ultimo_prezzo']],
+        'Media storica': [f"€ {v:.2f}" for v in anom['media']],
+        'Δ':             [f"+{v:.0f}%" for v in (anom['ultimo_prezzo'] - anom['media']) / anom['media'] * 100],
+    })
+    return tabella, len(monitorati)
+
+# ── ANOMALIE SU TUTTO LO STORICO ──────────────────────────────────────────────
+
+METODI_ZSCORE = ('espanso', 'mobile', 'esponenziale')
+
+def zscore_prezzi(df: pd.DataFrame, metodo: str = 'espanso', finestra: int = 10, span: int = 10,
+                  min_ordini: int = 5, soglia: float = 1.0) -> pd.DataFrame:
+    """Z-score of every order's unit price against the same ingredient's
+    previous orders, for the whole history in one vectorized pass.
+
+    metodo: 'espanso' (all previous orders), 'mobile' (last `finestra`
+    orders) or 'esponenziale' (EWM with the given `span`). The reference
+    never includes the order itself. z is NaN until the ingredient has
+    `min_ordini` orders including the current one, or when std is 0.
+    Returns the orders sorted by date with media_rif, std_rif, zscore and
+    anomalia (z > soglia) — a timeline ready to plot."""
+    if metodo not in METODI_ZSCORE:
+        raise ValueError(f"metodo deve essere uno di {METODI_ZSCORE}")
+    cols = [c for c in ['data', 'ingrediente', 'fornitore', 'unita', 'prezzo_unitario'] if c in df.columns]
+    v = df.loc[df['prezzo_unitario'].notna() & df['ingrediente'].notna(), cols]
+    v = v.sort_values(['ingrediente', 'data'], kind='stable')
+    x = v['prezzo_unitario'].to_numpy(dtype=float)
+    n = len(x)
+    idx = np.arange(n)
+    ing = v['ingrediente'].to_numpy()
+    nuovo = np.ones(n, dtype=bool)
+    nuovo[1:] = ing[1:] != ing[:-1]
+    inizio = np.maximum.accumulate(np.where(nuovo, idx, 0))
+    prec = idx - inizio   # ordini precedenti dello stesso ingrediente
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if metodo == 'esponenziale':
+            ewm = v.groupby('ingrediente', sort=True)['prezzo_unitario'].ewm(span=span)
+            media_g, std_g = ewm.mean().to_numpy(), ewm.std().to_numpy()
+            media, std = np.full(n, np.nan), np.full(n, np.nan)
+            media[1:], std[1:] = media_g[:-1], std_g[:-1]   # riferimento = fino all'ordine prima
+            media[nuovo], std[nuovo] = np.nan, np.nan
+        else:
+            da = inizio if metodo == 'espanso' else np.maximum(inizio, idx - finestra)
+            k = idx - da
+            # Somme cumulate centrate sul primo prezzo del gruppo (stabilità numerica)
+            xc = x - x[inizio]
+            c1 = np.concatenate([[0.0], np.cumsum(xc)])
+            c2 = np.concatenate([[0.0], np.cumsum(xc * xc)])
+            s1, s2 = c1[idx] - c1[da], c2[idx] - c2[da]
+            media = s1 / k + x[inizio]
+            std = np.sqrt(np.maximum(s2 - s1 * s1 / k, 0.0) / (k - 1))
+        z = np.where((prec >= min_ordini - 1) & (std > 0), (x - media) / std, np.nan)
+
+    out = v.assign(media_rif=media, std_rif=std, zscore=z, anomalia=z > soglia)
+    return out.sort_values('data', kind='stable')
+
+# ── TREND DEI PREZZI ──────────────────────────────────────────────────────────
+
+MIN_ORDINI_TREND = 6
+METODI_TREND = ('ols', 'pesata', 'robusta')
+HUBER_K = 1.345   # soglia di Huber in unità di deviazione robusta
+
+def _retta(cod: np.ndarray, n_gruppi: int, x: np.ndarray, y: np.ndarray, w: np.ndarray) -> tuple:
+    """Weighted least-squares slope and intercept of every group, from
+    per-group sums of the centred values."""
+    sw = np.bincount(cod, w, n_gruppi)
+    mx = np.bincount(cod, w * x, n_gruppi) / sw
+    my = np.bincount(cod, w * y, n_gruppi) / sw
+    dx, dy = x - mx[cod], y - my[cod]
+    sxx = np.bincount(cod, w * dx * dx, n_gruppi)
+    sxy = np.bincount(cod, w * dx * dy, n_gruppi)
+    syy = np.bincount(cod, w * dy * dy, n_gruppi)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pendenza = np.where(sxx > 0, sxy / sxx, 0.0)   # ordini tutti nello stesso giorno: retta piatta
+        r2 = np.where((sxx > 0) & (syy > 0), sxy * sxy / (sxx * syy), np.nan)
+    return pendenza, my - pendenza * mx, r2
+
+def trend_prezzi(df: pd.DataFrame, per=('ingrediente', 'fornitore'), metodo: str = 'ols',
+                 min_ordini: int = MIN_ORDINI_TREND, iterazioni: int = 10) -> pd.DataFrame:
+    """Linear trend of the unit price of every series (one per combination
+    of the `per` columns) in one grouped pass over the orders with a price.
+
+    x is days since the series' first order. metodo: 'ols' (least squares),
+    'pesata' (orders weighted by quantity) or 'robusta' (Huber IRLS, so a
+    single odd order does not tilt the line). Index: the `per` columns;
+    columns n_ordini, prima_data, ultima_data, prezzo_medio, pendenza
+    (€/unit per day), intercetta, r2 and var_mese_pct (30-day change as %
+    of the mean price). Series with fewer than `min_ordini` orders are dropped."""
+    if metodo not in METODI_TREND:
+        raise ValueError(f"metodo deve essere uno di {METODI_TREND}")
+    per = list(per)
+    v = df.loc[df['prezzo_unitario'].notna() & df['ingrediente'].notna(), per + ['data', 'prezzo_unitario', 'quantita']]
+    g = v.groupby(per, sort=True, observed=True)
+    cod = g.ngroup().to_numpy()
+    chiavi = g.size()
+    n_gruppi = len(chiavi)
+    prima = g['data'].transform('min')
+    x = (v['data'] - prima).dt.days.to_numpy(dtype=float)
+    y = v['prezzo_unitario'].to_numpy(dtype=float)
+    if metodo == 'pesata':
+        w = v['quantita'].to_numpy(dtype=float)
+        w = np.where(np.isfinite(w) & (w > 0), w, 1.0)
+    else:
+        w = np.ones(len(v))
+
+    pendenza, intercetta, r2 = _retta(cod, n_gruppi, x, y, w)
+    if metodo == 'robusta':
+        for _ in range(iterazioni):
+            res = np.abs(y - intercetta[cod] - pendenza[cod] * x)
+            scala = 1.4826 * pd.Series(res).groupby(cod).median().reindex(range(n_gruppi)).to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                u = res / (HUBER_K * scala[cod])
+            w = np.where(u > 1, 1 / u, 1.0)   # scala 0 → u inf o nan: peso 0 o 1
+            w = np.where(np.isnan(w), 1.0, w)
+            pendenza, intercetta, r2 = _retta(cod, n_gruppi, x, y, w)
+
+    out = pd.DataFrame({
+        'n_ordini':     chiavi.to_numpy(),
+        'prima_data':   g['data'].min().to_numpy(),
+        'ultima_data':  g['data'].max().to_numpy(),
+        'prezzo_medio': np.bincount(cod, y, n_gruppi) / chiavi.to_numpy(),
+        'pendenza':     pendenza,
+        'intercetta':   intercetta,
+        'r2':           r2,
+    }, index=chiavi.index)
+    out['var_mese_pct'] = out['pendenza'] * 30 / out['prezzo_medio'] * 100
+    return out[out['n_ordini'] >= min_ordini]
+
+def prezzi_in_crescita(trend: pd.DataFrame) -> pd.DataFrame:
+    """trend_prezzi() per ingredient × supplier as the dashboard table,
+    fastest-rising first (numeric and date columns, so the table stays
+    sortable)."""
+    t = trend.sort_values('var_mese_pct', ascending=False, kind='stable').reset_index()
+    return pd.DataFrame({
+        'Ingrediente':       t['ingrediente'].astype(str),
+        'Fornitore':         t['fornitore'].astype(str),
+        'Ordini':            t['n_ordini'],
+        'Dal':               t['prima_data'],
+        'Prezzo medio (€)':  t['prezzo_medio'].round(2),
+        'Trend (€/mese)':    (t['pendenza'] * 30).round(3),
+        'Trend (%/mese)':    t['var_mese_pct'].round(1),
+        'R²':                t['r2'].round(2),
+    })
@@ -0,0 +1,406 @@
+# Pokè To Go! – generatori di dati di esempio (anche su larga scala)
+
+import argparse
+import io
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poketogo.colonne import POKE_COLS, EXTRA_COLS, BIBITE_COLS, SORBETTI_COLS, SORB_PZ_COLS, CATEGORIE_ING, ALL_INGRED_COLS
+
+ING_RANGES = {
+    'salmone': (80,200), 'tonno': (60,150), 'Tonno Saku': (40,100), 'Polpo': (50,120),
+    'Gamberetti': (40,90), 'Pollo Nuggets': (20,50), 'Pollo fette': (20,50),
+    'Feta': (15,40), 'Formaggio spalmabile': (10,30), 'Tofu': (10,25), 'Uova': (5,15),
+    'edamame': (15,35), 'ceci': (5,15), 'mais': (5,12), 'carote': (3,8),
+    'cetrioli': (4,10), 'pomodori': (5,15), 'Cavolo viola': (4,10),
+    'zucchine': (4,10), 'cipolle': (3,8), 'Goma wakame': (15,35),
+    'Avocado': (20,60), 'Avo Hass': (20,60), 'mango': (15,40), 'Lime': (5,15),
+    'uva': (5,15), 'Mele': (5,12), 'melone': (8,20), 'Kiwi': (5,15),
+    'Ananas': (8,20), 'Anguria': (10,30),
+    'iceberg': (8,20), 'riso_sushi': (20,50), 'riso_nero': (15,40), 'Riso integrale': (10,25),
+    'Sesamo nero': (5,15), 'Sesamo bianco': (5,15), 'Mandorle': (10,25), 'nocciole': (10,25),
+    'Cipolle croccanti': (8,20), 'Pistacchio': (15,35), 'Sale grosso': (2,6),
+    'Salsa soya': (10,30), 'Olio Evo': (15,40), 'Teriyaki': (15,35),
+    'Maionese': (8,20), 'yogurt': (5,15), 'poke': (8,20), 'Ponzu': (10,25), 'Sriracha': (8,20),
+}
+_PROT       = set(CATEGORIE_ING['Proteine'])
+_FREQ_BREVE = {'iceberg','riso_sushi','riso_nero','Riso integrale','Avocado','Avo Hass','mango','Anguria','melone'}
+
+FORN_CONFIG = {
+    'salmone':    ('Mario Pesca',    'kg', 32.0),
+    'tonno':      ('Mario Pesca',    'kg', 25.0),
+    'Polpo':      ('FruttaMare',     'kg', 18.0),
+    'Gamberetti': ('FruttaMare',     'kg', 16.0),
+    'Avocado':    ('FruttaElba',     'pz',  1.1),
+    'riso_sushi': ('Grossisti Elba', 'kg',  4.2),
+    'iceberg':    ('FruttaElba',     'kg',  2.5),
+    'Salsa soya': ('Grossisti Elba', 'lt',  6.0),
+}
+FORN_FREQ = {
+    'salmone': (2,4), 'tonno': (2,4), 'Polpo': (3,5), 'Gamberetti': (3,5),
+    'Avocado': (3,5), 'riso_sushi': (5,8), 'iceberg': (4,6), 'Salsa soya': (7,12),
+}
+
+def ingredienti_generati(n: int = None) -> list:
+    """The first `n` known ingredients, then synthetic 'Ingrediente NNN' ones."""
+    if n is None:
+        return list(ALL_INGRED_COLS)
+    extra = [f'Ingrediente {k:03d}' for k in range(1, n - len(ALL_INGRED_COLS) + 1)]
+    return (list(ALL_INGRED_COLS) + extra)[:n]
+
+def _freq(fmin, fmax, fattore):
+    return max(1, round(fmin * fattore)), max(1, round(fmax * fattore))
+
+def _csv(rows, columns=None) -> bytes:
+    df = pd.DataFrame(rows)
+    if columns is not None:
+        df = df[columns]
+    buf = io.StringIO()
+    df.to_csv(buf, sep=';', index=False)
+    return buf.getvalue().encode('utf-8')
+
+# ── GIORNALIERO ───────────────────────────────────────────────────────────────
+
+def genera_csv_giornaliero(anni=(2024, 2025), n_ingredienti: int = None,
+                           fattore_rifornimento: float = 1.0, seed: int = 42) -> bytes:
+    """Daily CSV, 1 June – 30 September of each year.
+
+    n_ingredienti: None for the 50 known ingredients, otherwise that many
+    (synthetic ones beyond the known list). fattore_rifornimento scales the
+    days between restocks (2.0 = half as often). Each year after the first
+    grows revenue by 3–10% over the previous one. Defaults reproduce the
+    sample dataset offered in the sidebar."""
+    rng = random.Random(seed)
+    ingredienti = ingredienti_generati(n_ingredienti)
+    ing_ranges = {ing: ING_RANGES.get(ing, (5, 30)) for ing in ingredienti}
+    ing_freq = {
+        ing: _freq(*((2,4) if ing in _PROT else (3,5) if ing in _FREQ_BREVE else (5,9)), fattore_rifornimento)
+        for ing in ingredienti
+    }
+    columns = (
+        ['data', 'fatturato', 'Dipendente']
+        + POKE_COLS + EXTRA_COLS + SORB_PZ_COLS
+        + BIBITE_COLS + SORBETTI_COLS
+        + ingredienti
+    )
+    rows = []
+    for year in anni:
+        start, end = date(year, 6, 1), date(year, 9, 30)
+        n_days = (end - start).days + 1
+        next_restock = {ing: 0 for ing in ingredienti}
+        for i in range(n_days):
+            day = start + timedelta(days=i)
+            m, dom, dow = day.month, day.day, day.weekday()
+            if   m == 6:               base = rng.uniform(350, 700)
+            elif m == 7 and dom <= 14: base = rng.uniform(600, 1000)
+            elif m == 7:               base = rng.uniform(800, 1300)
+            elif m == 8 and dom <= 20: base = rng.uniform(900, 1400)
+            elif m == 8:               base = rng.uniform(700, 1100)
+            elif m == 9 and dom <= 15: base = rng.uniform(500, 800)
+            else:                      base = rng.uniform(300, 600)
+            if dow >= 5:
+                base *= rng.uniform(1.15, 1.25)
+            if year > anni[0]:
+                base *= rng.uniform(1.03, 1.10) ** (year - anni[0])
+            fatturato = round(base, 2)
+            tot = max(1, int(fatturato / rng.uniform(11, 15)))
+            p_reg   = max(0, int(tot * rng.uniform(0.50, 0.62)))
+            p_maxi  = max(0, int(tot * rng.uniform(0.15, 0.25)))
+            p_baby  = max(0, int(tot * rng.uniform(0.07, 0.13)))
+            p_fruit = max(0, int(tot * rng.uniform(0.03, 0.07)))
+            p_veg   = max(0, tot - p_reg - p_maxi - p_baby - p_fruit)
+            sc = tot / 60.0
+            row = {
+                'data': day.strftime('%d/%m/%Y'), 'fatturato': fatturato,
+                'Dipendente': float(rng.choice([70, 75, 80, 85, 90])),
+                'poke_reglular': p_reg, 'poke_maxi': p_maxi, 'poke_baby': p_baby,
+                'fruit_bowl': p_fruit, 'poke_veggy': p_veg,
+                'Avocado_venduto':  round(p_reg * rng.uniform(0.25, 0.40) * 1.5, 2),
+                'Feta_venduto':     round(p_reg * rng.uniform(0.10, 0.20) * 1.5, 2),
+                'Philad_venduto':   round(p_reg * rng.uniform(0.15, 0.25) * 1.5, 2),
+                'Gomawak_venduto':  round(p_reg * rng.uniform(0.20, 0.35) * 1.5, 2),
+                'Sorbetti_venduti': max(0, int(tot * rng.uniform(0.20, 0.50))),
+                'Acqua nat':       round(rng.uniform(0.8, 1.5) * sc * 10, 2),
+                'Acqua gas':       round(rng.uniform(0.5, 1.2) * sc * 10, 2),
+                'Coca cola':       round(rng.uniform(1.0, 2.0) * sc * 10, 2),
+                'Coca zero':       round(rng.uniform(0.5, 1.5) * sc * 10, 2),
+                'corona':          round(rng.uniform(0.8, 1.8) * sc * 10, 2),
+                'ichnusa':         round(rng.uniform(0.8, 1.5) * sc * 10, 2),
+                'fanta':           round(rng.uniform(0.4, 0.9) * sc * 10, 2),
+                'Estathe limone':  round(rng.uniform(0.4, 0.8) * sc * 10, 2),
+                'Estathe pesca':   round(rng.uniform(0.3, 0.7) * sc * 10, 2),
+                'Sorbetto limone': round(rng.uniform(1.0, 2.5) * sc * 8, 2),
+                'Sorbetto mela':   round(rng.uniform(0.8, 2.0) * sc * 8, 2),
+                'Sorbetto mango':  round(rng.uniform(0.9, 2.2) * sc * 8, 2),
+            }
+            for ing in ingredienti:
+                if i >= next_restock[ing]:
+                    lo, hi = ing_ranges[ing]
+                    row[ing] = round(rng.uniform(lo, hi), 2)
+                    fmin, fmax = ing_freq[ing]
+                    next_restock[ing] = i + rng.randint(fmin, fmax)
+                else:
+                    row[ing] = ''
+            rows.append(row)
+    return _csv(rows, columns)
+
+# ── FORNITORI ─────────────────────────────────────────────────────────────────
+
+def _config_fornitori(n_ingredienti, n_fornitori):
+    """{ingrediente: (fornitore, unità, prezzo base)} and order frequencies."""
+    ingredienti = list(FORN_CONFIG)
+    if n_ingredienti is not None:
+        altri = [i for i in ingredienti_generati(n_ingredienti + len(FORN_CONFIG)) if i not in FORN_CONFIG]
+        ingredienti = (ingredienti + altri)[:n_ingredienti]
+    nomi = None if n_fornitori is None else [f'Fornitore {k + 1}' for k in range(n_fornitori)]
+    config = {}
+    for k, ing in enumerate(ingredienti):
+        fornitore, unita, prezzo = FORN_CONFIG.get(ing, ('Grossisti Elba', 'kg', round(3.0 + (k % 20) * 1.5, 2)))
+        config[ing] = (nomi[k % len(nomi)] if nomi else fornitore, unita, prezzo)
+    return config, {ing: FORN_FREQ.get(ing, (4, 8)) for ing in ingredienti}
+
+def genera_csv_fornitori(anni=(2024, 2025), n_ingredienti: int = None, n_fornitori: int = None,
+                         fattore_ordini: float = 1.0, seed: int = 99) -> bytes:
+    """Supplier CSV with prices drifting up through each season and by 9%
+    per year. With n_fornitori each ingredient has a main supplier and one
+    order in four goes to another one (so suppliers can be compared).
+    fattore_ordini scales the days between orders. Defaults reproduce the
+    sample dataset offered in the sidebar."""
+    rng = random.Random(seed)
+    config, freq = _config_fornitori(n_ingredienti, n_fornitori)
+    freq = {ing: _freq(*f, fattore_ordini) for ing, f in freq.items()}
+    nomi = None if n_fornitori is None else [f'Fornitore {k + 1}' for k in range(n_fornitori)]
+    rows = []
+    for year in anni:
+        start, end = date(year, 6, 1), date(year, 9, 30)
+        n_days = (end - start).days + 1
+        next_order = {ing: 0 for ing in config}
+        for i in range(n_days):
+            d = start + timedelta(days=i)
+            for ing, (fornitore, unita, prezzo_base) in config.items():
+                if i >= next_order[ing]:
+                    q = round(
+                        rng.uniform(1.5, 3.5) if unita == 'kg' else
+                        rng.uniform(15, 30)   if unita == 'pz' else
+                        rng.uniform(2, 5), 2
+                    )
+                    prezzo = round(
+                        prezzo_base
+                        * (1 + (i / n_days) * 0.12)
+                        * (1 + (year - anni[0]) * 0.09)
+                        * rng.uniform(0.93, 1.07), 2
+                    )
+                    if nomi and len(nomi) > 1 and rng.random() < 0.25:
+                        fornitore = rng.choice(nomi)
+                    rows.append({
+                        'data': d.strftime('%d/%m/%Y'), 'ingrediente': ing,
+                        'fornitore': fornitore, 'quantita': q,
+                        'unita': unita, 'spesa': round(q * prezzo, 2),
+                    })
+                    fmin, fmax = freq[ing]
+                    next_order[ing] = i + rng.randint(fmin, fmax)
+    return _csv(rows)
+
+# ── VERSIONE VETTORIALE (GRANDI VOLUMI) ───────────────────────────────────────
+#
+# Stesse distribuzioni dei generatori sopra, ma estratte come array interi con
+# np.random.Generator e scritte a blocchi di anni: non riproducono i file di
+# esempio byte per byte, servono per i test di carico.
+
+N_GIORNI = (date(2001, 9, 30) - date(2001, 6, 1)).days + 1   # 1/6 – 30/9, uguale ogni anno
+
+def _calendario():
+    """Per day of the season: 'dd/mm' and the revenue band (lo, hi)."""
+    giorni = pd.date_range('2001-06-01', periods=N_GIORNI)
+    m, dom = giorni.month.to_numpy(), giorni.day.to_numpy()
+    bande = np.select(
+        [m == 6, (m == 7) & (dom <= 14), m == 7, (m == 8) & (dom <= 20), m == 8, (m == 9) & (dom <= 15)],
+        [0, 1, 2, 3, 4, 5], 6,
+    )
+    lo = np.array([350, 600, 800, 900, 700, 500, 300], dtype=float)[bande]
+    hi = np.array([700, 1000, 1300, 1400, 1100, 800, 600], dtype=float)[bande]
+    return np.array(giorni.strftime('%d/%m')), lo, hi
+
+def _date_e_weekday(anni_blocco):
+    """'dd/mm/yyyy' strings and weekdays (0 = Monday), shape (anni, N_GIORNI)."""
+    dm, _, _ = _calendario()
+    inizi = np.array([f'{a:04d}-06-01' for a in anni_blocco], dtype='datetime64[D]')
+    giorni = inizi[:, None] + np.arange(N_GIORNI)
+    weekday = (giorni.astype(np.int64) + 3) % 7   # 1/1/1970 era giovedì
+    anni_str = np.array([str(a) for a in anni_blocco])
+    return np.char.add(np.char.add(dm[None, :], '/'), anni_str[:, None]), weekday
+
+def _occorrenze(rng, n_anni, fmin, fmax):
+    """Bool (anni, N_GIORNI, n) of restock/order days: the first on day 0 of
+    each season, then every fmin..fmax days (per column)."""
+    n = len(fmin)
+    k = -(-N_GIORNI // int(fmin.min())) + 1
+    intervalli = rng.integers(fmin[None, :, None], fmax[None, :, None] + 1, size=(n_anni, n, k))
+    pos = np.cumsum(intervalli, axis=2) - intervalli[:, :, :1]
+    a, c, j = np.nonzero(pos < N_GIORNI)
+    occ = np.zeros((n_anni, N_GIORNI, n), dtype=bool)
+    occ[a, pos[a, c, j], c] = True
+    return occ
+
+def _blocchi_anni(anni, righe_anno, righe_per_blocco):
+    anni = list(anni)
+    passo = max(1, int(righe_per_blocco // max(righe_anno, 1)))
+    for k in range(0, len(anni), passo):
+        yield anni[k:k + passo]
+
+def blocchi_giornaliero(anni=(2024, 2025), n_ingredienti: int = None, fattore_rifornimento: float = 1.0,
+                        seed: int = 42, righe_per_blocco: int = 100_000):
+    """Vectorized daily generator: yields DataFrames of whole seasons, at most
+    `righe_per_blocco` rows each (at least one season). Same columns and
+    distributions as genera_csv_giornaliero, dates as 'dd/mm/yyyy' strings."""
+    rng = np.random.default_rng(seed)
+    ingredienti = ingredienti_generati(n_ingredienti)
+    ing_lo = np.array([ING_RANGES.get(i, (5, 30))[0] for i in ingredienti], dtype=float)
+    ing_hi = np.array([ING_RANGES.get(i, (5, 30))[1] for i in ingredienti], dtype=float)
+    freq = np.array([
+        _freq(*((2,4) if i in _PROT else (3,5) if i in _FREQ_BREVE else (5,9)), fattore_rifornimento)
+        for i in ingredienti
+    ]).reshape(-1, 2)
+    _, banda_lo, banda_hi = _calendario()
+    anno0 = list(anni)[0]
+    for anni_blocco in _blocchi_anni(anni, N_GIORNI, righe_per_blocco):
+        n_a = len(anni_blocco)
+        shape = (n_a, N_GIORNI)
+        date_str, weekday = _date_e_weekday(anni_blocco)
+        u = lambda lo, hi: rng.uniform(lo, hi, size=shape)
+        base = u(banda_lo, banda_hi)
+        base = np.where(weekday >= 5, base * u(1.15, 1.25), base)
+        esponente = (np.array(anni_blocco) - anno0)[:, None]
+        base = base * u(1.03, 1.10) ** esponente
+        fatturato = np.round(base, 2)
+        tot = np.maximum(1, (fatturato / u(11, 15)).astype(np.int64))
+        quota = lambda lo, hi: np.maximum(0, (tot * u(lo, hi)).astype(np.int64))
+        p_reg, p_maxi, p_baby, p_fruit = quota(0.50, 0.62), quota(0.15, 0.25), quota(0.07, 0.13), quota(0.03, 0.07)
+        sc = tot / 60.0
+        col = {
+            'data': date_str, 'fatturato': fatturato,
+            'Dipendente': rng.choice(np.array([70, 75, 80, 85, 90], dtype=float), size=shape),
+            'poke_reglular': p_reg, 'poke_maxi': p_maxi, 'poke_baby': p_baby,
+            'fruit_bowl': p_fruit, 'poke_veggy': np.maximum(0, tot - p_reg - p_maxi - p_baby - p_fruit),
+            'Avocado_venduto':  np.round(p_reg * u(0.25, 0.40) * 1.5, 2),
+            'Feta_venduto':     np.round(p_reg * u(0.10, 0.20) * 1.5, 2),
+            'Philad_venduto':   np.round(p_reg * u(0.15, 0.25) * 1.5, 2),
+            'Gomawak_venduto':  np.round(p_reg * u(0.20, 0.35) * 1.5, 2),
+            'Sorbetti_venduti': np.maximum(0, (tot * u(0.20, 0.50)).astype(np.int64)),
+        }
+        for nome, (lo, hi, k) in {
+            'Acqua nat': (0.8, 1.5, 10), 'Acqua gas': (0.5, 1.2, 10), 'Coca cola': (1.0, 2.0, 10),
+            'Coca zero': (0.5, 1.5, 10), 'corona': (0.8, 1.8, 10), 'ichnusa': (0.8, 1.5, 10),
+            'fanta': (0.4, 0.9, 10), 'Estathe limone': (0.4, 0.8, 10), 'Estathe pesca': (0.3, 0.7, 10),
+            'Sorbetto limone': (1.0, 2.5, 8), 'Sorbetto mela': (0.8, 2.0, 8), 'Sorbetto mango': (0.9, 2.2, 8),
+        }.items():
+            col[nome] = np.round(u(lo, hi) * sc * k, 2)
+        df = pd.DataFrame({c: v.ravel() for c, v in col.items()})
+        occ = _occorrenze(rng, n_a, freq[:, 0], freq[:, 1]).reshape(n_a * N_GIORNI, -1)
+        costi = np.round(rng.uniform(ing_lo, ing_hi, size=occ.shape), 2)
+        rifornimenti = pd.DataFrame(np.where(occ, costi, np.nan), columns=ingredienti)
+        yield pd.concat([df, rifornimenti], axis=1)
+
+def blocchi_fornitori(anni=(2024, 2025), n_ingredienti: int = None, n_fornitori: int = None,
+                      fattore_ordini: float = 1.0, seed: int = 99, righe_per_blocco: int = 100_000):
+    """Vectorized supplier generator: yields DataFrames of whole seasons, each
+    about `righe_per_blocco` rows. Same distributions as genera_csv_fornitori."""
+    rng = np.random.default_rng(seed)
+    config, freq = _config_fornitori(n_ingredienti, n_fornitori)
+    ingredienti = np.array(list(config))
+    principale = np.array([f for f, _, _ in config.values()])
+    unita = np.array([u for _, u, _ in config.values()])
+    prezzo_base = np.array([p for _, _, p in config.values()])
+    q_lo = np.select([unita == 'kg', unita == 'pz'], [1.5, 15.0], 2.0)
+    q_hi = np.select([unita == 'kg', unita == 'pz'], [3.5, 30.0], 5.0)
+    freq = np.array([_freq(*freq[i], fattore_ordini) for i in config]).reshape(-1, 2)
+    nomi = None if n_fornitori is None else np.array([f'Fornitore {k + 1}' for k in range(n_fornitori)])
+    righe_anno = (N_GIORNI / freq.mean(axis=1)).sum()
+    anno0 = list(anni)[0]
+    for anni_blocco in _blocchi_anni(anni, righe_anno, righe_per_blocco):
+        date_str, _ = _date_e_weekday(anni_blocco)
+        a, g, i = np.nonzero(_occorrenze(rng, len(anni_blocco), freq[:, 0], freq[:, 1]))
+        n = len(i)
+        q = np.round(rng.uniform(q_lo[i], q_hi[i]), 2)
+        prezzo = np.round(
+            prezzo_base[i]
+            * (1 + (g / N_GIORNI) * 0.12)
+            * (1 + (np.array(anni_blocco)[a] - anno0) * 0.09)
+            * rng.uniform(0.93, 1.07, size=n), 2
+        )
+        fornitore = principale[i]
+        if nomi is not None and len(nomi) > 1:
+            altro = rng.random(n) < 0.25
+            fornitore = np.where(altro, nomi[rng.integers(0, len(nomi), size=n)], fornitore)
+        yield pd.DataFrame({
+            'data': date_str[a, g], 'ingrediente': ingredienti[i],
+            'fornitore': fornitore, 'quantita': q,
+            'unita': unita[i], 'spesa': np.round(q * prezzo, 2),
+        })
+
+def blocchi_csv(blocchi):
+    """CSV bytes chunk by chunk (header with the first one)."""
+    for k, df in enumerate(blocchi):
+        yield df.to_csv(sep=';', index=False, header=k == 0).encode('utf-8')
+
+def scrivi_csv(blocchi, percorso) -> int:
+    """Stream the chunks to `percorso` without holding the file in memory. Returns the rows written."""
+    righe = 0
+    with open(percorso, 'wb') as f:
+        for k, df in enumerate(blocchi):
+            f.write(df.to_csv(sep=';', index=False, header=k == 0).encode('utf-8'))
+            righe += len(df)
+    return righe
+
+# ── PIÙ NEGOZI ────────────────────────────────────────────────────────────────
+
+def genera_negozi(n_negozi: int = 1, anni=(2024, 2025), n_ingredienti: int = None,
+                  fattore_rifornimento: float = 1.0, n_fornitori: int = None, vettoriale: bool = False) -> dict:
+    """{negozio: (daily CSV bytes, supplier CSV bytes)}, a different seed per store.
+    vettoriale uses the NumPy generators (much faster, different random stream)."""
+    if vettoriale:
+        return {
+            f'negozio_{k + 1}': (
+                b''.join(blocchi_csv(blocchi_giornaliero(anni, n_ingredienti, fattore_rifornimento, seed=42 + 1000 * k))),
+                b''.join(blocchi_csv(blocchi_fornitori(anni, n_ingredienti, n_fornitori, fattore_rifornimento, seed=99 + 1000 * k))),
+            )
+            for k in range(n_negozi)
+        }
+    return {
+        f'negozio_{k + 1}': (
+            genera_csv_giornaliero(anni, n_ingredienti, fattore_rifornimento, seed=42 + 1000 * k),
+            genera_csv_fornitori(anni, n_ingredienti, n_fornitori, fattore_rifornimento, seed=99 + 1000 * k),
+        )
+        for k in range(n_negozi)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera CSV sintetici Pokè To Go! per i test di carico")
+    parser.add_argument('cartella', type=Path)
+    parser.add_argument('--anni', default='2024-2025', help="intervallo, es. 1990-2025")
+    parser.add_argument('--negozi', type=int, default=1)
+    parser.add_argument('--ingredienti', type=int, default=None)
+    parser.add_argument('--fornitori', type=int, default=None)
+    parser.add_argument('--fattore-rifornimento', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    da, _, a = args.anni.partition('-')
+    anni = range(int(da), int(a or da) + 1)
+    args.cartella.mkdir(parents=True, exist_ok=True)
+    for k in range(args.negozi):
+        g = scrivi_csv(
+            blocchi_giornaliero(anni, args.ingredienti, args.fattore_rifornimento, seed=42 + 1000 * k),
+            args.cartella / f'negozio_{k + 1}_giornaliero.csv',
+        )
+        f = scrivi_csv(
+            blocchi_fornitori(anni, args.ingredienti, args.fornitori, args.fattore_rifornimento, seed=99 + 1000 * k),
+            args.cartella / f'negozio_{k + 1}_fornitori.csv',
+        )
+        print(f"negozio_{k + 1}: {g:,} righe giornaliere, {f:,} ordini")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Pokè To Go! – grafici: plotly caricato al primo uso, riduzione dei punti
+
+import functools
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from poketogo import profilo
+
+class ModuloPigro:
+    """Stand-in for a module that is imported on first attribute access.
+    With an active profile, its functions (not classes, so isinstance keeps
+    working) are timed under '<prefisso>.<nome>'."""
+
+    def __init__(self, nome: str, prefisso: str = None):
+        self._nome = nome
+        self._prefisso = prefisso
+        self._modulo = None
+
+    def __getattr__(self, attr):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome)
+        valore = getattr(self._modulo, attr)
+        if self._prefisso and callable(valore) and not isinstance(valore, type) and profilo.corrente() is not None:
+            return _cronometrato(f'{self._prefisso}.{attr}', valore)
+        return valore
+
+def _cronometrato(nome, fn):
+    @functools.wraps(fn)
+    def chiama(*args, **kwargs):
+        with profilo.misura(nome):
+            return fn(*args, **kwargs)
+    return chiama
+
+px = ModuloPigro('plotly.express', 'px')
+go = ModuloPigro('plotly.graph_objects')
+
+# ── RIDUZIONE DEI PUNTI ───────────────────────────────────────────────────────
+
+PUNTI_MAX    = int(os.environ.get('POKETOGO_PUNTI_MAX', 2000))   # punti per serie nei grafici a linee
+SOGLIA_WEBGL = 1000    # oltre questi punti gli scatter passano a WebGL
+ETICHETTE_FREQ = {'W-MON': 'settimanali', 'MS': 'mensili'}
+
+def _numerico(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+def lttb(x, y, n: int) -> np.ndarray:
+    """Positions of the `n` points kept by Largest-Triangle-Three-Buckets
+    (first and last always kept). All positions when n >= len(y)."""
+    N = len(y)
+    if n >= N or n < 3:
+        return np.arange(N)
+    x, y = _numerico(x), np.nan_to_num(_numerico(y))
+    bordi = np.linspace(1, N - 1, n - 1).astype(int)   # n-2 secchi tra il primo e l'ultimo punto
+    scelti = np.empty(n, dtype=int)
+    scelti[0], scelti[-1] = 0, N - 1
+    a = 0
+    for k in range(n - 2):
+        i0, i1 = bordi[k], bordi[k + 1]
+        j0, j1 = (bordi[k + 1], bordi[k + 2]) if k + 2 < n - 1 else (N - 1, N)
+        mx, my = x[j0:j1].mean(), y[j0:j1].mean()
+        area = np.abs((x[a] - mx) * (y[i0:i1] - y[a]) - (x[a] - x[i0:i1]) * (my - y[a]))
+        a = i0 + int(area.argmax())
+        scelti[k + 1] = a
+    return scelti
+
+def minmax(y, n: int) -> np.ndarray:
+    """Positions of the minimum and maximum of n/2 equal buckets (spikes are
+    never lost), plus first and last point. All positions when n >= len(y)."""
+    N = len(y)
+    if n >= N or n < 4:
+        return np.arange(N)
+    y = _numerico(y)
+    bordi = np.linspace(0, N, n // 2 + 1).astype(int)
+    alto, basso = np.where(np.isnan(y), -np.inf, y), np.where(np.isnan(y), np.inf, y)
+    scelti = [0, N - 1]
+    for i0, i1 in zip(bordi[:-1], bordi[1:]):
+        if i1 > i0:
+            scelti += [i0 + int(basso[i0:i1].argmin()), i0 + int(alto[i0:i1].argmax())]
+    return np.unique(scelti)
+
+def riduci(frame: pd.DataFrame, x: str, y, punti: int = PUNTI_MAX, metodo: str = 'lttb') -> pd.DataFrame:
+    """Rows of `frame` kept for plotting columns `y` (one name or a list)
+    against `x`: the union of what each series keeps with `punti` points."""
+    colonne = [y] if isinstance(y, str) else list(y)
+    if len(frame) <= punti:
+        return frame
+    pos = [
+        lttb(frame[x].to_numpy(), frame[c].to_numpy(), punti) if metodo == 'lttb' else minmax(frame[c].to_numpy(), punti)
+        for c in colonne
+    ]
+    return frame.iloc[np.unique(np.concatenate(pos))]
+
+def frequenza_barre(date, barre_max: int):
+    """None when one bar per day fits in `barre_max`, else 'W-MON' (weeks)
+    or 'MS' (months)."""
+    date = pd.Series(date).dropna()
+    if date.nunique() <= barre_max:
+        return None
+    giorni = (date.max() - date.min()).days + 1
+    return 'W-MON' if giorni / 7 <= barre_max else 'MS'
+
+def per_periodo(frame: pd.DataFrame, colonne: list, freq: str, x: str = 'data') -> pd.DataFrame:
+    """Sums of `colonne` per week (starting Monday) or month."""
+    opzioni = {'label': 'left', 'closed': 'left'} if freq == 'W-MON' else {}
+    return frame.resample(freq, on=x, **opzioni)[colonne].sum().reset_index()
+
+def modo_scatter(n: int) -> str:
+    return 'webgl' if n > SOGLIA_WEBGL else 'svg'
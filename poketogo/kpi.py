@@ -0,0 +1,71 @@
+# Pokè To Go! – indicatori della dashboard (briefing, stagione, costi)
+
+import pandas as pd
+
+from poketogo.cubo import Cubo
+
+def variazione(a: float, b: float):
+    """Percent change from b to a, None when b is 0."""
+    return (a - b) / b * 100 if b else None
+
+def _somme(tot: dict) -> dict:
+    return {'fatturato': tot['fatturato'], 'poke': tot['poke_totali'], 'utile': tot['utile_lordo']}
+
+def ultimi_giorni(cubo: Cubo, anno: int, anno_prec: int = None, n: int = 7, allinea: str = 'calendario') -> dict:
+    """Totals of the last `n` open days of `anno` and, under 'prec', of the
+    matching span of `anno_prec` (same dates, or same weekdays with
+    allinea='settimana'; None if missing or empty)."""
+    tot, da, a = cubo.ultimi_aperti(anno, n, allinea)
+    kpi = {'giorni': tot['giorni'], **_somme(tot), 'pct_ingredienti': tot['pct_ingredienti'], 'prec': None}
+    if anno_prec and tot['giorni']:
+        prec = cubo.aperti_tra(anno_prec, da, a, allinea)
+        if prec['giorni']:
+            kpi['prec'] = _somme(prec)
+    return kpi
+
+def stagione(cubo: Cubo, anno: int, anno_prec: int = None, allinea: str = 'calendario') -> dict:
+    """Season-to-date totals of `anno` and, under 'prec', of `anno_prec` up to
+    the matching day (None if missing or empty)."""
+    tot = cubo.totali(anno, solo_aperti=True)
+    kpi = {
+        'giorni': tot['giorni'],
+        **_somme(tot),
+        'ultima_data': cubo.ultima_data(anno, solo_aperti=True) if tot['giorni'] else cubo.ultima_data(anno),
+        'prec': None,
+    }
+    if anno_prec and tot['giorni']:
+        _, _, ultimo = cubo.ultimi_aperti(anno, 1, allinea)
+        prec = cubo.aperti_tra(anno_prec, None, ultimo, allinea)
+        if prec['giorni']:
+            kpi['prec'] = _somme(prec)
+    return kpi
+
+def confronto_stagioni(cubo: Cubo, costi_fissi_gg: float = 0.0) -> pd.DataFrame:
+    """One row per year: fatturato, utile_lordo, utile_netto (minus fixed
+    costs per open day), poke, pct_ingredienti (mean over open days),
+    giorni_aperti. Indexed by anno."""
+    anni = cubo.per_anno()
+    out = pd.DataFrame({
+        'fatturato':       anni['fatturato'],
+        'utile_lordo':     anni['utile_lordo'],
+        'poke':            anni['poke_totali'],
+        'pct_ingredienti': anni['pct_ingredienti'],
+        'giorni_aperti':   anni['giorni_aperti'],
+    })
+    out['utile_netto'] = out['utile_lordo'] - costi_fissi_gg * out['giorni_aperti']
+    return out
+
+def costi_periodo(df: pd.DataFrame, costi_fissi_gg: float = 0.0) -> dict:
+    """Revenue, cost items, gross and net profit over the rows of `df`;
+    fixed costs are charged per open day."""
+    giorni = int((df['fatturato'] > 0).sum())
+    fat = df['fatturato'].sum()
+    ing = df['ing_dist'].sum()
+    dip = df['Dipendente'].sum()
+    bib = df['bib_sorb_costo'].sum()
+    cf  = costi_fissi_gg * giorni
+    ul  = fat - ing - dip - bib
+    return {
+        'giorni_aperti': giorni, 'fatturato': fat, 'ingredienti': ing, 'dipendente': dip,
+        'bibite_sorbetti': bib, 'costi_fissi': cf, 'utile_lordo': ul, 'utile_netto': ul - cf,
+    }
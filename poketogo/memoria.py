@@ -0,0 +1,105 @@
+# Pokè To Go! – tipi compatti per i frame in memoria e rapporto sull'occupazione
+
+import dataclasses
+import os
+
+import numpy as np
+import pandas as pd
+
+from poketogo.colonne import POKE_COLS, EXTRA_COLS, SORB_PZ_COLS
+
+# Con POKETOGO_COMPATTO=0 i frame restano float64/stringhe come li dà pandas;
+# con POKETOGO_SPARSO=1 le colonne di rifornimento della sessione diventano sparse.
+COMPATTO = os.environ.get('POKETOGO_COMPATTO', '1') != '0'
+SPARSO   = os.environ.get('POKETOGO_SPARSO', '0') == '1'
+
+# Conteggi: Int32 se pandas li leggerebbe come interi (solo interi, nessun vuoto),
+# così l'export scrive gli stessi numeri ("5", non "5.0") del frame non compattato
+CONTEGGI = POKE_COLS + EXTRA_COLS + SORB_PZ_COLS + ['poke_totali', 'extra_totali']
+# I totali sono interi solo se lo sono tutte le colonne sommate, come in pandas
+TOTALI = {'poke_totali': POKE_COLS, 'extra_totali': EXTRA_COLS}
+CATEGORIE_FORNITORI = ['ingrediente', 'fornitore', 'unita']
+FLOAT32_FORNITORI   = ['quantita']
+
+def _interi(v: np.ndarray) -> bool:
+    return bool(not np.isnan(v).any() and np.all(v == np.round(v)) and np.all(np.abs(v) < 2**31))
+
+def a_float64(df: pd.DataFrame, colonne) -> pd.DataFrame:
+    """Working dtype for computations: float64 with NaN for missing values."""
+    return df.astype({c: 'float64' for c in colonne if c in df.columns and df[c].dtype != 'float64'})
+
+def compatta_giornaliero(df: pd.DataFrame) -> pd.DataFrame:
+    """Counts → Int32 when the column has no gaps and only whole numbers,
+    i.e. exactly when pandas would have read it as int64. Revenue, costs
+    (distributed ones included) and every derived money or ratio column stay
+    float64: they are summed into the KPIs and exported."""
+    if not COMPATTO:
+        return df
+    tipi = {}
+    for c in CONTEGGI:
+        if c in df.columns:
+            v = df[c].to_numpy(dtype=float, na_value=np.nan)
+            tipi[c] = 'Int32' if _interi(v) else 'float64'
+    for c, sorgenti in TOTALI.items():
+        sommate = [s for s in sorgenti if s in tipi]
+        if c in tipi and (not sommate or any(tipi[s] != 'Int32' for s in sommate)):
+            tipi[c] = 'float64'
+    return df.astype(tipi)
+
+def compatta_fornitori(df: pd.DataFrame) -> pd.DataFrame:
+    """Supplier, ingredient and unit as categoricals; quantity as float32.
+    spesa and prezzo_unitario stay float64 (totals, stats and z-scores)."""
+    if not COMPATTO or df is None:
+        return df
+    tipi = {c: 'category' for c in CATEGORIE_FORNITORI if c in df.columns}
+    tipi.update({c: 'float32' for c in FLOAT32_FORNITORI if c in df.columns})
+    return df.astype(tipi)
+
+def sparsifica(df: pd.DataFrame, colonne) -> pd.DataFrame:
+    """Restock columns (mostly empty) as sparse arrays with NaN fill."""
+    tipi = {c: pd.SparseDtype(df[c].dtype, np.nan) for c in colonne if c in df.columns and not isinstance(df[c].dtype, pd.SparseDtype)}
+    return df.astype(tipi) if tipi else df
+
+def densifica(df: pd.DataFrame) -> pd.DataFrame:
+    """Back to dense columns (Arrow has no sparse type)."""
+    sparse = {c: df[c].dtype.subtype for c in df.columns if isinstance(df[c].dtype, pd.SparseDtype)}
+    return df.astype(sparse) if sparse else df
+
+def sparsifica_stato(stato):
+    if not SPARSO:
+        return stato
+    return dataclasses.replace(stato, df=sparsifica(stato.df, stato.ingred_cols))
+
+# ── RAPPORTO ──────────────────────────────────────────────────────────────────
+
+def mb(df) -> float:
+    return 0.0 if df is None else df.memory_usage(deep=True).sum() / 2**20
+
+def _mb_float64(df) -> float:
+    """Size of the same frame with every numeric column as float64 and text as Python strings."""
+    if df is None:
+        return 0.0
+    tot = df.index.memory_usage()
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(s.dtype):
+            tot += s.astype(object).memory_usage(deep=True, index=False)
+        elif pd.api.types.is_numeric_dtype(s.dtype):
+            tot += 8 * len(s)
+        else:
+            tot += s.memory_usage(deep=True, index=False)
+    return tot / 2**20
+
+def rapporto_memoria(datasets: dict) -> pd.DataFrame:
+    """{name: DataFrame} → rows, columns, MB now and MB as plain float64."""
+    righe = [{
+        'Dataset':       nome,
+        'Righe':         0 if df is None else len(df),
+        'Colonne':       0 if df is None else df.shape[1],
+        'MB':            round(mb(df), 2),
+        'MB float64':    round(_mb_float64(df), 2),
+    } for nome, df in datasets.items()]
+    out = pd.DataFrame(righe)
+    if not out.empty:
+        out['Risparmio'] = [f"{1 - a / b:.0%}" if b else '' for a, b in zip(out['MB'], out['MB float64'])]
+    return out
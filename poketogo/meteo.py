@@ -0,0 +1,132 @@
+# Pokè To Go! – previsioni meteo scaricate in background, con copia su disco
+
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+
+from poketogo import archivio
+
+URL_METEO = os.environ.get('POKETOGO_METEO_URL') or (
+    "https://api.open-meteo.com/v1/forecast"
+    "?latitude=42.77&longitude=10.19"
+    "&daily=weathercode,temperature_2m_max,precipitation_sum"
+    "&timezone=Europe%2FRome&forecast_days=7"
+)
+TTL          = 3600   # secondi prima di riscaricare
+RITENTA_DOPO = 60     # dopo un errore non si riprova prima di così
+TIMEOUT      = 5
+CHIAVI       = ('time', 'weathercode', 'temperature_2m_max', 'precipitation_sum')
+
+@dataclass
+class Previsione:
+    daily: dict
+    scaricata: float   # timestamp dell'ultimo download riuscito
+    scaduta: bool      # più vecchia del TTL: un aggiornamento è in corso o fallito
+
+def scarica(url: str, timeout: float = TIMEOUT) -> dict:
+    """Fetch and validate the 'daily' block. Raises on any error."""
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        daily = json.loads(r.read())['daily']
+    mancanti = [k for k in CHIAVI if k not in daily]
+    if mancanti:
+        raise ValueError(f"campi mancanti nella risposta: {mancanti}")
+    return daily
+
+class ServizioMeteo:
+    """Stale-while-revalidate forecast shared by every session of the process.
+
+    leggi() never waits on the network (except, optionally, for the very
+    first forecast): it returns the last good one — from memory or from the
+    copy on disk — and starts a background refresh when it is older than
+    the TTL. At most one download is in flight; failures keep the last good
+    forecast and are retried after `ritenta_dopo` seconds."""
+
+    def __init__(self, url: str = None, percorso=None, ttl: float = TTL,
+                 timeout: float = TIMEOUT, ritenta_dopo: float = RITENTA_DOPO):
+        self.url          = url or URL_METEO
+        self.percorso     = Path(percorso) if percorso else archivio.DIR_ARCHIVIO / 'meteo.json'
+        self.ttl          = ttl
+        self.timeout      = timeout
+        self.ritenta_dopo = ritenta_dopo
+        self.errore       = None   # ultimo errore, None dopo un download riuscito
+        self.n_download   = 0
+        self._lock        = threading.Lock()
+        self._thread      = None
+        self._fallito     = float('-inf')
+        self._daily, self._scaricata = self._leggi_disco()
+
+    def leggi(self, attesa: float = 0.0):
+        """The current Previsione, or None if none was ever fetched.
+        attesa: seconds to wait for the first download when nothing is cached."""
+        with self._lock:
+            if self._daily is None or time.time() - self._scaricata >= self.ttl:
+                thread = self._avvia()
+            else:
+                thread = None
+        if thread is not None and self._daily is None and attesa > 0:
+            thread.join(attesa)
+        with self._lock:
+            if self._daily is None:
+                return None
+            return Previsione(self._daily, self._scaricata, time.time() - self._scaricata >= self.ttl)
+
+    def attendi(self, timeout: float = None) -> bool:
+        """Wait for the in-flight download, if any. True when none is left running."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _avvia(self):
+        # chiamato con il lock: un solo download alla volta
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        if time.time() - self._fallito < self.ritenta_dopo:
+            return None
+        self._thread = threading.Thread(target=self._aggiorna, name='poketogo-meteo', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _aggiorna(self):
+        try:
+            daily = scarica(self.url, self.timeout)
+        except Exception as e:
+            with self._lock:
+                self._fallito = time.time()
+                self.errore = f"{type(e).__name__}: {e}"
+            return
+        ora = time.time()
+        with self._lock:
+            self._daily, self._scaricata = daily, ora
+            self.errore = None
+            self.n_download += 1
+        self._scrivi_disco(daily, ora)
+
+    # ── copia su disco ──
+
+    def _leggi_disco(self):
+        try:
+            voce = json.loads(self.percorso.read_text())
+            if voce['url'] == self.url and all(k in voce['daily'] for k in CHIAVI):
+                return voce['daily'], float(voce['scaricata'])
+        except Exception:
+            pass
+        return None, 0.0
+
+    def _scrivi_disco(self, daily: dict, scaricata: float):
+        tmp = None
+        try:
+            self.percorso.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.percorso.parent, prefix='.meteo-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'url': self.url, 'scaricata': scaricata, 'daily': daily}, f)
+            os.replace(tmp, self.percorso)
+        except Exception:
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
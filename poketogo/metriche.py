@@ -0,0 +1,78 @@
+# Pokè To Go! – metriche derivate calcolate per colonna
+
+import numpy as np
+import pandas as pd
+
+# Registro delle metriche derivate: nome colonna → funzione(df) -> Series.
+# L'ordine di registrazione è l'ordine in cui le colonne vengono aggiunte.
+METRICHE = {}
+
+def registra_metrica(nome: str):
+    """Decorator registering a whole-column derived metric under `nome`."""
+    def _reg(fn):
+        METRICHE[nome] = fn
+        return fn
+    return _reg
+
+def rapporto(num: pd.Series, den: pd.Series, scala: float = 1.0, default=0.0) -> pd.Series:
+    """num / den * scala where den > 0, `default` elsewhere (NaN den included)."""
+    return (num / den * scala).where(den > 0, default)
+
+def calcola_metriche(df: pd.DataFrame, nomi=None) -> pd.DataFrame:
+    """Add the registered metrics (all, or only `nomi`) to `df` in place."""
+    for nome in (METRICHE if nomi is None else nomi):
+        df[nome] = METRICHE[nome](df)
+    return df
+
+# ── METRICHE REGISTRATE ───────────────────────────────────────────────────────
+
+@registra_metrica('pct_ingredienti')
+def _pct_ingredienti(df):
+    return rapporto(df['ing_dist'], df['fatturato'], 100)
+
+@registra_metrica('pct_dipendenti')
+def _pct_dipendenti(df):
+    return rapporto(df['Dipendente'], df['fatturato'], 100)
+
+@registra_metrica('margine_per_poke')
+def _margine_per_poke(df):
+    return rapporto(df['utile_lordo'], df['poke_totali'], default=float('nan'))
+
+# ── GIORNATE CRITICHE ─────────────────────────────────────────────────────────
+
+GIORNI_IT = {0: 'Lun', 1: 'Mar', 2: 'Mer', 3: 'Gio', 4: 'Ven', 5: 'Sab', 6: 'Dom'}
+# Valori iniziali dei cursori nella dashboard
+SOGLIE_CRITICHE = {'soglia_ing': 30, 'soglia_dip': 25, 'soglia_fat': 300}
+
+def motivi_critici(df: pd.DataFrame, soglia_ing: float, soglia_dip: float, soglia_fat: float) -> pd.Series:
+    """Human-readable reasons why each day is flagged as critical."""
+    parti = [
+        (df['pct_ingredienti'] > soglia_ing, '🧂 Ing. %.0f%%',  df['pct_ingredienti']),
+        (df['pct_dipendenti']  > soglia_dip, '👥 Dip. %.0f%%',  df['pct_dipendenti']),
+        (df['fatturato']       < soglia_fat, '📉 Fat. €%.0f',   df['fatturato']),
+    ]
+    motivo = pd.Series('', index=df.index, dtype=object)
+    for cond, fmt, val in parti:
+        testo = pd.Series(np.char.mod(fmt + '  ', val.to_numpy(dtype=float)), index=df.index, dtype=object)
+        motivo = motivo + testo.where(cond, '')
+    return motivo.str.removesuffix('  ')
+
+def giornate_critiche(df: pd.DataFrame, soglia_ing: float, soglia_dip: float, soglia_fat: float) -> tuple:
+    """Open days over at least one threshold, as the dashboard table (Data,
+    Giorno, rounded figures, Motivo). Returns (table, number of open days)."""
+    aperti = df[df['fatturato'] > 0]
+    critici = aperti[
+        (aperti['pct_ingredienti'] > soglia_ing) |
+        (aperti['pct_dipendenti']  > soglia_dip) |
+        (aperti['fatturato']       < soglia_fat)
+    ].copy()
+    num = ['fatturato', 'poke_totali', 'pct_ingredienti', 'pct_dipendenti', 'utile_lordo']
+    critici['Giorno'] = critici['data'].dt.weekday.map(GIORNI_IT)
+    critici['Motivo'] = motivi_critici(critici, soglia_ing, soglia_dip, soglia_fat)
+    tabella = critici[['data', 'Giorno'] + num + ['Motivo']]
+    tabella[num] = tabella[num].round(1)
+    return tabella.rename(columns={
+        'data': 'Data', 'fatturato': 'Fatturato (€)', 'poke_totali': 'Poke',
+        'pct_ingredienti': '% Ing', 'pct_dipendenti': '% Dip',
+        'utile_lordo': 'Utile lordo (€)',
+    }), len(aperti)
@@ -0,0 +1,106 @@
+# Pokè To Go! – più negozi: caricamento parallelo e vista consolidata
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePath
+
+import pandas as pd
+
+from poketogo import archivio
+from poketogo.caricamento import COLONNE_DERIVATE, aggiungi_derivate
+from poketogo.memoria import a_float64, compatta_fornitori, compatta_giornaliero
+
+TUTTI = 'Tutti i negozi'
+
+def nome_negozio(nome_file: str) -> str:
+    """'procchio_giornaliero.csv' / 'Procchio-fornitori.csv' → 'procchio'."""
+    stem = PurePath(nome_file).stem
+    nome = re.sub(r'[\s_\-]*(giornaliero|fornitori)[\s_\-]*', '', stem, flags=re.IGNORECASE)
+    return (nome or stem).lower()
+
+def raggruppa(nomi_file) -> tuple:
+    """({negozio: nome_file}, [[nome_file, ...], ...]): the file used for each
+    store, and the groups of files that map to the same store name (e.g.
+    'Procchio.csv' and 'procchio_giornaliero.csv'), of which only the first
+    is used."""
+    gruppi = {}
+    for nome in nomi_file:
+        gruppi.setdefault(nome_negozio(nome), []).append(nome)
+    return {n: g[0] for n, g in gruppi.items()}, [g for g in gruppi.values() if len(g) > 1]
+
+def descrivi_doppioni(doppioni: list) -> str:
+    return '; '.join(f"{', '.join(g)} → {nome_negozio(g[0])}" for g in doppioni)
+
+def percorsi_cartella(cartella) -> tuple:
+    """({negozio: Path}, {negozio: Path}, doppioni) of the daily and supplier
+    CSVs in a folder (e.g. procchio_giornaliero.csv, procchio_fornitori.csv);
+    doppioni as in raggruppa."""
+    percorsi = {p.name: p for p in sorted(Path(cartella).glob('*.csv'))}
+    gio, doppi_gio   = raggruppa(f for f, p in percorsi.items() if 'fornitori' not in p.stem.lower())
+    forn, doppi_forn = raggruppa(f for f, p in percorsi.items() if 'fornitori' in p.stem.lower())
+    return ({n: percorsi[f] for n, f in gio.items()},
+            {n: percorsi[f] for n, f in forn.items()},
+            doppi_gio + doppi_forn)
+
+def file_cartella(cartella) -> tuple:
+    """Like percorsi_cartella, with the file contents instead of the paths.
+    Raises ValueError if two files map to the same store."""
+    gio, forn, doppioni = percorsi_cartella(cartella)
+    if doppioni:
+        raise ValueError(f"più file per lo stesso negozio: {descrivi_doppioni(doppioni)}")
+    return ({n: p.read_bytes() for n, p in gio.items()},
+            {n: p.read_bytes() for n, p in forn.items()})
+
+def abbina_fornitori(giornalieri: dict, fornitori: dict) -> dict:
+    """Supplier files keyed like the daily ones: with a single store the only
+    supplier file goes to it whatever its name."""
+    if len(giornalieri) == 1 and len(fornitori) == 1:
+        return {next(iter(giornalieri)): next(iter(fornitori.values()))}
+    return fornitori
+
+# ── CARICAMENTO ───────────────────────────────────────────────────────────────
+
+def carica_negozi(giornalieri: dict, fornitori: dict = None, max_workers: int = None) -> tuple:
+    """Load several stores ({negozio: bytes}) in a process pool.
+
+    Each file is parsed (and its costs distributed) in its own process,
+    going through the on-disk store first. Returns ({negozio: StatoGiornaliero},
+    {negozio: LetturaFornitori or None})."""
+    fornitori = fornitori or {}
+    n_file = len(giornalieri) + len(fornitori)
+    if n_file == 0:
+        return {}, {}
+    workers = min(n_file, max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        fut_g = {n: pool.submit(archivio.giornaliero, b) for n, b in giornalieri.items()}
+        fut_f = {n: pool.submit(archivio.fornitori, b) for n, b in fornitori.items()}
+        return (
+            {n: f.result() for n, f in fut_g.items()},
+            {n: f.result() for n, f in fut_f.items()},
+        )
+
+# ── VISTA CONSOLIDATA ─────────────────────────────────────────────────────────
+
+def unisci_giornalieri(stati: dict) -> tuple:
+    """Concatenate the stores' frames with a 'negozio' key column."""
+    ingred_cols = list(dict.fromkeys(c for s in stati.values() for c in s.ingred_cols))
+    df = pd.concat([s.df.assign(negozio=n) for n, s in stati.items()], ignore_index=True)
+    df_dist = pd.concat([s.df_dist for s in stati.values()], ignore_index=True)
+    return df, df_dist.reindex(columns=ingred_cols).fillna(0.0), ingred_cols
+
+def consolida(stati: dict) -> tuple:
+    """All stores summed day by day, with the derived columns recomputed on
+    the totals (ratios are ratios of sums, not averages of ratios)."""
+    lungo, dist_lungo, ingred_cols = unisci_giornalieri(stati)
+    grezze = [c for c in lungo.columns if c not in COLONNE_DERIVATE and c not in ('data', 'negozio')]
+    df = a_float64(lungo, grezze).groupby('data', sort=True)[grezze].sum(min_count=1).reset_index()
+    df_dist = dist_lungo.astype('float64').groupby(lungo['data'], sort=True).sum().reset_index(drop=True)
+    return compatta_giornaliero(aggiungi_derivate(df, df_dist)), df_dist, ingred_cols
+
+def unisci_fornitori(frames: dict):
+    frames = {n: f for n, f in frames.items() if f is not None}
+    if not frames:
+        return None
+    df = pd.concat([f.assign(negozio=n) for n, f in frames.items()], ignore_index=True)
+    return compatta_fornitori(df.sort_values('data', kind='stable').reset_index(drop=True))
@@ -0,0 +1,77 @@
+# Pokè To Go! – fette per periodo su frame ordinati per data
+
+import numpy as np
+import pandas as pd
+
+class IndiceDate:
+    """Positional date index over a frame sorted by 'data' (NaT last).
+
+    Windows are found by binary search and returned as slices, so that
+    frame.iloc[slice] is a view: with copy-on-write pandas copies only if
+    the caller modifies it. Frames aligned row by row with the indexed one
+    (df_dist with df) are sliced with the same positions, with no join."""
+
+    def __init__(self, date):
+        self.date = np.asarray(date)
+        self._validi = int(np.count_nonzero(~np.isnat(self.date)))
+
+    def _pos(self, t, lato: str) -> int:
+        chiave = np.datetime64(pd.Timestamp(t).to_datetime64()).astype(self.date.dtype)
+        return min(int(np.searchsorted(self.date[:self._validi], chiave, lato)), self._validi)
+
+    def tra(self, inizio=None, fine=None) -> slice:
+        """Rows with inizio <= data <= fine (either bound optional)."""
+        i0 = 0 if inizio is None else self._pos(inizio, 'left')
+        i1 = self._validi if fine is None else self._pos(fine, 'right')
+        return slice(i0, max(i0, i1))
+
+    def anno(self, anno: int) -> slice:
+        return slice(self._pos(pd.Timestamp(anno, 1, 1), 'left'), self._pos(pd.Timestamp(anno + 1, 1, 1), 'left'))
+
+# ── ALLINEAMENTO TRA ANNI ─────────────────────────────────────────────────────
+
+# 'calendario': stesso giorno e mese; 'settimana': stessa settimana ISO e stesso giorno della settimana
+ALLINEAMENTI = ('calendario', 'settimana')
+
+# Giorni dall'inizio dell'anno al primo del mese, in un anno bisestile
+_INIZIO_MESE = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+_ASSE = np.datetime64('2000-01-01')   # anno bisestile dell'asse dei grafici stagionali
+
+def _lunedi_settimana_1(anni: np.ndarray) -> np.ndarray:
+    """Monday of ISO week 1 (the week holding 4 January) of each year."""
+    gen4 = (anni - 1970).astype('datetime64[Y]').astype('datetime64[D]') + 3
+    return gen4 - (gen4.astype(np.int64) + 3) % 7   # 1970-01-01 era un giovedì
+
+def giorno_stagione(date, allinea: str = 'calendario') -> np.ndarray:
+    """Season-relative day of each date, the same number for matching days of
+    different years. 'calendario': position in a leap year (29 February has
+    its own day, 1 March is 60 in every year). 'settimana': days since the
+    Monday of ISO week 1, so equal numbers fall on the same weekday."""
+    if allinea not in ALLINEAMENTI:
+        raise ValueError(f"allinea deve essere uno di {ALLINEAMENTI}")
+    d = np.asarray(date, dtype='datetime64[D]')
+    anni = d.astype('datetime64[Y]').astype(np.int64) + 1970
+    if allinea == 'settimana':
+        return (d - _lunedi_settimana_1(anni)).astype(np.int64)
+    mese = d.astype('datetime64[M]')
+    return _INIZIO_MESE[(mese.astype(np.int64) % 12)] + (d - mese.astype('datetime64[D]')).astype(np.int64)
+
+class AllineamentoAnni:
+    """Season-relative day of every row of a frame sorted by 'data', for both
+    alignments, computed once per load: any row range can then be placed on
+    another year's season without parsing dates again."""
+
+    def __init__(self, date):
+        self.date = np.asarray(date, dtype='datetime64[D]')
+        self.giorni = {a: giorno_stagione(self.date, a) for a in ALLINEAMENTI}
+
+    def x(self, righe, anno_rif: int, allinea: str = 'calendario') -> np.ndarray:
+        """Rows placed on `anno_rif`'s season, as dates of the leap year 2000
+        (the seasonal charts' axis): each row lands on its matching day."""
+        g = self.giorni[allinea][righe]
+        if allinea == 'calendario':
+            return _ASSE + g
+        # Giorno corrispondente in anno_rif, poi la sua posizione sul calendario
+        d = _lunedi_settimana_1(np.array([anno_rif]))[0] + g
+        fuori = d.astype('datetime64[Y]').astype(np.int64) + 1970 - anno_rif   # -1/+1 a cavallo dell'anno
+        return _ASSE + giorno_stagione(d) + 366 * fuori
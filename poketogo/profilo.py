@@ -0,0 +1,213 @@
+# Pokè To Go! – tempi per rerun e contatori delle cache
+
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+# POKETOGO_PROFILO=1 mostra il pannello in sidebar (anche con ?debug=1 nell'URL);
+# POKETOGO_PROFILO_LOG=<file> aggiunge una riga JSON per ogni rerun.
+PANNELLO = os.environ.get('POKETOGO_PROFILO', '0') == '1'
+FILE_LOG = os.environ.get('POKETOGO_PROFILO_LOG')
+
+_corrente = contextvars.ContextVar('profilo', default=None)
+_NULLO = contextlib.nullcontext()
+
+class Profilo:
+    """Timing spans and cache counters of one script run.
+
+    Spans nest: each one records its name, start and duration (ms from the
+    start of the run) and depth. Cache counters are per cache name: hits,
+    misses and the bytes of the values returned."""
+
+    def __init__(self):
+        self.inizio = time.perf_counter()
+        self.span = []
+        self.cache = {}
+        self.terminato = False   # lo script è arrivato in fondo: i frammenti non ci scrivono più
+        self._livello = 0
+        self._tappa = None
+
+    def _registra(self, nome: str, t0: float, livello: int):
+        self.span.append({
+            'nome':    nome,
+            'inizio':  round((t0 - self.inizio) * 1000, 2),
+            'ms':      round((time.perf_counter() - t0) * 1000, 2),
+            'livello': livello,
+        })
+
+    @contextlib.contextmanager
+    def misura(self, nome: str):
+        t0 = time.perf_counter()
+        self._livello += 1
+        try:
+            yield
+        finally:
+            self._livello -= 1
+            self._registra(nome, t0, self._livello)
+
+    def tappa(self, nome: str):
+        """Close the current top-level section and open `nome`: sections of a
+        flat script are timed without indenting them under a with block."""
+        self.chiudi()
+        self._tappa = (nome, time.perf_counter())
+        self._livello = 1
+
+    def chiudi(self):
+        if self._tappa is not None:
+            self._registra(*self._tappa, 0)
+            self._tappa = None
+            self._livello = 0
+
+    def conta(self, nome: str, hit: bool, valore=None):
+        voce = self.cache.setdefault(nome, {'hit': 0, 'miss': 0, 'byte': 0})
+        voce['hit' if hit else 'miss'] += 1
+        voce['byte'] += dimensione(valore)
+
+    def totale_ms(self) -> float:
+        return (time.perf_counter() - self.inizio) * 1000
+
+    def tempi(self) -> pd.DataFrame:
+        """Spans grouped by name: calls, total and max ms, slowest first."""
+        if not self.span:
+            return pd.DataFrame(columns=['Passo', 'Chiamate', 'Totale (ms)', 'Max (ms)'])
+        s = pd.DataFrame(self.span)
+        out = s.groupby('nome', sort=False)['ms'].agg(['count', 'sum', 'max']).reset_index()
+        out.columns = ['Passo', 'Chiamate', 'Totale (ms)', 'Max (ms)']
+        return out.sort_values('Totale (ms)', ascending=False).round(1)
+
+    def contatori(self) -> pd.DataFrame:
+        righe = [{'Cache': n, 'Hit': v['hit'], 'Miss': v['miss'], 'MB': round(v['byte'] / 2**20, 2)}
+                 for n, v in self.cache.items()]
+        return pd.DataFrame(righe, columns=['Cache', 'Hit', 'Miss', 'MB'])
+
+    def registro(self, **extra) -> dict:
+        return {
+            'ts':        time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'pid':       os.getpid(),
+            'totale_ms': round(self.totale_ms(), 2),
+            **extra,
+            'span':      self.span,
+            'cache':     self.cache,
+        }
+
+    def scrivi(self, percorso: str, **extra) -> bool:
+        """Append the run as one JSON line; False if the file cannot be written."""
+        try:
+            with open(percorso, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.registro(**extra), ensure_ascii=False) + '\n')
+            return True
+        except OSError:
+            return False
+
+def avvia(abilitato: bool):
+    """New profile for this run (None when off); misura() and the cache
+    wrappers report to it."""
+    p = Profilo() if abilitato else None
+    _corrente.set(p)
+    return p
+
+def corrente():
+    return _corrente.get()
+
+def termina():
+    """Mark the run's profile as over: a fragment that reruns on its own
+    afterwards gets a new profile instead of appending to this one."""
+    p = _corrente.get()
+    if p is not None:
+        p.chiudi()
+        p.terminato = True
+
+@contextlib.contextmanager
+def frammento(nome: str, abilitato: bool):
+    """Profile of a fragment body. During the full run it is a span of the
+    run's profile and yields None; on a fragment-only rerun it yields a new
+    profile of its own (None when off), active only inside the block."""
+    p = _corrente.get()
+    if p is not None and not p.terminato:
+        with p.misura(nome):
+            yield None
+        return
+    proprio = Profilo() if abilitato else None
+    token = _corrente.set(proprio)
+    try:
+        if proprio is None:
+            yield None
+        else:
+            with proprio.misura(nome):
+                yield proprio
+    finally:
+        _corrente.reset(token)
+        if proprio is not None:
+            proprio.terminato = True
+
+def misura(nome: str):
+    """Timing span on the active profile; does nothing when profiling is off."""
+    p = _corrente.get()
+    return _NULLO if p is None else p.misura(nome)
+
+def tappa(nome: str):
+    p = _corrente.get()
+    if p is not None:
+        p.tappa(nome)
+
+def conta(nome: str, hit: bool, valore=None):
+    p = _corrente.get()
+    if p is not None:
+        p.conta(nome, hit, valore)
+
+def dimensione(valore) -> int:
+    """Approximate bytes held by a cached value (frames without deep inspection)."""
+    if valore is None:
+        return 0
+    if isinstance(valore, pd.DataFrame):
+        return int(valore.memory_usage().sum())
+    if isinstance(valore, pd.Series):
+        return int(valore.memory_usage())
+    if isinstance(valore, (bytes, bytearray, str)):
+        return len(valore)
+    if isinstance(valore, (tuple, list)):
+        return sum(dimensione(v) for v in valore)
+    if isinstance(valore, dict):
+        return sum(dimensione(v) for v in valore.values())
+    if dataclasses.is_dataclass(valore):
+        return sum(dimensione(getattr(valore, c.name)) for c in dataclasses.fields(valore))
+    return sys.getsizeof(valore)
+
+def cache_contata(cache):
+    """Wrap a caching decorator (st.cache_data, st.cache_resource) so each
+    call is timed and counted as a hit or a miss: the body only runs on a miss.
+
+        @cache_contata(st.cache_data)
+        def carica(...): ..."""
+    def decora(fn):
+        nome = fn.__name__
+        eseguito = contextvars.ContextVar(f'eseguito_{nome}', default=False)
+
+        @functools.wraps(fn)
+        def corpo(*args, **kwargs):
+            eseguito.set(True)
+            return fn(*args, **kwargs)
+
+        in_cache = cache(corpo)
+
+        @functools.wraps(fn)
+        def chiama(*args, **kwargs):
+            p = _corrente.get()
+            if p is None:
+                return in_cache(*args, **kwargs)
+            eseguito.set(False)
+            with p.misura(nome):
+                valore = in_cache(*args, **kwargs)
+            p.conta(nome, not eseguito.get(), valore)
+            return valore
+
+        chiama.clear = in_cache.clear
+        return chiama
+    return decora
@@ -0,0 +1,126 @@
+# Pokè To Go! – controllo qualità del file giornaliero
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from poketogo.colonne import CATEGORIE_ING
+from poketogo.caricamento import colonne_dipendente
+
+@dataclass
+class Avviso:
+    livello: str     # 'warning' = probabile errore nel CSV, 'info' = solo segnalazione
+    messaggio: str
+
+# ── REGOLE PER RIGA ───────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Regola:
+    """A row check: `condizione` maps the columns (numpy arrays, see
+    _colonne) to a boolean mask of the rows that break it."""
+    nome: str
+    etichetta: str           # breve, per la tabella delle righe segnalate
+    messaggio: str           # {n} righe (o date) segnalate, {date} le prime 5
+    condizione: Callable
+    per_data: bool = False   # conta e mostra le date distinte invece delle righe
+
+def _date_ripetute(c: dict) -> np.ndarray:
+    # Frame ordinato per data: le date ripetute sono adiacenti
+    uguale = c['data'][1:] == c['data'][:-1]
+    m = np.zeros(len(c['data']), dtype=bool)
+    m[1:] |= uguale
+    m[:-1] |= uguale
+    return m
+
+REGOLE = [
+    Regola('date_duplicate', "data ripetuta",
+           "⚠️ {n} date inserite più di una volta: {date}",
+           _date_ripetute, per_data=True),
+    Regola('incasso_senza_poke', "incasso senza poke",
+           "⚠️ {n} giorni con incasso registrato ma nessun poke nel conteggio: {date}",
+           lambda c: (c['fatturato'] > 0) & (c['poke_totali'] == 0)),
+    Regola('poke_senza_incasso', "poke senza incasso",
+           "⚠️ {n} giorni con poke registrati ma incasso assente: {date}",
+           lambda c: (c['poke_totali'] > 0) & (np.nan_to_num(c['fatturato']) == 0)),
+    Regola('incasso_mancante', "rifornimento senza incasso",
+           "⚠️ {n} giorni con rifornimenti registrati ma incasso non compilato: {date}",
+           lambda c: np.isnan(c['fatturato']) & (c['ing_dist'] > 0)),
+]
+
+def _colonne(df: pd.DataFrame) -> dict:
+    """The columns the rules read, extracted once (numbers as float, NaN for missing)."""
+    c = {'data': df['data'].to_numpy()}
+    for nome in ['fatturato', 'poke_totali', 'ing_dist']:
+        c[nome] = df[nome].to_numpy(dtype=float, na_value=np.nan)
+    return c
+
+@dataclass
+class Verifica:
+    flag: np.ndarray                               # per riga: bit i = regola i violata
+    regole: list
+    conteggi: dict = field(default_factory=dict)   # regola → righe (o date) segnalate
+    esempi: dict = field(default_factory=dict)     # regola → prime date segnalate, gg/mm/aaaa
+    avvisi: list = field(default_factory=list)     # Avviso delle regole violate, poi quelli sulle colonne
+
+def valuta_regole(df: pd.DataFrame, regole: list = REGOLE) -> Verifica:
+    """Evaluate every rule on the frame (sorted by data) with the columns
+    read once; only the few example dates are formatted as text."""
+    c = _colonne(df)
+    tipo = np.min_scalar_type(2 ** max(len(regole), 1) - 1)
+    flag = np.zeros(len(df), dtype=tipo)
+    v = Verifica(flag, regole)
+    for bit, r in enumerate(regole):
+        m = np.asarray(r.condizione(c), dtype=bool)
+        flag |= m.astype(tipo) << tipo.type(bit)
+        date = c['data'][m]
+        if r.per_data and len(date):
+            date = date[np.r_[True, date[1:] != date[:-1]]]
+        v.conteggi[r.nome] = len(date)
+        v.esempi[r.nome] = list(pd.DatetimeIndex(date[:5]).strftime('%d/%m/%Y'))
+    return v
+
+def righe_segnalate(verifica: Verifica, df: pd.DataFrame) -> pd.DataFrame:
+    """Flagged rows: Data and the labels of the rules they break."""
+    pos = np.flatnonzero(verifica.flag)
+    f = verifica.flag[pos]
+    # Un'etichetta per combinazione di bit presente, non per riga
+    etichette = {
+        int(val): ' · '.join(r.etichetta for bit, r in enumerate(verifica.regole) if int(val) >> bit & 1)
+        for val in np.unique(f)
+    }
+    return pd.DataFrame({
+        'Data':      df['data'].iloc[pos].dt.strftime('%d/%m/%Y').to_numpy(),
+        'Controlli': [etichette[int(val)] for val in f],
+    })
+
+# ── CONTROLLO COMPLETO ────────────────────────────────────────────────────────
+
+def _avvisi_colonne(df: pd.DataFrame, ingred_cols: list) -> list:
+    avvisi = []
+    # Colonne dipendente extra rilevate
+    dip_extra = [c for c in colonne_dipendente(df.columns) if c != 'Dipendente']
+    if dip_extra:
+        avvisi.append(Avviso('info', f"ℹ️ Rilevate {len(dip_extra)+1} colonne dipendente ({', '.join(['Dipendente']+dip_extra)}) — sommate automaticamente nel costo lavoro."))
+
+    # Ingredienti non classificati in nessuna categoria
+    ing_noti = set(sum(CATEGORIE_ING.values(), []))
+    ing_nuovi = [c for c in ingred_cols if c not in ing_noti]
+    if ing_nuovi:
+        avvisi.append(Avviso('info', f"ℹ️ {len(ing_nuovi)} ingredienti non ancora categorizzati (appaiono in Rifornimenti → Tutti): {', '.join(ing_nuovi[:8])}"))
+    return avvisi
+
+def verifica_giornaliero(df: pd.DataFrame, ingred_cols: list, regole: list = REGOLE) -> Verifica:
+    """Data-entry checks on the processed daily frame: per-row flags, counts
+    and the warnings to show."""
+    v = valuta_regole(df, regole)
+    v.avvisi = [
+        Avviso('warning', r.messaggio.format(n=v.conteggi[r.nome], date=', '.join(v.esempi[r.nome])))
+        for r in regole if v.conteggi[r.nome]
+    ] + _avvisi_colonne(df, ingred_cols)
+    return v
+
+def controlla_giornaliero(df: pd.DataFrame, ingred_cols: list) -> list:
+    """Data-entry checks on the processed daily frame, as a list of Avviso."""
+    return verifica_giornaliero(df, ingred_cols).avvisi
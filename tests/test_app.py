@@ -0,0 +1,188 @@
+# Pokè To Go! – la dashboard con AppTest, confrontata con quella di partenza
+#
+# tests/snapshot/baseline/ contiene due CSV di esempio e ciò che la dashboard
+# originale (commit f7177a6, app.py in un solo file) mostra caricandoli:
+# metriche, tabelle, avvisi e il CSV "analisi periodo". Il riferimento non si rigenera dall'albero
+# corrente; solo da un checkout di quel commit:
+#   git worktree add /tmp/base f7177a6
+#   POKETOGO_BASELINE_APP=/tmp/base/app.py python -m pytest tests/test_app.py -k baseline
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from poketogo import archivio, database, generatori, meteo
+
+RADICE   = Path(__file__).resolve().parents[1]
+BASELINE = Path(__file__).parent / 'snapshot' / 'baseline'
+VISTE    = ['Tutti i negozi', 'negozio_1', 'negozio_2']
+ORDINI   = 'data,ingrediente,fornitore,quantita,unita,spesa,prezzo_unitario'
+
+# Carica i due CSV di BASELINE dai file_uploader, in qualunque versione dell'app
+CON_UPLOAD = """
+import io, os, runpy, sys
+import streamlit as st
+
+class _Caricato(io.BytesIO):
+    def __init__(self, percorso):
+        super().__init__(open(percorso, 'rb').read())
+        self.name = os.path.basename(percorso)
+        self.file_id = percorso
+        self.size = len(self.getvalue())
+
+def _carica(label, *args, **kwargs):
+    nome = 'giornaliero' if 'Giornaliero' in label else 'fornitori' if 'Fornitori' in label else None
+    if nome is None:
+        return None
+    f = _Caricato(os.path.join({cartella!r}, nome + '.csv'))
+    return [f] if kwargs.get('accept_multiple_files') else f
+
+scarica = st.download_button
+
+def _scarica(label, data=None, *args, **kwargs):
+    if label.startswith('📥 Scarica analisi'):
+        with open({esportato!r}, 'wb') as f:
+            f.write(data() if callable(data) else data)
+    return scarica(label, data, *args, **kwargs)
+
+originale, cartella = st.file_uploader, os.getcwd()
+st.file_uploader = st.sidebar.file_uploader = _carica
+st.download_button = _scarica
+os.chdir({radice!r})
+sys.path.insert(0, {radice!r})
+try:
+    runpy.run_path({app!r}, run_name='__main__')
+finally:
+    st.file_uploader = originale
+    st.download_button = scarica
+    del st.sidebar.file_uploader
+    os.chdir(cartella)
+    sys.path.remove({radice!r})
+"""
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    """Archive in tmp, no network, clean caches."""
+    monkeypatch.delenv('POKETOGO_DATI', raising=False)
+    monkeypatch.delenv('POKETOGO_DB', raising=False)
+    monkeypatch.setattr(archivio, 'DIR_ARCHIVIO', tmp_path / 'archivio')
+    monkeypatch.setattr(meteo, 'URL_METEO', 'http://127.0.0.1:9/')   # meteo non disponibile
+    monkeypatch.chdir(RADICE)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    return tmp_path
+
+@pytest.fixture
+def dati(ambiente, monkeypatch):
+    """Two generated stores in a POKETOGO_DATI folder."""
+    cartella = ambiente / 'dati'
+    cartella.mkdir()
+    for negozio, (gio, forn) in generatori.genera_negozi(2).items():
+        (cartella / f'{negozio}_giornaliero.csv').write_bytes(gio)
+        (cartella / f'{negozio}_fornitori.csv').write_bytes(forn)
+    monkeypatch.setenv('POKETOGO_DATI', str(cartella))
+    return cartella
+
+def _pagina(app: Path, tmp_path: Path) -> dict:
+    """What `app` shows with the baseline CSVs uploaded: metrics, tables
+    (by header line), warnings, notes and the period CSV download."""
+    esportato = tmp_path / 'analisi_periodo.csv'
+    codice = CON_UPLOAD.format(cartella=str(BASELINE), radice=str(app.parent), app=str(app), esportato=str(esportato))
+    at = AppTest.from_string(codice, default_timeout=300).run()
+    assert not at.exception, [e.message for e in at.exception]
+    tabelle = [t.value.to_csv(index=False) for t in at.dataframe]
+    return {
+        'metriche': [[m.label, m.value, m.delta] for m in at.metric],
+        'tabelle':  {t.split('\n', 1)[0]: t for t in tabelle},
+        'avvisi':   [a.value for a in at.warning],
+        'note':     [i.value for i in at.info],
+        'export':   esportato.read_text(encoding='utf-8'),
+    }
+
+def _righe_per_data(tabella: str) -> list:
+    # A parità di data l'originale (sort non stabile) non fissava l'ordine degli ordini
+    return sorted(tabella.splitlines())
+
+def _come_baseline(tmp_path: Path):
+    atteso = json.loads((BASELINE / 'pagina.json').read_text())
+    ottenuto = _pagina(RADICE / 'app.py', tmp_path)
+    for parte in ('metriche', 'avvisi', 'note', 'export'):
+        assert ottenuto[parte] == atteso[parte], parte
+    # Ogni tabella dell'originale c'è ancora, identica; quelle nuove non contano
+    for intestazione, tabella in atteso['tabelle'].items():
+        assert intestazione in ottenuto['tabelle'], intestazione
+        if intestazione == ORDINI:
+            assert _righe_per_data(ottenuto['tabelle'][intestazione]) == _righe_per_data(tabella)
+        else:
+            assert ottenuto['tabelle'][intestazione] == tabella, intestazione
+
+def test_dashboard_come_baseline(ambiente):
+    app_baseline = os.environ.get('POKETOGO_BASELINE_APP')
+    if app_baseline:
+        pagina = _pagina(Path(app_baseline).resolve(), ambiente)
+        (BASELINE / 'pagina.json').write_text(json.dumps(pagina, ensure_ascii=False, indent=1))
+        pytest.skip("riferimento rigenerato dall'app originale")
+    _come_baseline(ambiente)
+
+@pytest.mark.filterwarnings('error::UserWarning')   # es. round() su colonne di date
+def test_dashboard_come_baseline_con_database(ambiente, monkeypatch):
+    monkeypatch.setattr(database, 'PERCORSO', str(ambiente / 'poketogo.db'))
+    _come_baseline(ambiente)
+
+@pytest.mark.filterwarnings('error::UserWarning')
+def test_dashboard_piu_negozi(dati):
+    at = AppTest.from_file(str(RADICE / 'app.py'), default_timeout=120).run()
+    selettore = next(s for s in at.selectbox if s.label == '🏬 Negozio')
+    assert list(selettore.options) == VISTE
+    for negozio in VISTE[1:]:
+        selettore.set_value(negozio).run()
+        assert not at.exception, [e.message for e in at.exception]
+        selettore = next(s for s in at.selectbox if s.label == '🏬 Negozio')
+        assert len(at.metric) == 19
+
+def test_dashboard_senza_dati(ambiente):
+    at = AppTest.from_file(str(RADICE / 'app.py'), default_timeout=60).run()
+    assert not at.exception
+    assert any(i.value.startswith("Carica il CSV giornaliero") for i in at.info)
+
+def test_cartella_rihasha_solo_file_cambiati(dati, monkeypatch):
+    from poketogo import caricamento
+    hashati = []
+    originale = caricamento.impronta
+    monkeypatch.setattr(caricamento, 'impronta', lambda b: hashati.append(len(b)) or originale(b))
+    at = AppTest.from_file(str(RADICE / 'app.py'), default_timeout=120).run()
+    assert len(hashati) == 4
+    at.run()
+    assert len(hashati) == 4                  # rerun: nessun file riletto
+    with open(dati / 'negozio_1_fornitori.csv', 'ab') as f:
+        f.write(b'\n')
+    at.run()
+    assert len(hashati) == 5 and not at.exception
+
+def test_cartella_due_file_stesso_negozio(dati):
+    (dati / 'Negozio_1.csv').write_bytes((dati / 'negozio_2_giornaliero.csv').read_bytes())
+    at = AppTest.from_file(str(RADICE / 'app.py'), default_timeout=120).run()
+    assert not at.exception
+    assert any('Negozio_1.csv, negozio_1_giornaliero.csv → negozio_1' in a.value for a in at.warning)
+    assert [o for o in next(s for s in at.selectbox if s.label == '🏬 Negozio').options] == VISTE
+
+def test_cartella_righe_aggiunte_in_coda(dati, monkeypatch):
+    from poketogo import caricamento
+    hashati = []
+    originale = caricamento.impronta
+    monkeypatch.setattr(caricamento, 'impronta', lambda b: hashati.append(len(b)) or originale(b))
+    at = AppTest.from_file(str(RADICE / 'app.py'), default_timeout=120).run()
+    file = dati / 'negozio_1_giornaliero.csv'
+    prima = file.read_bytes()
+    ultima = prima.rstrip(b'\n').rsplit(b'\n', 1)[1]
+    file.write_bytes(prima + b'01/10/2025' + ultima[ultima.index(b';'):] + b'\n')
+    del hashati[:]
+    at.run()
+    assert not at.exception
+    # impronta del file nuovo, poi quella del prefisso già elaborato una sola volta
+    assert hashati[:2] == [file.stat().st_size, len(prima)] and hashati.count(len(prima)) == 1
+
@@ -0,0 +1,45 @@
+# Pokè To Go! – analisi senza browser (python -m poketogo.batch)
+
+import json
+
+import pandas as pd
+import pytest
+
+from poketogo import archivio, batch, generatori
+from poketogo.caricamento import carica_stato
+from poketogo.esporta import esporta_periodo
+from poketogo.periodi import IndiceDate
+
+@pytest.fixture
+def cartella(tmp_path, monkeypatch):
+    monkeypatch.setattr(archivio, 'DIR_ARCHIVIO', tmp_path / 'archivio')   # ereditato dai processi del pool
+    dati = tmp_path / 'dati'
+    dati.mkdir()
+    for nome, (gio, forn) in generatori.genera_negozi(2, n_fornitori=3).items():
+        (dati / f'{nome}_giornaliero.csv').write_bytes(gio)
+        (dati / f'{nome}_fornitori.csv').write_bytes(forn)
+    return dati
+
+def test_batch_scrive_ogni_vista(cartella, tmp_path, capsys):
+    uscita = tmp_path / 'uscita'
+    assert batch.main([str(cartella), str(uscita), '--formato', 'csv', 'json', '--workers', '2']) == 0
+    assert sorted(p.name for p in uscita.iterdir()) == ['negozio_1', 'negozio_2', 'tutti_i_negozi']
+    assert 'negozio_1' in capsys.readouterr().out
+
+    df = carica_stato((cartella / 'negozio_1_giornaliero.csv').read_bytes()).df
+    anno = int(df['anno'].max())
+    vista = uscita / 'negozio_1'
+    # stesso file, stessi byte del download della dashboard
+    export = vista / f'analisi_poketogo_negozio_1_{anno}.csv'
+    assert export.read_bytes() == esporta_periodo(df.iloc[IndiceDate(df['data']).anno(anno)])
+    briefing = json.loads((vista / 'briefing.json').read_text(encoding='utf-8'))
+    assert briefing['anno'] == anno and briefing['anno_prec'] == anno - 1
+    assert briefing['fornitori']['monitorati'] > 0
+    for nome in ['stagioni', 'giornate_critiche', 'prezzi_da_monitorare', 'anomalie_prezzi', 'prezzi_in_crescita']:
+        assert (vista / f'{nome}.csv').exists() and (vista / f'{nome}.json').exists()
+    stagioni = pd.read_csv(vista / 'stagioni.csv', sep=';')
+    assert len(stagioni) == len(pd.read_json(vista / 'stagioni.json'))
+
+def test_batch_cartella_senza_giornaliero(tmp_path, capsys):
+    assert batch.main([str(tmp_path), str(tmp_path / 'uscita')]) == 1
+    assert 'nessun CSV giornaliero' in capsys.readouterr().err
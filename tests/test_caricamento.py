@@ -0,0 +1,114 @@
+# Pokè To Go! – lettura dei CSV e ingestione incrementale
+
+import io
+
+import pandas as pd
+import pytest
+
+from poketogo import generatori, memoria
+from poketogo.caricamento import (
+    carica_stato, elabora_fornitori, elabora_giornaliero, estendi_giornaliero, leggi_fornitori,
+)
+from poketogo.esporta import esporta_periodo
+
+def _prefisso(file_bytes: bytes, righe_tolte: int) -> bytes:
+    righe = file_bytes.rstrip(b'\n').split(b'\n')
+    return b'\n'.join(righe[:-righe_tolte]) + b'\n'
+
+def test_estensione_come_caricamento_completo():
+    gio = generatori.genera_csv_giornaliero()
+    for tolte in (1, 7, 40):
+        inc = estendi_giornaliero(carica_stato(_prefisso(gio, tolte)), gio)
+        full = carica_stato(gio)
+        assert (inc.impronta, inc.n_bytes) == (full.impronta, full.n_bytes)
+        pd.testing.assert_frame_equal(inc.df_dist, full.df_dist, rtol=1e-12)
+        pd.testing.assert_frame_equal(inc.df, full.df, rtol=1e-12)
+
+def _con_vuoti(file_bytes: bytes, colonne: list) -> bytes:
+    righe = file_bytes.decode().rstrip('\n').split('\n')
+    pos = [righe[0].split(';').index(c) for c in colonne]
+    for i in range(3, len(righe), 17):
+        campi = righe[i].split(';')
+        for p in pos:
+            campi[p] = ''
+        righe[i] = ';'.join(campi)
+    return ('\n'.join(righe) + '\n').encode()
+
+def test_export_come_frame_non_compattato(monkeypatch):
+    gio = _con_vuoti(generatori.genera_csv_giornaliero(), ['poke_maxi', 'Sorbetti_venduti'])
+    compatto, _, _ = elabora_giornaliero(gio)
+    monkeypatch.setattr(memoria, 'COMPATTO', False)
+    pieno, _, _ = elabora_giornaliero(gio)
+    assert str(compatto['poke_reglular'].dtype) == 'Int32'
+    assert compatto['poke_maxi'].dtype == 'float64'      # con vuoti: "6.0" come in pandas
+    assert compatto['poke_totali'].dtype == 'float64'
+    assert esporta_periodo(compatto) == esporta_periodo(pieno)
+
+FORNITORI_VIRGOLETTE = (
+    b'data;ingrediente;fornitore;quantita;unita;spesa\n'
+    b'01/06/2025;salmone;"Rossi; figli";2;kg;60\n'
+    b'02/06/2025;tonno;Mario Pesca;3;kg;90;in piu;ancora\n'
+    b'03/06/2025;riso;"Grossisti\nElba";5;kg;20\n'
+    b'04/06/2025;salmone;"Rossi; figli";1;kg;31\n'
+)
+
+def test_fornitori_campi_tra_virgolette_e_righe_in_eccesso():
+    for byte_blocco in (10, 45, 2**20):   # blocchi che tagliano i record in punti diversi
+        lettura = leggi_fornitori(FORNITORI_VIRGOLETTE, byte_blocco=byte_blocco)
+        df = lettura.df
+        assert df['fornitore'].astype(str).tolist() == ['Rossi; figli', 'Grossisti\nElba', 'Rossi; figli']
+        assert df['spesa'].tolist() == [60, 20, 31]
+        assert lettura.n_errori == 1
+        assert lettura.errori[['riga', 'motivo']].values.tolist() == [[3, 'campi in eccesso']]
+
+def test_fornitori_errori_di_riga():
+    csv = (b'data;ingrediente;fornitore;quantita;unita;spesa\n'
+           b'01/06/2025;salmone;Rossi;2;kg;60\n'
+           b';tonno;Rossi;1;kg;30\n'
+           b'31/02/2025;tonno;Rossi;1;kg;30\n'
+           b'03/06/2025;riso;Elba;tanti;kg;20\n')
+    lettura = leggi_fornitori(csv, max_errori=2)
+    assert len(lettura.df) == 2
+    assert lettura.n_errori == 3                    # tutti contati, solo max_errori conservati
+    assert lettura.errori.values.tolist() == [
+        [3, 'data', '', 'data mancante'], [4, 'data', '31/02/2025', 'data non valida'],
+    ]
+    assert pd.isna(lettura.df['prezzo_unitario'].iloc[1])
+
+def _con_errori(file_bytes: bytes) -> bytes:
+    """Supplier CSV with one bad value every 17 lines, rotating the kind."""
+    righe = file_bytes.decode().rstrip('\n').split('\n')
+    for n, i in enumerate(range(5, len(righe), 17)):
+        campi = righe[i].split(';')
+        if n % 4 == 0:
+            campi[0] = ''
+        elif n % 4 == 1:
+            campi[0] = '31/02/2025'
+        elif n % 4 == 2:
+            campi[3] = 'tanti'
+        else:
+            campi.append('in piu')
+        righe[i] = ';'.join(campi)
+    return ('\n'.join(righe) + '\n').encode()
+
+def test_fornitori_errori_uguali_con_ogni_blocco(tmp_path):
+    forn = _con_errori(generatori.genera_csv_fornitori())
+    righe = forn.decode().split('\n')
+    intera = leggi_fornitori(forn, byte_blocco=2**24)
+    assert intera.n_errori == len(intera.errori) > 20
+    assert set(intera.errori['motivo']) == {'data mancante', 'data non valida', 'numero non valido', 'campi in eccesso'}
+    for riga, valore in intera.errori[['riga', 'valore']].values:
+        assert valore[:20] in righe[riga - 1]          # riga 1 = intestazione
+    percorso = tmp_path / 'fornitori.csv'
+    percorso.write_bytes(forn)
+    for sorgente, byte_blocco in [(forn, 300), (forn, 4096), (percorso, 1000), (io.BytesIO(forn), 777)]:
+        lettura = leggi_fornitori(sorgente, byte_blocco=byte_blocco)
+        pd.testing.assert_frame_equal(lettura.errori, intera.errori)
+        pd.testing.assert_frame_equal(lettura.df, intera.df, check_categorical=False)
+        assert lettura.n_errori == intera.n_errori
+
+def test_fornitori_senza_colonne_obbligatorie():
+    csv = b'data;ingrediente;quantita\n01/06/2025;salmone;2\n'
+    with pytest.raises(ValueError, match='fornitore, spesa'):
+        leggi_fornitori(csv)
+    assert elabora_fornitori(csv) is None
@@ -0,0 +1,34 @@
+# Pokè To Go! – distribuzione dei costi di rifornimento
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from poketogo import generatori
+from poketogo.caricamento import colonne_ingredienti, leggi_giornaliero
+from poketogo.costi import distribuisci_costi, distribuisci_costi_iterativo
+
+def _giorni(date, **colonne) -> pd.DataFrame:
+    return pd.DataFrame({'data': pd.to_datetime(date), **colonne})
+
+def test_come_riferimento_su_dati_di_esempio():
+    df = leggi_giornaliero(generatori.genera_csv_giornaliero(n_ingredienti=12))
+    ingred_cols = colonne_ingredienti(df.columns)
+    pd.testing.assert_frame_equal(distribuisci_costi(df, ingred_cols),
+                                  distribuisci_costi_iterativo(df, ingred_cols), rtol=1e-12)
+
+def test_come_riferimento_su_casi_limite():
+    df = _giorni(
+        ['2024-12-29', '2024-12-30', '2024-12-31', None, '2025-01-02', '2025-01-02', '2025-01-05'],
+        salmone=[90.0, np.nan, 0.0, 40.0, np.nan, 10.0, np.nan],
+        tonno=[np.nan] * 7,
+        riso=[np.nan, 30.0, np.nan, np.nan, 12.0, np.nan, 6.0],
+    )
+    pd.testing.assert_frame_equal(distribuisci_costi(df, ['salmone', 'tonno', 'riso']),
+                                  distribuisci_costi_iterativo(df, ['salmone', 'tonno', 'riso']), rtol=1e-12)
+
+def test_fino_al_rifornimento_successivo_senza_passare_l_anno():
+    df = _giorni(['2024-12-30', '2024-12-31', '2025-01-01', '2025-01-02'], riso=[20.0, np.nan, 9.0, np.nan])
+    dist = distribuisci_costi(df, ['riso'])['riso']
+    assert dist.tolist() == pytest.approx([10.0, 10.0, 4.5, 4.5])
+    assert dist.sum() == pytest.approx(df['riso'].sum())
@@ -0,0 +1,98 @@
+# Pokè To Go! – database SQLite locale contro i calcoli sui frame
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from poketogo import database, generatori
+from poketogo.caricamento import carica_stato, impronta, leggi_fornitori
+from poketogo.cubo import costruisci_cubo
+from poketogo.fornitori import statistiche_ingredienti
+from poketogo.kpi import confronto_stagioni
+from poketogo.negozi import consolida
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'PERCORSO', str(tmp_path / 'poketogo.db'))
+    return tmp_path / 'poketogo.db'
+
+@pytest.fixture(scope='module')
+def negozio():
+    gio, forn = generatori.genera_negozi(1)['negozio_1']
+    return carica_stato(gio), impronta(forn), leggi_fornitori(forn)
+
+def _versione(osservatore) -> int:
+    return osservatore.execute('PRAGMA data_version').fetchone()[0]
+
+def test_file_gia_importato_non_scrive(db, negozio):
+    stato, chiave_forn, lettura = negozio
+    assert database.importa_giornaliero('a', stato)
+    assert database.importa_fornitori('a', chiave_forn, lettura)
+    with sqlite3.connect(db) as osservatore:
+        prima = _versione(osservatore)
+        assert not database.importa_giornaliero('a', stato)
+        assert not database.importa_fornitori('a', chiave_forn, lettura)
+        assert _versione(osservatore) == prima   # cambia solo se un'altra connessione scrive
+
+def test_schema_preparato_una_volta(db, monkeypatch):
+    istruzioni = []
+    connetti = sqlite3.connect
+
+    def tracciata(*args, **kwargs):
+        con = connetti(*args, **kwargs)
+        con.set_trace_callback(istruzioni.append)
+        return con
+
+    monkeypatch.setattr(sqlite3, 'connect', tracciata)
+    for _ in range(3):
+        with database.connessione() as con:
+            con.execute('SELECT 1')
+    assert sum('CREATE TABLE' in i for i in istruzioni) == len(database.TABELLE)
+    assert sum('journal_mode' in i for i in istruzioni) == 1
+
+def test_statistiche_ingredienti_come_pandas_con_prezzi_alti(db):
+    righe = [f'{g:02d}/06/2025;tartufo;Rossi;1;kg;{1e8 + d}' for g, d in zip(range(1, 8), (0.01, 0.02, 0.03, 0.01, 0.05, 0.02, 0.04))]
+    righe += ['01/06/2025;riso;Elba;2;kg;8', '03/06/2025;riso;Elba;2;kg;9', '02/06/2025;sale;Elba;1;kg;1']
+    forn = ('data;ingrediente;fornitore;quantita;unita;spesa\n' + '\n'.join(righe) + '\n').encode()
+    lettura = leggi_fornitori(forn)
+    database.importa_fornitori('a', impronta(forn), lettura)
+    sql = database.statistiche_ingredienti({'a': impronta(forn)})
+    attese = statistiche_ingredienti(lettura.df)
+    pd.testing.assert_frame_equal(sql, attese, check_dtype=False, check_index_type=False,
+                                  check_categorical=False, rtol=1e-9)
+    assert sql.loc['tartufo', 'std'] == pytest.approx(0.0151186, rel=1e-4)
+    assert pd.isna(sql.loc['sale', 'std'])
+
+def _csv_maiuscole() -> bytes:
+    gio = generatori.genera_csv_giornaliero(anni=(2025,), n_ingredienti=6)
+    intestazione, resto = gio.split(b'\n', 1)
+    colonne = intestazione.split(b';')
+    ingredienti = [c for c in colonne if c.lower() in (b'salmone', b'tonno')]
+    assert len(ingredienti) == 2
+    colonne[colonne.index(ingredienti[1])] = ingredienti[0].swapcase()   # es. salmone e SALMONE
+    return b';'.join(colonne) + b'\n' + resto
+
+def test_ingredienti_diversi_solo_per_maiuscole(db):
+    stato = carica_stato(_csv_maiuscole())
+    assert len({c.lower() for c in stato.ingred_cols}) < len(stato.ingred_cols)
+    assert database.importa_giornaliero('a', stato)
+    df, df_dist = database.periodo({'a': stato.impronta}, '2025-01-01', '2025-12-31')
+    pd.testing.assert_frame_equal(df, stato.df, check_exact=False, rtol=1e-12)
+    pd.testing.assert_frame_equal(df_dist, stato.df_dist)
+
+def test_periodo_e_stagioni_come_frame(db):
+    stati = {n: carica_stato(g) for n, (g, _) in generatori.genera_negozi(2).items()}
+    for n, s in stati.items():
+        database.importa_giornaliero(n, s)
+    viste = [({n: s.impronta}, s.df, s.df_dist) for n, s in stati.items()]
+    df, df_dist, _ = consolida(stati)
+    viste.append(({n: s.impronta for n, s in stati.items()}, df, df_dist))
+    for negozi, df, df_dist in viste:
+        pd.testing.assert_frame_equal(database.confronto_stagioni(negozi, 150), confronto_stagioni(costruisci_cubo(df), 150),
+                                      check_dtype=False, check_index_type=False, check_names=False, rtol=1e-9)
+        giugno = (df['data'] >= '2025-06-10') & (df['data'] <= '2025-06-30')
+        sel, sel_dist = database.periodo(negozi, '2025-06-10', '2025-06-30')
+        pd.testing.assert_frame_equal(sel, df[giugno], check_exact=False, rtol=1e-12)
+        pd.testing.assert_frame_equal(sel_dist, df_dist[giugno])
+    assert database.periodo(viste[0][0], '2030-01-01', '2030-12-31')[0].empty
@@ -0,0 +1,92 @@
+# Pokè To Go! – statistiche e analisi dei prezzi dei fornitori
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from poketogo import generatori
+from poketogo.caricamento import leggi_fornitori
+from poketogo.fornitori import (
+    HUBER_K, METODI_TREND, METODI_ZSCORE, statistiche_ingredienti, trend_prezzi, zscore_prezzi,
+)
+
+def test_statistiche_a_blocchi_come_su_tutto_il_file():
+    forn = generatori.genera_csv_fornitori(n_fornitori=3)
+    lettura = leggi_fornitori(forn, byte_blocco=2_000)
+    completo = statistiche_ingredienti(leggi_fornitori(forn, byte_blocco=len(forn) + 1).df)
+    pd.testing.assert_frame_equal(lettura.stats, completo, check_dtype=False, check_index_type=False,
+                                  check_categorical=False, rtol=1e-12)
+
+def _zscore_riferimento(df: pd.DataFrame, metodo: str, finestra: int, span: int,
+                        min_ordini: int) -> pd.DataFrame:
+    """zscore_prezzi with one loop per order over the previous prices."""
+    v = df[df['prezzo_unitario'].notna() & df['ingrediente'].notna()].sort_values(['ingrediente', 'data'], kind='stable')
+    media, std = pd.Series(np.nan, index=v.index), pd.Series(np.nan, index=v.index)
+    for _, g in v.groupby('ingrediente', sort=True, observed=True):
+        x = g['prezzo_unitario'].astype(float)
+        if metodo == 'esponenziale':
+            ewm = x.ewm(span=span)
+            media[g.index], std[g.index] = ewm.mean().shift(1), ewm.std().shift(1)
+            continue
+        for i, etichetta in enumerate(g.index):
+            prec = x.iloc[:i] if metodo == 'espanso' else x.iloc[max(0, i - finestra):i]
+            media[etichetta], std[etichetta] = prec.mean(), prec.std()
+    prec = v.groupby('ingrediente', sort=True, observed=True).cumcount()
+    z = ((v['prezzo_unitario'] - media) / std).where((prec >= min_ordini - 1) & (std > 0))
+    return pd.DataFrame({'media_rif': media, 'std_rif': std, 'zscore': z})
+
+def test_zscore_come_riferimento():
+    df = leggi_fornitori(generatori.genera_csv_fornitori(n_fornitori=3)).df
+    for metodo in METODI_ZSCORE:
+        z = zscore_prezzi(df, metodo, finestra=6, span=8, min_ordini=4, soglia=1.5)
+        atteso = _zscore_riferimento(df, metodo, finestra=6, span=8, min_ordini=4)
+        assert z['data'].is_monotonic_increasing
+        assert z['zscore'].notna().sum() > 100
+        pd.testing.assert_frame_equal(z[['media_rif', 'std_rif', 'zscore']], atteso.loc[z.index], rtol=1e-9)
+        np.testing.assert_array_equal(z['anomalia'], atteso.loc[z.index, 'zscore'] > 1.5)
+
+def test_zscore_prezzi_costanti_e_metodo_sconosciuto():
+    df = pd.DataFrame({
+        'data': pd.date_range('2025-01-01', periods=8), 'ingrediente': 'riso',
+        'fornitore': 'Elba', 'prezzo_unitario': [2.0] * 7 + [3.0],
+    })
+    z = zscore_prezzi(df, min_ordini=3)
+    assert z['zscore'].isna().all()          # std 0: nessun riferimento, nessuna anomalia
+    assert not z['anomalia'].any()
+    with pytest.raises(ValueError):
+        zscore_prezzi(df, 'mediana')
+
+def _retta_riferimento(x: np.ndarray, y: np.ndarray, w: np.ndarray) -> tuple:
+    pendenza, intercetta = np.polyfit(x, y, 1, w=np.sqrt(w))   # polyfit pesa i residui, non i quadrati
+    return pendenza, intercetta
+
+def test_trend_come_retta_per_serie():
+    df = leggi_fornitori(generatori.genera_csv_fornitori(n_fornitori=3)).df
+    for metodo in METODI_TREND:
+        trend = trend_prezzi(df, metodo=metodo, iterazioni=5)
+        assert len(trend) > 10
+        for (ing, forn), r in trend.iterrows():
+            g = df[(df['ingrediente'] == ing) & (df['fornitore'] == forn) & df['prezzo_unitario'].notna()]
+            x = (g['data'] - g['data'].min()).dt.days.to_numpy(dtype=float)
+            y = g['prezzo_unitario'].to_numpy(dtype=float)
+            w = g['quantita'].to_numpy(dtype=float) if metodo == 'pesata' else np.ones(len(g))
+            pendenza, intercetta = _retta_riferimento(x, y, w)
+            for _ in range(5 if metodo == 'robusta' else 0):   # Huber IRLS
+                res = np.abs(y - intercetta - pendenza * x)
+                u = res / (HUBER_K * 1.4826 * np.median(res))
+                pendenza, intercetta = _retta_riferimento(x, y, np.where(u > 1, 1 / u, 1.0))
+            assert r['n_ordini'] == len(g)
+            np.testing.assert_allclose([r['pendenza'], r['intercetta']], [pendenza, intercetta], rtol=1e-7, atol=1e-9)
+
+def test_trend_robusto_ignora_un_ordine_anomalo():
+    giorni = np.arange(0, 200, 10)
+    prezzi = 10 + 0.01 * giorni
+    prezzi[-1] = 40.0   # un ordine sbagliato, l'ultimo
+    df = pd.DataFrame({
+        'data': pd.Timestamp('2025-01-01') + pd.to_timedelta(giorni, 'D'), 'ingrediente': 'salmone',
+        'fornitore': 'Rossi', 'quantita': 1.0, 'prezzo_unitario': prezzi,
+    })
+    ols = trend_prezzi(df)['pendenza'].iloc[0]
+    robusta = trend_prezzi(df, metodo='robusta', iterazioni=20)['pendenza'].iloc[0]
+    assert ols > 0.05
+    assert robusta == pytest.approx(0.01, rel=0.05)
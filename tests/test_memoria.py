@@ -0,0 +1,73 @@
+# Pokè To Go! – tipi compatti dei frame in memoria
+
+import numpy as np
+import pandas as pd
+
+from poketogo import generatori, memoria
+from poketogo.caricamento import (
+    carica_stato, colonne_ingredienti, elabora_fornitori, elabora_giornaliero,
+    estendi_giornaliero, leggi_giornaliero,
+)
+from poketogo.costi import distribuisci_costi
+
+def _svuota(file_bytes: bytes, colonna: str, dalla_riga: int) -> bytes:
+    """The file with `colonna` left empty on every row from `dalla_riga` on."""
+    righe = file_bytes.decode().rstrip('\n').split('\n')
+    p = righe[0].split(';').index(colonna)
+    for i in range(dalla_riga, len(righe)):
+        campi = righe[i].split(';')
+        campi[p] = ''
+        righe[i] = ';'.join(campi)
+    return ('\n'.join(righe) + '\n').encode()
+
+def test_costi_distribuiti_restano_float64():
+    gio = generatori.genera_csv_giornaliero()
+    df, df_dist, ingred_cols = elabora_giornaliero(gio)
+    assert set(df_dist.dtypes) == {np.dtype('float64')}
+    atteso = distribuisci_costi(leggi_giornaliero(gio), ingred_cols)
+    pd.testing.assert_frame_equal(df_dist, atteso, rtol=0, atol=0)
+    # stessa somma, con le stesse cifre, del frame riempito colonna per colonna
+    per_colonna = pd.DataFrame(0.0, index=atteso.index, columns=ingred_cols)
+    for c in ingred_cols:
+        per_colonna.loc[:, c] += atteso[c]
+    np.testing.assert_array_equal(df['ing_dist'].to_numpy(), per_colonna.sum(axis=1).to_numpy())
+    for c in ['ing_dist', 'utile_lordo', 'pct_ingredienti', 'pct_dipendenti', 'margine_per_poke']:
+        assert df[c].dtype == 'float64'
+
+def test_compattazione_non_cambia_i_valori(monkeypatch):
+    gio = generatori.genera_csv_giornaliero()
+    compatto, _, ingred_cols = elabora_giornaliero(gio)
+    monkeypatch.setattr(memoria, 'COMPATTO', False)
+    pieno, _, _ = elabora_giornaliero(gio)
+    assert str(compatto['poke_totali'].dtype) == 'Int32'
+    pd.testing.assert_frame_equal(memoria.a_float64(compatto, memoria.CONTEGGI),
+                                  memoria.a_float64(pieno, memoria.CONTEGGI))
+
+def test_estensione_con_conteggi_che_diventano_vuoti():
+    # Il prefisso ha solo interi (Int32), le righe aggiunte lasciano vuoti: float64 in entrambi i casi
+    gio = generatori.genera_csv_giornaliero()
+    n = gio.count(b'\n')
+    gio = _svuota(gio, 'poke_baby', n - 5)
+    prefisso = b''.join(gio.splitlines(keepends=True)[:n - 10])
+    inc = estendi_giornaliero(carica_stato(prefisso), gio)
+    full = carica_stato(gio)
+    assert str(carica_stato(prefisso).df['poke_baby'].dtype) == 'Int32'
+    assert inc.df['poke_baby'].dtype == full.df['poke_baby'].dtype == 'float64'
+    pd.testing.assert_frame_equal(inc.df, full.df)
+    pd.testing.assert_frame_equal(inc.df_dist, full.df_dist)
+
+def test_sparse_e_ritorno():
+    df, _, ingred_cols = elabora_giornaliero(generatori.genera_csv_giornaliero())
+    sparso = memoria.sparsifica(df, ingred_cols)
+    assert all(isinstance(sparso[c].dtype, pd.SparseDtype) for c in ingred_cols)
+    assert memoria.mb(sparso) < memoria.mb(df)
+    pd.testing.assert_frame_equal(memoria.densifica(sparso), df)
+
+def test_fornitori_compatti():
+    forn = generatori.genera_csv_fornitori()
+    compatto = elabora_fornitori(forn).df
+    assert compatto['fornitore'].dtype == 'category' and compatto['quantita'].dtype == 'float32'
+    assert compatto['spesa'].dtype == compatto['prezzo_unitario'].dtype == 'float64'
+    rapporto = memoria.rapporto_memoria({'fornitori': compatto, 'vuoto': None})
+    assert rapporto.loc[0, 'MB'] < rapporto.loc[0, 'MB float64']
+    assert rapporto.loc[1, 'Righe'] == 0
@@ -0,0 +1,111 @@
+# Pokè To Go! – ServizioMeteo contro un server HTTP locale al posto di Open-Meteo
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from poketogo.meteo import ServizioMeteo
+
+def _daily(t: float) -> dict:
+    return {'time': ['2025-07-01'], 'weathercode': [0], 'temperature_2m_max': [t], 'precipitation_sum': [0.0]}
+
+class _ServerMeteo:
+    """Stand-in server: counts requests, answers with `stato` and `daily`,
+    and holds each answer until `via` is set."""
+
+    def __init__(self):
+        self.richieste = 0
+        self.stato = 200
+        self.daily = _daily(30.0)
+        self.via = threading.Event()
+        self.via.set()
+        servizio = self
+
+        class Gestore(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servizio.richieste += 1
+                servizio.via.wait(5)
+                corpo = json.dumps({'daily': servizio.daily}).encode()
+                self.send_response(servizio.stato)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Gestore)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/forecast"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+@pytest.fixture
+def open_meteo():
+    server = _ServerMeteo()
+    yield server
+    server.via.set()
+    server.server.shutdown()
+    server.server.server_close()
+
+def test_un_solo_download_in_corso(open_meteo, tmp_path):
+    meteo = ServizioMeteo(url=open_meteo.url, percorso=tmp_path / 'meteo.json')
+    open_meteo.via.clear()
+    letture = []
+    sessioni = [threading.Thread(target=lambda: letture.append(meteo.leggi())) for _ in range(8)]
+    for s in sessioni:
+        s.start()
+    for s in sessioni:
+        s.join()
+    assert letture == [None] * 8                   # nessuno aspetta la rete
+    open_meteo.via.set()
+    assert meteo.attendi(5)
+    assert open_meteo.richieste == 1 and meteo.n_download == 1
+    previsione = meteo.leggi()
+    assert previsione.daily == _daily(30.0) and not previsione.scaduta
+
+def test_previsione_scaduta_servita_durante_aggiornamento(open_meteo, tmp_path):
+    meteo = ServizioMeteo(url=open_meteo.url, percorso=tmp_path / 'meteo.json', ttl=0.3)
+    assert meteo.leggi(attesa=5).daily == _daily(30.0)
+    time.sleep(0.4)
+    open_meteo.daily = _daily(25.0)
+    open_meteo.via.clear()
+    inizio = time.monotonic()
+    previsione = meteo.leggi()
+    assert time.monotonic() - inizio < 1
+    assert previsione.daily == _daily(30.0) and previsione.scaduta
+    open_meteo.via.set()
+    assert meteo.attendi(5)
+    assert meteo.leggi().daily == _daily(25.0)
+    assert open_meteo.richieste == 2
+
+def test_errore_lascia_ultima_previsione_e_attende_prima_di_riprovare(open_meteo, tmp_path):
+    meteo = ServizioMeteo(url=open_meteo.url, percorso=tmp_path / 'meteo.json', ttl=0, ritenta_dopo=0.5)
+    assert meteo.leggi(attesa=5).daily == _daily(30.0)
+    open_meteo.stato = 500
+    assert meteo.leggi().daily == _daily(30.0)    # ttl=0: ogni lettura avvia un aggiornamento
+    assert meteo.attendi(5)
+    assert 'HTTPError' in meteo.errore and open_meteo.richieste == 2
+    for _ in range(5):                           # entro ritenta_dopo: nessuna nuova richiesta
+        assert meteo.leggi().daily == _daily(30.0)
+    assert meteo.attendi(5) and open_meteo.richieste == 2
+    time.sleep(0.6)
+    open_meteo.stato = 200
+    open_meteo.daily = _daily(27.0)
+    meteo.leggi()
+    assert meteo.attendi(5)
+    assert open_meteo.richieste == 3 and meteo.errore is None
+    assert meteo.leggi().daily == _daily(27.0)
+
+def test_copia_su_disco(open_meteo, tmp_path):
+    percorso = tmp_path / 'meteo.json'
+    assert ServizioMeteo(url=open_meteo.url, percorso=percorso).leggi(attesa=5) is not None
+    open_meteo.via.clear()
+    riavviato = ServizioMeteo(url=open_meteo.url, percorso=percorso)
+    previsione = riavviato.leggi()
+    assert previsione.daily == _daily(30.0) and not previsione.scaduta
+    assert open_meteo.richieste == 1 and riavviato.n_download == 0
+    # copia di un altro endpoint: ignorata
+    assert ServizioMeteo(url=open_meteo.url + '?altro=1', percorso=percorso).leggi() is None
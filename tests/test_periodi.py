@@ -0,0 +1,53 @@
+# Pokè To Go! – fette per periodo e allineamento tra anni
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from poketogo.periodi import AllineamentoAnni, IndiceDate, giorno_stagione
+
+DATE = pd.date_range('2023-01-01', '2025-12-31', freq='D')
+
+def _asse(d) -> np.datetime64:
+    return np.datetime64(date(2000, d.month, d.day), 'D')
+
+def test_calendario_29_febbraio():
+    al = AllineamentoAnni(DATE)
+    x = al.x(slice(None), 2025)
+    assert x.tolist() == [_asse(d).item() for d in DATE]
+    bisestile = DATE.get_loc(pd.Timestamp('2024-02-29'))
+    assert x[bisestile] == np.datetime64('2000-02-29')
+    # 1 marzo: stesso giorno della stagione negli anni bisestili e no
+    marzo = [DATE.get_loc(pd.Timestamp(f'{a}-03-01')) for a in (2023, 2024, 2025)]
+    assert set(al.giorni['calendario'][marzo]) == {60}
+    assert giorno_stagione(np.array(['2024-02-29', '2024-12-31'], dtype='datetime64[D]')).tolist() == [59, 365]
+
+def test_settimana_stesso_giorno_iso():
+    al = AllineamentoAnni(DATE)
+    for anno_rif in (2023, 2024, 2025):
+        x = al.x(slice(None), anno_rif, 'settimana')
+        for d, xi in zip(DATE, x):
+            g = (d.date() - date.fromisocalendar(d.year, 1, 1)).days
+            atteso = date.fromisocalendar(anno_rif, 1, 1) + pd.Timedelta(days=g).to_pytimedelta()
+            fuori = atteso.year - anno_rif
+            # posizione del giorno corrispondente sull'asse 2000, ±366 se cade in un altro anno
+            assert xi == _asse(atteso) + 366 * fuori, (d, anno_rif)
+            assert atteso.weekday() == d.weekday()
+
+def test_righe_qualsiasi_e_allineamento_sconosciuto():
+    al = AllineamentoAnni(DATE)
+    righe = np.array([400, 59, 800])
+    np.testing.assert_array_equal(al.x(righe, 2025), al.x(slice(None), 2025)[righe])
+    with pytest.raises(ValueError):
+        giorno_stagione(DATE, 'mese')
+
+def test_indice_date_con_nat_in_coda():
+    date_nat = np.concatenate([DATE.to_numpy(), np.array(['NaT', 'NaT'], dtype='datetime64[ns]')])
+    indice = IndiceDate(date_nat)
+    assert indice.anno(2024) == slice(365, 731)
+    assert indice.tra('2025-12-30') == slice(len(DATE) - 2, len(DATE))     # i NaT restano fuori
+    assert indice.tra(fine='2022-06-01') == slice(0, 0)
+    assert indice.tra('2024-03-10', '2024-03-01') == slice(434, 434)
+    assert indice.anno(2030) == slice(len(DATE), len(DATE))
@@ -0,0 +1,35 @@
+# Pokè To Go! – profilo dei rerun e dei frammenti
+
+import json
+
+from poketogo import profilo
+
+def test_frammento_nel_rerun_completo_e_da_solo(tmp_path):
+    run = profilo.avvia(True)
+    with profilo.frammento('_grafico', True) as proprio:
+        assert proprio is None                  # dentro il run completo: uno span del run
+        profilo.conta('vista', hit=True)
+    profilo.termina()
+    assert [s['nome'] for s in run.span] == ['_grafico']
+    assert run.cache['vista']['hit'] == 1
+
+    # Rerun del solo frammento: profilo nuovo, quello del run precedente non cambia
+    for _ in range(2):
+        with profilo.frammento('_grafico', True) as proprio:
+            assert profilo.corrente() is proprio and proprio is not run
+            with profilo.misura('calcolo'):
+                pass
+            profilo.conta('vista', hit=False, valore=b'1234')
+        assert [s['nome'] for s in proprio.span] == ['calcolo', '_grafico']
+        assert proprio.cache == {'vista': {'hit': 0, 'miss': 1, 'byte': 4}}
+        assert profilo.corrente() is run
+    assert len(run.span) == 1 and run.cache['vista'] == {'hit': 1, 'miss': 0, 'byte': 0}
+
+    log = tmp_path / 'profilo.jsonl'
+    assert proprio.scrivi(str(log), frammento='_grafico')
+    assert json.loads(log.read_text())['frammento'] == '_grafico'
+
+def test_frammento_senza_profilo():
+    profilo.avvia(False)
+    with profilo.frammento('_grafico', False) as proprio:
+        assert proprio is None and profilo.corrente() is None
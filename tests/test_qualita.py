@@ -0,0 +1,48 @@
+# Pokè To Go! – controllo qualità del file giornaliero
+
+import numpy as np
+import pandas as pd
+
+from poketogo import generatori
+from poketogo.caricamento import elabora_giornaliero
+from poketogo.qualita import REGOLE, Regola, righe_segnalate, valuta_regole, verifica_giornaliero
+
+def _giorni() -> pd.DataFrame:
+    nan = np.nan
+    return pd.DataFrame({
+        'data':        pd.to_datetime(['2025-06-01', '2025-06-02', '2025-06-02', '2025-06-03',
+                                       '2025-06-04', '2025-06-05', '2025-06-06']),
+        'fatturato':   [500.0, 300.0, 320.0, 200.0, 0.0, nan, nan],
+        'poke_totali': pd.array([20, 10, 11, 0, 5, 0, 4], dtype='Int32'),
+        'ing_dist':    [50.0, 40.0, 40.0, 30.0, 0.0, 25.0, 0.0],
+    })
+
+def test_regole_riga_per_riga():
+    df = _giorni()
+    v = valuta_regole(df)
+    assert v.conteggi == {'date_duplicate': 1, 'incasso_senza_poke': 1,
+                          'poke_senza_incasso': 2, 'incasso_mancante': 1}
+    assert v.esempi['date_duplicate'] == ['02/06/2025']
+    assert v.esempi['poke_senza_incasso'] == ['04/06/2025', '06/06/2025']
+    # bit i = regola i: senza incasso, la riga 5 ha rifornimenti (bit 3), la riga 6 poke (bit 2)
+    assert v.flag.tolist() == [0, 1, 1, 2, 4, 8, 4]
+    assert righe_segnalate(v, df).values.tolist() == [
+        ['02/06/2025', 'data ripetuta'], ['02/06/2025', 'data ripetuta'],
+        ['03/06/2025', 'incasso senza poke'], ['04/06/2025', 'poke senza incasso'],
+        ['05/06/2025', 'rifornimento senza incasso'], ['06/06/2025', 'poke senza incasso'],
+    ]
+
+def test_regole_aggiuntive_e_righe_con_piu_regole():
+    regole = REGOLE + [Regola('incasso_alto', "incasso alto", "{n} giorni con incasso alto: {date}",
+                              lambda c: c['fatturato'] > 250)]
+    v = valuta_regole(_giorni(), regole)
+    assert v.flag.dtype == np.uint8
+    assert v.flag.tolist() == [16, 17, 17, 2, 4, 8, 4]
+    assert righe_segnalate(v, _giorni())['Controlli'].iloc[1] == 'data ripetuta · incasso alto'
+
+def test_avvisi_come_conteggi():
+    df, _, ingred_cols = elabora_giornaliero(generatori.genera_csv_giornaliero())
+    v = verifica_giornaliero(pd.concat([df, df.iloc[[10]]]).sort_values('data', kind='stable'), ingred_cols)
+    assert v.conteggi['date_duplicate'] == 1
+    assert [a.livello for a in v.avvisi].count('warning') == sum(1 for n in v.conteggi.values() if n)
+    assert v.avvisi[0].messaggio.startswith('⚠️ 1 date inserite più di una volta')